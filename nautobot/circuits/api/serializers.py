@@ -10,6 +10,7 @@ from nautobot.dcim.api.nested_serializers import (
 from nautobot.dcim.api.serializers import (
     CableTerminationSerializer,
     ConnectedEndpointSerializer,
+    PathEndpointListSerializer,
 )
 from nautobot.extras.api.customfields import CustomFieldModelSerializer
 from nautobot.extras.api.serializers import (
@@ -137,6 +138,7 @@ class CircuitTerminationSerializer(CableTerminationSerializer, ConnectedEndpoint
 
     class Meta:
         model = CircuitTermination
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -64,7 +64,7 @@ class CircuitViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
 
 
 class CircuitTerminationViewSet(PathEndpointMixin, ModelViewSet):
-    queryset = CircuitTermination.objects.prefetch_related("circuit", "site", "_path__destination", "cable")
+    queryset = CircuitTermination.objects.prefetch_related("circuit", "site", "cable")
     serializer_class = serializers.CircuitTerminationSerializer
     filterset_class = filters.CircuitTerminationFilterSet
     brief_prefetch_fields = ["circuit"]
@@ -9,6 +9,7 @@ from django.utils import timezone
 from .models import Circuit, CircuitTermination
 from nautobot.dcim.models import CablePath
 from nautobot.dcim.signals import create_cablepath
+from nautobot.dcim.tracing import CablePathTracer
 
 
 def rebuild_paths_circuits(obj):
@@ -21,14 +22,18 @@ def rebuild_paths_circuits(obj):
         Q(path__contains=obj)
         | Q(destination_type=termination_type, destination_id=obj.pk)
         | Q(origin_type=termination_type, origin_id=obj.pk)
-    )
+    ).prefetch_related("origin")
+    cable_paths = list(cable_paths)
+
+    tracer = CablePathTracer()
+    tracer.preload(cp.origin for cp in cable_paths)
 
     with transaction.atomic():
         for cp in cable_paths:
             invalidate_obj(cp.origin)
             cp.delete()
             # Prevent looping back to rebuild_paths during the atomic transaction.
-            create_cablepath(cp.origin, rebuild=False)
+            create_cablepath(cp.origin, rebuild=False, tracer=tracer)
 
 
 @receiver((post_save, post_delete), sender=CircuitTermination)
@@ -100,6 +100,7 @@ PREFER_IPV4 = False
 # Racks
 RACK_ELEVATION_DEFAULT_UNIT_HEIGHT = 22
 RACK_ELEVATION_DEFAULT_UNIT_WIDTH = 220
+RACK_ELEVATION_CACHE_TIMEOUT = 86400
 
 # Global 3rd-party authentication settings
 EXTERNAL_AUTH_DEFAULT_GROUPS = []
@@ -120,6 +121,14 @@ SOCIAL_AUTH_POSTGRES_JSONFIELD = False
 STORAGE_BACKEND = None
 STORAGE_CONFIG = {}
 
+# Webhooks
+WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 5
+WEBHOOK_CIRCUIT_BREAKER_TIMEOUT = 60
+WEBHOOK_MAX_CONCURRENCY = 10
+WEBHOOK_MAX_RETRIES = 3
+WEBHOOK_RETRY_BACKOFF = 2
+WEBHOOK_TIMEOUT = 30
+
 # Test runner that is aware of our use of "integration" tags and only runs
 # integration tests if explicitly passed in with `nautobot-server test --tag integration`.
 TEST_RUNNER = "nautobot.core.tests.runner.NautobotTestRunner"
@@ -132,7 +132,7 @@ class ObjectListView(ObjectPermissionRequiredMixin, View):
 
         # Add custom field headers, if any
         if hasattr(self.queryset.model, "_custom_field_data"):
-            for custom_field in CustomField.objects.get_for_model(self.queryset.model):
+            for custom_field in CustomField.objects.get_for_model_cached(self.queryset.model):
                 headers.append(custom_field.name)
                 custom_fields.append(custom_field.name)
 
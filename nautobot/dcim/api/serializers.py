@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
@@ -49,6 +50,7 @@ from nautobot.dcim.models import (
     Site,
     VirtualChassis,
 )
+from nautobot.dcim.utils import prefetch_cable_paths
 from nautobot.extras.api.customfields import CustomFieldModelSerializer
 from nautobot.extras.api.serializers import (
     TaggedObjectSerializer,
@@ -88,6 +90,18 @@ class CableTerminationSerializer(serializers.ModelSerializer):
         return None
 
 
+class PathEndpointListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer which loads the CablePaths (and connected endpoints) of all of its PathEndpoints in bulk.
+
+    Serializers inheriting from ConnectedEndpointSerializer should set this as their `Meta.list_serializer_class`.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return super().to_representation(prefetch_cable_paths(iterable))
+
+
 class ConnectedEndpointSerializer(ValidatedModelSerializer):
     connected_endpoint_type = serializers.SerializerMethodField(read_only=True)
     connected_endpoint = serializers.SerializerMethodField(read_only=True)
@@ -260,6 +274,7 @@ class RackSerializer(TaggedObjectSerializer, StatusModelSerializerMixin, CustomF
     outer_unit = ChoiceField(choices=RackDimensionUnitChoices, allow_blank=True, required=False)
     device_count = serializers.IntegerField(read_only=True)
     powerfeed_count = serializers.IntegerField(read_only=True)
+    utilization = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Rack
@@ -290,11 +305,22 @@ class RackSerializer(TaggedObjectSerializer, StatusModelSerializerMixin, CustomF
             "device_count",
             "powerfeed_count",
             "computed_fields",
+            "utilization",
         ]
         # Omit the UniqueTogetherValidator that would be automatically added to validate (group, facility_id). This
         # prevents facility_id from being interpreted as a required field.
         validators = [UniqueTogetherValidator(queryset=Rack.objects.all(), fields=("group", "name"))]
-        opt_in_fields = ["computed_fields"]
+        opt_in_fields = ["computed_fields", "utilization"]
+
+    @swagger_serializer_method(serializer_or_field=serializers.DictField)
+    def get_utilization(self, obj):
+        """
+        Return the space and power utilization of the rack, each as a numerator and denominator.
+        """
+        return {
+            "space": obj.get_utilization()._asdict(),
+            "power": obj.get_power_utilization()._asdict(),
+        }
 
     def validate(self, data):
         # Validate uniqueness of (group, facility_id) since we omitted the automatically-created validator from Meta.
@@ -359,6 +385,15 @@ class RackElevationDetailFilterSerializer(serializers.Serializer):
     include_images = serializers.BooleanField(required=False, default=True)
 
 
+class RackElevationSVGSerializer(serializers.Serializer):
+    """
+    A rack elevation rendered as an SVG document.
+    """
+
+    id = serializers.UUIDField(read_only=True)
+    svg = serializers.CharField(read_only=True)
+
+
 #
 # Device types
 #
@@ -789,6 +824,7 @@ class ConsoleServerPortSerializer(
 
     class Meta:
         model = ConsoleServerPort
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -823,6 +859,7 @@ class ConsolePortSerializer(
 
     class Meta:
         model = ConsolePort
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -859,6 +896,7 @@ class PowerOutletSerializer(
 
     class Meta:
         model = PowerOutlet
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -895,6 +933,7 @@ class PowerPortSerializer(
 
     class Meta:
         model = PowerPort
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -941,6 +980,7 @@ class InterfaceSerializer(
 
     class Meta:
         model = Interface
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -1339,6 +1379,7 @@ class PowerFeedSerializer(
 
     class Meta:
         model = PowerFeed
+        list_serializer_class = PathEndpointListSerializer
         fields = [
             "id",
             "url",
@@ -66,6 +66,7 @@ router.register("power-feeds", views.PowerFeedViewSet)
 
 # Miscellaneous
 router.register("connected-device", views.ConnectedDeviceViewSet, basename="connected-device")
+router.register("topology", views.TopologyViewSet, basename="topology")
 
 app_name = "dcim-api"
 urlpatterns = router.urls
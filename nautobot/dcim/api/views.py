@@ -2,13 +2,17 @@ import socket
 from collections import OrderedDict
 
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import F
-from django.http import HttpResponseForbidden, HttpResponse
+from django.http import HttpResponseForbidden, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.mixins import ListModelMixin
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -20,6 +24,7 @@ from nautobot.core.api.views import ModelViewSet
 from nautobot.core.api.exceptions import ServiceUnavailable
 from nautobot.core.api.metadata import ContentTypeMetadata
 from nautobot.dcim import filters
+from nautobot.dcim.elevations import render_rack_elevations
 from nautobot.dcim.models import (
     Cable,
     CablePath,
@@ -55,6 +60,9 @@ from nautobot.dcim.models import (
     Site,
     VirtualChassis,
 )
+from nautobot.dcim.provisioning import provision_devices
+from nautobot.dcim.topology import TopologyGraph
+from nautobot.dcim.utils import prefetch_cable_paths
 from nautobot.extras.api.views import (
     ConfigContextQuerySetMixin,
     CustomFieldModelViewSet,
@@ -87,6 +95,7 @@ class PathEndpointMixin(object):
         Trace a complete cable path and return each segment as a three-tuple of (termination, cable, termination).
         """
         obj = get_object_or_404(self.queryset, pk=pk)
+        prefetch_cable_paths([obj])
 
         # Initialize the path array
         path = []
@@ -193,6 +202,13 @@ class RackViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
     serializer_class = serializers.RackSerializer
     filterset_class = filters.RackFilterSet
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Compute the utilization of the whole page of racks in bulk if it has been requested
+        if "utilization" in self.request.query_params.get("include", "").split(","):
+            queryset = queryset.annotate_utilization()
+        return queryset
+
     @swagger_auto_schema(
         responses={200: serializers.RackUnitSerializer(many=True)},
         query_serializer=serializers.RackElevationDetailFilterSerializer,
@@ -209,7 +225,8 @@ class RackViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
 
         if data["render"] == "svg":
             # Render and return the elevation as an SVG drawing with the correct content type
-            drawing = rack.get_elevation_svg(
+            drawing = render_rack_elevations(
+                [rack],
                 face=data["face"],
                 user=request.user,
                 unit_width=data["unit_width"],
@@ -217,8 +234,8 @@ class RackViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 legend_width=data["legend_width"],
                 include_images=data["include_images"],
                 base_url=request.build_absolute_uri("/"),
-            )
-            return HttpResponse(drawing.tostring(), content_type="image/svg+xml")
+            )[rack.pk]
+            return HttpResponse(drawing, content_type="image/svg+xml")
 
         else:
             # Return a JSON representation of the rack units in the elevation
@@ -239,6 +256,35 @@ class RackViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 rack_units = serializers.RackUnitSerializer(page, many=True, context={"request": request})
                 return self.get_paginated_response(rack_units.data)
 
+    @swagger_auto_schema(
+        responses={200: serializers.RackElevationSVGSerializer(many=True)},
+        query_serializer=serializers.RackElevationDetailFilterSerializer,
+    )
+    @action(detail=False, url_path="elevations")
+    def elevations(self, request):
+        """
+        Rendered SVG elevations of a page of racks, which may be filtered using any of the rack list filters.
+        """
+        serializer = serializers.RackElevationDetailFilterSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        racks = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        drawings = render_rack_elevations(
+            racks,
+            face=data["face"],
+            user=request.user,
+            unit_width=data["unit_width"],
+            unit_height=data["unit_height"],
+            legend_width=data["legend_width"],
+            include_images=data["include_images"],
+            base_url=request.build_absolute_uri("/"),
+        )
+        elevations = serializers.RackElevationSVGSerializer(
+            [{"id": rack.pk, "svg": drawings[rack.pk]} for rack in racks], many=True
+        )
+        return self.get_paginated_response(elevations.data)
+
 
 #
 # Rack reservations
@@ -407,6 +453,42 @@ class DeviceViewSet(ConfigContextQuerySetMixin, StatusViewSetMixin, CustomFieldM
 
         return serializers.DeviceWithConfigContextSerializer
 
+    @swagger_auto_schema(
+        request_body=serializers.DeviceSerializer(many=True),
+        responses={201: serializers.NestedDeviceSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-provision")
+    def bulk_provision(self, request):
+        """
+        Create a list of devices, along with all of the components defined by their device types, in bulk. Each device
+        is given in the same form as when creating a single device.
+        """
+        serializer = serializers.DeviceSerializer(data=request.data, many=True, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        devices = []
+        for data in serializer.validated_data:
+            data = data.copy()
+            tags = data.pop("tags", None)
+            device = Device(**data)
+            device._tags = tags or []
+            devices.append(device)
+
+        # Enforce object-level permissions on the created devices
+        try:
+            with transaction.atomic():
+                provision_devices(devices, request=request, validate=False)
+                self._validate_objects(devices)
+        except ObjectDoesNotExist:
+            raise PermissionDenied()
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+
+        return Response(
+            serializers.NestedDeviceSerializer(devices, many=True, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @swagger_auto_schema(
         manual_parameters=[Parameter(name="method", in_="query", required=True, type=openapi.TYPE_STRING)],
         responses={"200": serializers.DeviceNAPALMSerializer},
@@ -523,39 +605,35 @@ class DeviceViewSet(ConfigContextQuerySetMixin, StatusViewSetMixin, CustomFieldM
 
 
 class ConsolePortViewSet(PathEndpointMixin, CustomFieldModelViewSet):
-    queryset = ConsolePort.objects.prefetch_related("device", "_path__destination", "cable", "_cable_peer", "tags")
+    queryset = ConsolePort.objects.prefetch_related("device", "cable", "tags")
     serializer_class = serializers.ConsolePortSerializer
     filterset_class = filters.ConsolePortFilterSet
     brief_prefetch_fields = ["device"]
 
 
 class ConsoleServerPortViewSet(PathEndpointMixin, CustomFieldModelViewSet):
-    queryset = ConsoleServerPort.objects.prefetch_related(
-        "device", "_path__destination", "cable", "_cable_peer", "tags"
-    )
+    queryset = ConsoleServerPort.objects.prefetch_related("device", "cable", "tags")
     serializer_class = serializers.ConsoleServerPortSerializer
     filterset_class = filters.ConsoleServerPortFilterSet
     brief_prefetch_fields = ["device"]
 
 
 class PowerPortViewSet(PathEndpointMixin, CustomFieldModelViewSet):
-    queryset = PowerPort.objects.prefetch_related("device", "_path__destination", "cable", "_cable_peer", "tags")
+    queryset = PowerPort.objects.prefetch_related("device", "cable", "tags")
     serializer_class = serializers.PowerPortSerializer
     filterset_class = filters.PowerPortFilterSet
     brief_prefetch_fields = ["device"]
 
 
 class PowerOutletViewSet(PathEndpointMixin, CustomFieldModelViewSet):
-    queryset = PowerOutlet.objects.prefetch_related("device", "_path__destination", "cable", "_cable_peer", "tags")
+    queryset = PowerOutlet.objects.prefetch_related("device", "cable", "tags")
     serializer_class = serializers.PowerOutletSerializer
     filterset_class = filters.PowerOutletFilterSet
     brief_prefetch_fields = ["device"]
 
 
 class InterfaceViewSet(PathEndpointMixin, CustomFieldModelViewSet):
-    queryset = Interface.objects.prefetch_related(
-        "device", "_path__destination", "cable", "_cable_peer", "ip_addresses", "tags"
-    )
+    queryset = Interface.objects.prefetch_related("device", "cable", "ip_addresses", "tags")
     serializer_class = serializers.InterfaceSerializer
     filterset_class = filters.InterfaceFilterSet
     brief_prefetch_fields = ["device"]
@@ -663,9 +741,7 @@ class PowerFeedViewSet(PathEndpointMixin, StatusViewSetMixin, CustomFieldModelVi
     queryset = PowerFeed.objects.prefetch_related(
         "power_panel",
         "rack",
-        "_path__destination",
         "cable",
-        "_cable_peer",
         "status",
         "tags",
     )
@@ -731,3 +807,119 @@ class ConnectedDeviceViewSet(ViewSet):
             return Response()
 
         return Response(serializers.DeviceSerializer(local_interface.device, context={"request": request}).data)
+
+
+class TopologyViewSet(ViewSet):
+    """
+    This endpoint exports the physical connectivity graph (devices, their cabled components, circuit terminations and
+    power feeds, and the cables, pass-throughs and circuits joining them) of the devices matching the given device
+    filters (e.g. `site`, `region` or `rack_id`), and answers path queries over that graph.
+
+    Nodes are identified as `<app_label>.<model_name>:<id>`, for example `dcim.interface:<id>`.
+    """
+
+    permission_classes = [IsAuthenticated]
+    _graph_format_param = Parameter(
+        name="graph_format",
+        in_="query",
+        description="Export format: json (default) or graphml",
+        required=False,
+        type=openapi.TYPE_STRING,
+    )
+    _source_param = Parameter(
+        name="source",
+        in_="query",
+        description="ID of the node from which to start, e.g. dcim.interface:<id>",
+        required=True,
+        type=openapi.TYPE_STRING,
+    )
+    _target_param = Parameter(
+        name="target",
+        in_="query",
+        description="ID of the node at which to end, e.g. dcim.device:<id>",
+        required=True,
+        type=openapi.TYPE_STRING,
+    )
+    _node_type_param = Parameter(
+        name="node_type",
+        in_="query",
+        description="Only return nodes of this type, e.g. dcim.device",
+        required=False,
+        type=openapi.TYPE_STRING,
+    )
+    _traverse_devices_param = Parameter(
+        name="traverse_devices",
+        in_="query",
+        description="Allow paths to pass between the components of a device (default: false)",
+        required=False,
+        type=openapi.TYPE_BOOLEAN,
+    )
+
+    def get_view_name(self):
+        return "Topology"
+
+    def get_graph(self, request):
+        filterset = filters.DeviceFilterSet(
+            request.query_params, queryset=Device.objects.restrict(request.user, "view")
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return TopologyGraph.from_devices(filterset.qs, user=request.user)
+
+    def get_traverse_devices(self, request):
+        return request.query_params.get(self._traverse_devices_param.name, "").lower() in ("true", "1")
+
+    def get_node_id(self, request, graph, param):
+        node_id = request.query_params.get(param.name)
+        if not node_id:
+            raise MissingFilterException(detail=f'Request must include a "{param.name}" node ID.')
+        if node_id not in graph.nodes:
+            raise NotFound(detail=f"Node {node_id} was not found in the topology.")
+        return node_id
+
+    @swagger_auto_schema(manual_parameters=[_graph_format_param])
+    def list(self, request):
+        graph_format = request.query_params.get(self._graph_format_param.name, "json")
+        if graph_format not in ("json", "graphml"):
+            raise ValidationError({self._graph_format_param.name: f"Unsupported graph format: {graph_format}"})
+
+        graph = self.get_graph(request)
+        if graph_format == "graphml":
+            response = StreamingHttpResponse(graph.iter_graphml(), content_type="application/graphml+xml")
+            response["Content-Disposition"] = 'attachment; filename="topology.graphml"'
+            return response
+        return StreamingHttpResponse(graph.iter_json(), content_type="application/json")
+
+    @swagger_auto_schema(manual_parameters=[_source_param, _target_param, _traverse_devices_param])
+    @action(detail=False, url_path="shortest-path")
+    def shortest_path(self, request):
+        """
+        Return the nodes and edges along a shortest path between two nodes (or empty lists if there is none).
+        """
+        graph = self.get_graph(request)
+        source = self.get_node_id(request, graph, self._source_param)
+        target = self.get_node_id(request, graph, self._target_param)
+        nodes, edges = graph.shortest_path(source, target, traverse_devices=self.get_traverse_devices(request))
+
+        return Response(
+            {
+                "nodes": [graph.nodes[node_id] for node_id in nodes or []],
+                "edges": [graph.edges[edge_id] for edge_id in edges or []],
+            }
+        )
+
+    @swagger_auto_schema(manual_parameters=[_source_param, _node_type_param, _traverse_devices_param])
+    @action(detail=False, url_path="reachable")
+    def reachable(self, request):
+        """
+        Return all nodes (optionally, of a given type) reachable from a node, in order of increasing distance.
+        """
+        graph = self.get_graph(request)
+        source = self.get_node_id(request, graph, self._source_param)
+        node_ids = graph.reachable(
+            source,
+            node_type=request.query_params.get(self._node_type_param.name),
+            traverse_devices=self.get_traverse_devices(request),
+        )
+
+        return Response({"nodes": [graph.nodes[node_id] for node_id in node_ids]})
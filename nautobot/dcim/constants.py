@@ -13,6 +13,14 @@ RACK_ELEVATION_BORDER_WIDTH = 2
 RACK_ELEVATION_LEGEND_WIDTH_DEFAULT = 30
 
 
+#
+# Devices
+#
+
+# Maximum number of objects to be inserted by each query when provisioning devices and their components in bulk
+DEVICE_PROVISIONING_BATCH_SIZE = 1000
+
+
 #
 # RearPorts
 #
@@ -1,12 +1,18 @@
+import hashlib
+import uuid
+from collections import defaultdict
+
 import svgwrite
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.urls import reverse
 from django.utils.http import urlencode
 
 from nautobot.utilities.utils import foreground_color
 from .choices import DeviceFaceChoices
-from .constants import RACK_ELEVATION_BORDER_WIDTH
+from .constants import RACK_ELEVATION_BORDER_WIDTH, RACK_ELEVATION_LEGEND_WIDTH_DEFAULT
 
 
 class RackElevationSVG:
@@ -17,21 +23,40 @@ class RackElevationSVG:
     :param user: User instance. If specified, only devices viewable by this user will be fully displayed.
     :param include_images: If true, the SVG document will embed front/rear device face images, where available
     :param base_url: Base URL for links within the SVG document. If none, links will be relative.
+    :param devices: List of all Devices within the rack, as returned by `Rack.get_elevation_devices()` (optional)
+    :param reservations: List of all RackReservations of the rack (optional)
+    :param permitted_device_ids: Collection of the IDs of the rack's devices which are viewable by the user (optional)
+
+    The `devices`, `reservations` and `permitted_device_ids` parameters allow the objects needed to draw many racks
+    to be loaded in bulk (see `render_rack_elevations()`); any which are not given are retrieved from the database.
     """
 
-    def __init__(self, rack, user=None, include_images=True, base_url=None):
+    def __init__(
+        self,
+        rack,
+        user=None,
+        include_images=True,
+        base_url=None,
+        devices=None,
+        reservations=None,
+        permitted_device_ids=None,
+    ):
         self.rack = rack
         self.include_images = include_images
+        self.devices = devices
+        self.reservations = reservations
         if base_url is not None:
             self.base_url = base_url.rstrip("/")
         else:
             self.base_url = ""
 
         # Determine the subset of devices within this rack that are viewable by the user, if any
-        permitted_devices = self.rack.devices
-        if user is not None:
-            permitted_devices = permitted_devices.restrict(user, "view")
-        self.permitted_device_ids = permitted_devices.values_list("pk", flat=True)
+        if permitted_device_ids is None:
+            permitted_devices = self.rack.devices
+            if user is not None:
+                permitted_devices = permitted_devices.restrict(user, "view")
+            permitted_device_ids = permitted_devices.values_list("pk", flat=True)
+        self.permitted_device_ids = permitted_device_ids
 
     @staticmethod
     def _get_device_description(device):
@@ -145,12 +170,12 @@ class RackElevationSVG:
         link.add(drawing.text("add device", insert=text, class_="add-device"))
 
     def merge_elevations(self, face):
-        elevation = self.rack.get_rack_units(face=face, expand_devices=False)
+        elevation = self.rack.get_rack_units(face=face, expand_devices=False, devices=self.devices)
         if face == DeviceFaceChoices.FACE_REAR:
             other_face = DeviceFaceChoices.FACE_FRONT
         else:
             other_face = DeviceFaceChoices.FACE_REAR
-        other = self.rack.get_rack_units(face=other_face)
+        other = self.rack.get_rack_units(face=other_face, devices=self.devices)
 
         unit_cursor = 0
         for u in elevation:
@@ -170,7 +195,7 @@ class RackElevationSVG:
             unit_width + legend_width + RACK_ELEVATION_BORDER_WIDTH * 2,
             unit_height * self.rack.u_height + RACK_ELEVATION_BORDER_WIDTH * 2,
         )
-        reserved_units = self.rack.get_reserved_units()
+        reserved_units = self.rack.get_reserved_units(reservations=self.reservations)
 
         unit_cursor = 0
         for ru in range(0, self.rack.u_height):
@@ -240,3 +265,120 @@ class RackElevationSVG:
         drawing.add(frame)
 
         return drawing
+
+
+#
+# Caching
+#
+
+
+def _get_rack_version_key(rack_id):
+    return f"nautobot.dcim.rack.{rack_id}.elevation_version"
+
+
+def _invalidate_rack_elevations(rack_ids):
+    cache.set_many({_get_rack_version_key(rack_id): uuid.uuid4().hex for rack_id in rack_ids}, timeout=None)
+
+
+def invalidate_rack_elevations(rack_ids):
+    """
+    Discard all cached elevation SVGs of the given racks.
+
+    The racks' caches are invalidated both immediately and again once the current transaction (if any) is committed,
+    so that an elevation rendered from uncommitted data is never served afterwards.
+    """
+    rack_ids = {rack_id for rack_id in rack_ids if rack_id is not None}
+    if rack_ids:
+        _invalidate_rack_elevations(rack_ids)
+        transaction.on_commit(lambda: _invalidate_rack_elevations(rack_ids))
+
+
+def render_rack_elevations(
+    racks,
+    face=DeviceFaceChoices.FACE_FRONT,
+    user=None,
+    unit_width=settings.RACK_ELEVATION_DEFAULT_UNIT_WIDTH,
+    unit_height=settings.RACK_ELEVATION_DEFAULT_UNIT_HEIGHT,
+    legend_width=RACK_ELEVATION_LEGEND_WIDTH_DEFAULT,
+    include_images=True,
+    base_url=None,
+):
+    """
+    Return a dictionary mapping the PK of each of the given racks to its elevation, rendered as an SVG document string.
+
+    Rendered elevations are cached per rack, face, drawing size, image flag, base URL and the set of devices within the
+    rack which `user` is permitted to view. Elevations which are not already cached are rendered together, sharing a
+    single query each for the racks' devices and reservations. See `RackElevationSVG` and `Rack.get_elevation_svg()`
+    for a description of the parameters.
+    """
+    # Import added here to avoid circular imports with the models module.
+    from .models import Device, Rack, RackReservation
+
+    racks = {rack.pk: rack for rack in racks}
+    if not racks:
+        return {}
+
+    # Determine which of the racks' devices the user has permission to view
+    permitted_device_ids = defaultdict(set)
+    permitted_devices = Device.objects.filter(rack__in=racks.keys())
+    if user is not None:
+        permitted_devices = permitted_devices.restrict(user, "view")
+    for rack_id, device_id in permitted_devices.values_list("rack_id", "pk"):
+        permitted_device_ids[rack_id].add(device_id)
+
+    # Look up (or initialize) the current version of each rack's cached elevations
+    version_keys = {rack_id: _get_rack_version_key(rack_id) for rack_id in racks}
+    versions = cache.get_many(version_keys.values())
+    new_versions = {key: uuid.uuid4().hex for key in version_keys.values() if key not in versions}
+    if new_versions:
+        cache.set_many(new_versions, timeout=None)
+        versions.update(new_versions)
+
+    cache_keys = {}
+    for rack_id in racks:
+        params = "|".join(
+            str(param)
+            for param in (
+                face,
+                unit_width,
+                unit_height,
+                legend_width,
+                include_images,
+                base_url,
+                ",".join(sorted(str(pk) for pk in permitted_device_ids[rack_id])),
+            )
+        )
+        digest = hashlib.sha256(params.encode("utf-8")).hexdigest()
+        cache_keys[rack_id] = f"nautobot.dcim.rack.{rack_id}.elevation.{versions[version_keys[rack_id]]}.{digest}"
+
+    cached = cache.get_many(cache_keys.values())
+    elevations = {rack_id: cached[key] for rack_id, key in cache_keys.items() if key in cached}
+
+    # Render all remaining elevations using a single query each for devices and reservations
+    missing = [rack_id for rack_id in racks if rack_id not in elevations]
+    if missing:
+        devices = defaultdict(list)
+        for device in Rack.get_elevation_devices().filter(rack__in=missing):
+            devices[device.rack_id].append(device)
+        reservations = defaultdict(list)
+        for reservation in RackReservation.objects.select_related("user").filter(rack__in=missing):
+            reservations[reservation.rack_id].append(reservation)
+
+        rendered = {}
+        for rack_id in missing:
+            elevation = RackElevationSVG(
+                racks[rack_id],
+                user=user,
+                include_images=include_images,
+                base_url=base_url,
+                devices=devices[rack_id],
+                reservations=reservations[rack_id],
+                permitted_device_ids=permitted_device_ids[rack_id],
+            )
+            elevations[rack_id] = elevation.render(face, unit_width, unit_height, legend_width).tostring()
+            rendered[cache_keys[rack_id]] = elevations[rack_id]
+
+        if settings.RACK_ELEVATION_CACHE_TIMEOUT:
+            cache.set_many(rendered, timeout=settings.RACK_ELEVATION_CACHE_TIMEOUT)
+
+    return elevations
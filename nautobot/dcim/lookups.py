@@ -1,10 +1,17 @@
-from django.db import NotSupportedError
-from django.db.models.lookups import Lookup, Contains
+from django.apps import apps
+from django.db.models.lookups import Lookup
 
-from nautobot.dcim.utils import object_to_path_node
+from nautobot.dcim.utils import decompile_path_node, object_to_path_node
 
 
 class PathContains(Lookup):
+    """
+    Match CablePaths whose path includes the given object.
+
+    Rather than searching the `path` array itself, this is resolved through the indexed CablePathNode table as
+    `<cablepath>.id IN (SELECT cable_path_id FROM dcim_cablepathnode WHERE node_type_id = ... AND node_id = ...)`.
+    """
+
     lookup_name = "contains"
 
     def get_prep_lookup(self):
@@ -12,27 +19,23 @@ class PathContains(Lookup):
         self.rhs = object_to_path_node(self.rhs)
         return super().get_prep_lookup()
 
-    def process_rhs(self, compiler, connection):
-        rhs, rhs_params = super().process_rhs(compiler, connection)
-        rhs = "%s" % rhs_params[0]
-        return rhs, []
-
     def as_sql(self, compiler, connection):
-        lhs, lhs_params = self.process_lhs(compiler, connection)
-        rhs, rhs_params = self.process_rhs(compiler, connection)
-        params = lhs_params + rhs_params
-
-        vendor = connection.vendor
-        # Mapping of vendor => expr
-        sql_map = {
-            "postgresql": "%s::jsonb ? '%s'",
-            "mysql": "JSON_CONTAINS(%s, '\"%s\"','$')",
-        }
-
-        if vendor not in sql_map:
-            raise NotSupportedError(f"PathContains not supported by database {vendor}")
-
-        sql_expr = sql_map[vendor]
-        sql = sql_expr % (lhs, rhs)
+        CablePathNode = apps.get_model("dcim", "CablePathNode")
+        quote_name = connection.ops.quote_name
+
+        ct_id, object_id = decompile_path_node(self.rhs)
+        node_id_field = CablePathNode._meta.get_field("node_id")
+        cable_path_field = CablePathNode._meta.get_field("cable_path")
+        node_type_field = CablePathNode._meta.get_field("node_type")
+
+        sql = "{}.{} IN (SELECT {} FROM {} WHERE {} = %s AND {} = %s)".format(
+            quote_name(self.lhs.alias),
+            quote_name(self.lhs.target.model._meta.pk.column),
+            quote_name(cable_path_field.column),
+            quote_name(CablePathNode._meta.db_table),
+            quote_name(node_type_field.column),
+            quote_name(node_id_field.column),
+        )
+        params = [ct_id, node_id_field.get_db_prep_value(object_id, connection)]
 
         return sql, params
@@ -1,10 +1,18 @@
-from django.core.management.base import BaseCommand
-from django.core.management.color import no_style
-from django.db import connection
+import bisect
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cacheops import invalidate_model
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
 from nautobot.circuits.models import CircuitTermination
 from nautobot.dcim.models import (
     CablePath,
+    CablePathNode,
     ConsolePort,
     ConsoleServerPort,
     Interface,
@@ -12,7 +20,7 @@ from nautobot.dcim.models import (
     PowerOutlet,
     PowerPort,
 )
-from nautobot.dcim.signals import create_cablepath
+from nautobot.dcim.tracing import CablePathTracer
 
 ENDPOINT_MODELS = (
     CircuitTermination,
@@ -24,6 +32,64 @@ ENDPOINT_MODELS = (
     PowerPort,
 )
 
+CHECKPOINT_CACHE_KEY = "nautobot.dcim.trace_paths.checkpoint"
+
+# The ID of the process which opened the database connections held by this process (see _discard_inherited_connections)
+_connections_pid = os.getpid()
+
+
+def trace_shard(model_label, pks):
+    """
+    Retrace the CablePaths originating from the given objects and swap them in for any existing paths atomically.
+
+    Returns the number of CablePaths created.
+    """
+    _discard_inherited_connections()
+
+    model = apps.get_model(model_label)
+    origin_type = ContentType.objects.get_for_model(model)
+    origins = list(model.objects.filter(pk__in=pks, cable__isnull=False))
+
+    # Trace all paths in the shard against a single snapshot of the cable graph
+    tracer = CablePathTracer()
+    tracer.preload(origins)
+    cable_paths = []
+    for origin in origins:
+        cp = tracer.trace(origin)
+        if cp is not None:
+            origin._path = cp
+            cable_paths.append(cp)
+
+    with transaction.atomic():
+        CablePath.objects.filter(origin_type=origin_type, origin_id__in=pks).delete()
+        CablePath.objects.bulk_create(cable_paths)
+        CablePathNode.objects.bulk_create([node for cp in cable_paths for node in cp.build_nodes()])
+        model.objects.bulk_update(origins, ["_path"])
+
+    # bulk_create() and bulk_update() bypass cacheops' automatic invalidation
+    invalidate_model(CablePath)
+    invalidate_model(model)
+
+    return len(cable_paths)
+
+
+def _discard_inherited_connections():
+    """
+    Ensure that a worker process opens its own database connections rather than sharing those inherited from the
+    parent process. This is done once, by the first shard traced in each worker (as ProcessPoolExecutor's `initializer`
+    is not available on Python 3.6), and does nothing in the parent process.
+
+    The inherited connections are discarded without being closed, as closing them would terminate the parent's
+    sessions (including any server-side cursor through which it is still iterating over path origins).
+    """
+    global _connections_pid
+
+    if _connections_pid == os.getpid():
+        return
+    for conn in connections.all():
+        conn.connection = None
+    _connections_pid = os.getpid()
+
 
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in Nautobot"
@@ -41,6 +107,25 @@ class Command(BaseCommand):
             dest="no_input",
             help="Do not prompt user for any input/confirmation",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes among which to shard the path origins (default: 1)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            dest="batch_size",
+            help="Number of path origins to retrace in each shard (default: 1000)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            dest="resume",
+            help="Skip shards completed by a previous, interrupted run with --force",
+        )
 
     def draw_progress_bar(self, percentage):
         """
@@ -49,52 +134,118 @@ class Command(BaseCommand):
         bar_size = int(percentage / 5)
         self.stdout.write(f"\r  [{'#' * bar_size}{' ' * (20-bar_size)}] {int(percentage)}%", ending="")
 
+    def get_shards(self, origins, batch_size, completed):
+        """
+        Yield lists of up to `batch_size` origin PKs, in PK order, skipping any PKs within the `completed` ranges.
+        """
+        completed = sorted(completed)
+        shard = []
+        for pk in origins.order_by("pk").values_list("pk", flat=True).iterator():
+            i = bisect.bisect_right(completed, [str(pk), chr(0x10FFFF)]) - 1
+            if i >= 0 and completed[i][0] <= str(pk) <= completed[i][1]:
+                continue
+            shard.append(pk)
+            if len(shard) >= batch_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
     def handle(self, *model_names, **options):
+        workers = options["workers"]
+        batch_size = options["batch_size"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
 
-        # If --force was passed, first delete all existing CablePaths
         if options["force"]:
-            cable_paths = CablePath.objects.all()
-            paths_count = cable_paths.count()
+            paths_count = CablePath.objects.count()
 
             # Prompt the user to confirm recalculation of all paths
             if paths_count and not options["no_input"]:
                 self.stdout.write(self.style.ERROR("WARNING: Forcing recalculation of all cable paths."))
                 self.stdout.write(
-                    f"This will delete and recalculate all {paths_count} existing cable paths. Are you sure?"
+                    f"This will replace and recalculate all {paths_count} existing cable paths. Are you sure?"
                 )
                 confirmation = input("Type yes to confirm: ")
                 if confirmation != "yes":
                     self.stdout.write(self.style.SUCCESS("Aborting"))
                     return
 
-            # Delete all existing CablePath instances
-            self.stdout.write(f"Deleting {paths_count} existing cable paths...")
-            deleted_count, _ = CablePath.objects.all().delete()
-            self.stdout.write((self.style.SUCCESS(f"  Deleted {deleted_count} paths")))
-
-            # Reinitialize the model's PK sequence
-            self.stdout.write("Resetting database sequence for CablePath model")
-            sequence_sql = connection.ops.sequence_reset_sql(no_style(), [CablePath])
-            with connection.cursor() as cursor:
-                for sql in sequence_sql:
-                    cursor.execute(sql)
-
-        # Retrace paths
-        for model in ENDPOINT_MODELS:
-            origins = model.objects.filter(cable__isnull=False)
-            if not options["force"]:
-                origins = origins.filter(_path__isnull=True)
-            origins_count = origins.count()
-            if not origins_count:
-                self.stdout.write(f"Found no missing {model._meta.verbose_name} paths; skipping")
-                continue
+        # Existing paths are swapped out one shard at a time, so a forced run can only be resumed from its checkpoint.
+        # Without --force, only origins lacking a path are traced and the run resumes naturally, so the checkpoint of an
+        # interrupted forced run is left untouched.
+        checkpoint = cache.get(CHECKPOINT_CACHE_KEY, {}) if options["force"] and options["resume"] else {}
+        if options["force"]:
+            cache.set(CHECKPOINT_CACHE_KEY, checkpoint, timeout=None)
+
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+
+        try:
+            for model in ENDPOINT_MODELS:
+                self.retrace_model(model, options["force"], batch_size, checkpoint, executor, workers)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if options["force"]:
+            cache.delete(CHECKPOINT_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS("Finished."))
+
+    def retrace_model(self, model, force, batch_size, checkpoint, executor, workers):
+        """
+        Retrace the paths of all (or, unless `force` is True, all unpathed) cabled origins of the given model.
+        """
+        model_label = model._meta.label_lower
+        origins = model.objects.filter(cable__isnull=False)
+        if not force:
+            origins = origins.filter(_path__isnull=True)
+        completed = checkpoint.setdefault(model_label, [])
+
+        origins_count = origins.count()
+        if not origins_count:
+            self.stdout.write(f"Found no missing {model._meta.verbose_name} paths; skipping")
+        else:
             self.stdout.write(f"Retracing {origins_count} cabled {model._meta.verbose_name_plural}...")
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath(obj)
-                if not i % 100:
-                    self.draw_progress_bar(i * 100 / origins_count)
+
+            traced_count = 0
+
+            def shard_done(shard):
+                nonlocal traced_count
+                traced_count += len(shard)
+                if force:
+                    completed.append([str(shard[0]), str(shard[-1])])
+                    cache.set(CHECKPOINT_CACHE_KEY, checkpoint, timeout=None)
+                self.draw_progress_bar(min(traced_count * 100 / origins_count, 100))
+
+            shards = self.get_shards(origins, batch_size, completed)
+            if executor is None:
+                for shard in shards:
+                    trace_shard(model_label, shard)
+                    shard_done(shard)
+            else:
+                # Keep a bounded number of shards in flight so that the full list of PKs is never held in memory
+                pending = {}
+                for shard in shards:
+                    pending[executor.submit(trace_shard, model_label, shard)] = shard
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                            shard_done(pending.pop(future))
+                for future in wait(pending).done:
+                    future.result()
+                    shard_done(pending.pop(future))
+
             self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f"\n  Retraced {i} {model._meta.verbose_name_plural}"))
+            self.stdout.write(self.style.SUCCESS(f"\n  Retraced {traced_count} {model._meta.verbose_name_plural}"))
 
-        self.stdout.write(self.style.SUCCESS("Finished."))
+        if force:
+            # Remove any leftover paths originating from objects which are no longer cabled
+            origin_type = ContentType.objects.get_for_model(model)
+            CablePath.objects.filter(origin_type=origin_type).exclude(
+                origin_id__in=model.objects.filter(cable__isnull=False).values("pk")
+            ).delete()
@@ -0,0 +1,61 @@
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from nautobot.dcim.utils import decompile_path_node
+
+
+def populate_cablepath_nodes(apps, schema_editor):
+    CablePath = apps.get_model("dcim", "CablePath")
+    CablePathNode = apps.get_model("dcim", "CablePathNode")
+
+    nodes = []
+    for cable_path in CablePath.objects.only("id", "path").iterator():
+        for node in cable_path.path:
+            ct_id, object_id = decompile_path_node(node)
+            nodes.append(CablePathNode(cable_path_id=cable_path.pk, node_type_id=ct_id, node_id=object_id))
+        if len(nodes) >= 1000:
+            CablePathNode.objects.bulk_create(nodes)
+            nodes = []
+    CablePathNode.objects.bulk_create(nodes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("dcim", "0005_device_local_context_schema"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CablePathNode",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("node_id", models.UUIDField()),
+                (
+                    "cable_path",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="nodes", to="dcim.cablepath"
+                    ),
+                ),
+                (
+                    "node_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="contenttypes.contenttype"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="cablepathnode",
+            index=models.Index(fields=["node_type", "node_id"], name="dcim_cablepathnode_node_idx"),
+        ),
+        migrations.RunPython(populate_cablepath_nodes, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ __all__ = (
     "BaseInterface",
     "Cable",
     "CablePath",
+    "CablePathNode",
     "CableTermination",
     "ConsolePort",
     "ConsolePortTemplate",
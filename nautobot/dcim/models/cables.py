@@ -13,7 +13,6 @@ from nautobot.dcim.constants import *
 from nautobot.dcim.fields import JSONPathField
 from nautobot.dcim.utils import (
     decompile_path_node,
-    object_to_path_node,
     path_node_to_object,
 )
 from nautobot.extras.models import Status, StatusModel
@@ -28,6 +27,7 @@ from .device_components import FrontPort, RearPort
 __all__ = (
     "Cable",
     "CablePath",
+    "CablePathNode",
 )
 
 
@@ -342,107 +342,78 @@ class CablePath(BaseModel):
         return f"Path #{self.pk}: {self.origin} to {self.destination} via {len(self.path)} nodes{status}"
 
     def save(self, *args, **kwargs):
+        created = not self.present_in_database
+
         super().save(*args, **kwargs)
 
         # Record a direct reference to this CablePath on its originating object
         model = self.origin._meta.model
         model.objects.filter(pk=self.origin.pk).update(_path=self.pk)
 
+        self.save_nodes(created=created)
+
+    def save_nodes(self, created=False):
+        """
+        Synchronize the CablePathNode records for this CablePath with its `path`.
+
+        This must be called whenever `path` is changed without calling `save()`, such as by `QuerySet.update()`.
+        """
+        if not created:
+            self.nodes.all().delete()
+        CablePathNode.objects.bulk_create(self.build_nodes())
+
+    def build_nodes(self):
+        """
+        Return a list of new (unsaved) CablePathNode instances representing this CablePath's `path`.
+        """
+        nodes = []
+        for node in self.path:
+            ct_id, object_id = decompile_path_node(node)
+            nodes.append(CablePathNode(cable_path=self, node_type_id=ct_id, node_id=object_id))
+        return nodes
+
     @property
     def segment_count(self):
         total_length = 1 + len(self.path) + (1 if self.destination else 0)
         return int(total_length / 3)
 
     @classmethod
-    def from_origin(cls, origin):
+    def from_origin(cls, origin, tracer=None):
         """
         Create a new CablePath instance as traced from the given path origin.
+
+        An existing `CablePathTracer` may be passed in to trace against its already loaded snapshot of the cable graph.
         """
-        if origin is None or origin.cable is None:
-            return None
+        # Import added here to avoid circular imports with Cable.
+        from nautobot.dcim.tracing import CablePathTracer
+
+        if tracer is None:
+            tracer = CablePathTracer()
+        return tracer.trace(origin)
 
+    @classmethod
+    def from_origins(cls, origins):
+        """
+        Trace a CablePath from each of the given path origins, sharing a single snapshot of the cable graph.
+
+        Returns a dictionary mapping each origin to its new CablePath instance (or None if it has no cable).
+        """
         # Import added here to avoid circular imports with Cable.
-        from nautobot.circuits.models import CircuitTermination
+        from nautobot.dcim.tracing import CablePathTracer
 
-        destination = None
-        path = []
-        position_stack = []
-        is_active = True
-        is_split = False
-
-        node = origin
-        visited_nodes = set()
-        while node.cable is not None:
-            if node.id in visited_nodes:
-                raise ValidationError("a loop is detected in the path")
-            visited_nodes.add(node.id)
-            if node.cable.status != Cable.STATUS_CONNECTED:
-                is_active = False
-
-            # Follow the cable to its far-end termination
-            path.append(object_to_path_node(node.cable))
-            peer_termination = node.get_cable_peer()
-
-            # Follow a FrontPort to its corresponding RearPort
-            if isinstance(peer_termination, FrontPort):
-                path.append(object_to_path_node(peer_termination))
-                node = peer_termination.rear_port
-                if node.positions > 1:
-                    position_stack.append(peer_termination.rear_port_position)
-                path.append(object_to_path_node(node))
-
-            # Follow a RearPort to its corresponding FrontPort (if any)
-            elif isinstance(peer_termination, RearPort):
-                path.append(object_to_path_node(peer_termination))
-
-                # Determine the peer FrontPort's position
-                if peer_termination.positions == 1:
-                    position = 1
-                elif position_stack:
-                    position = position_stack.pop()
-                else:
-                    # No position indicated: path has split, so we stop at the RearPort
-                    is_split = True
-                    break
-
-                try:
-                    node = FrontPort.objects.get(rear_port=peer_termination, rear_port_position=position)
-                    path.append(object_to_path_node(node))
-                except ObjectDoesNotExist:
-                    # No corresponding FrontPort found for the RearPort
-                    break
-
-            # Follow a Circuit Termination if there is a corresponding Circuit Termination
-            # Side A and Side Z exist
-            elif isinstance(peer_termination, CircuitTermination):
-                node = peer_termination.get_peer_termination()
-                # A Circuit Termination does not require a peer.
-                if node is None:
-                    destination = peer_termination
-                    break
-                path.append(object_to_path_node(peer_termination))
-                path.append(object_to_path_node(node))
-
-            # Anything else marks the end of the path
-            else:
-                destination = peer_termination
-                break
-
-        if destination is None:
-            is_active = False
-
-        return cls(
-            origin=origin,
-            destination=destination,
-            path=path,
-            is_active=is_active,
-            is_split=is_split,
-        )
+        origins = list(origins)
+        tracer = CablePathTracer()
+        tracer.preload(origins)
+        return {origin: tracer.trace(origin) for origin in origins}
 
     def get_path(self):
         """
         Return the path as a list of prefetched objects.
         """
+        # The objects may already have been loaded in bulk by prefetch_cable_paths()
+        if hasattr(self, "_path_objects"):
+            return self._path_objects
+
         # Compile a list of IDs to prefetch for each type of model in the path
         to_prefetch = defaultdict(list)
         for node in self.path:
@@ -483,3 +454,23 @@ class CablePath(BaseModel):
         """
         rearport = path_node_to_object(self.path[-1])
         return FrontPort.objects.filter(rear_port=rearport)
+
+
+class CablePathNode(BaseModel):
+    """
+    An indexed record of a single node within a CablePath's `path`, used to efficiently find all CablePaths which
+    traverse a given object (i.e. `CablePath.objects.filter(path__contains=obj)`). These records are maintained
+    automatically by `CablePath.save()`.
+    """
+
+    cable_path = models.ForeignKey(to=CablePath, on_delete=models.CASCADE, related_name="nodes")
+    node_type = models.ForeignKey(to=ContentType, on_delete=models.CASCADE, related_name="+")
+    node_id = models.UUIDField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["node_type", "node_id"], name="dcim_cablepathnode_node_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.cable_path_id}: {self.node_type_id}:{self.node_id}"
@@ -195,9 +195,16 @@ class PowerOutletTemplate(ComponentTemplateModel):
         if self.power_port and self.power_port.device_type != self.device_type:
             raise ValidationError("Parent power port ({}) must belong to the same device type".format(self.power_port))
 
-    def instantiate(self, device):
+    def instantiate(self, device, power_ports=None):
+        """
+        :param power_ports: Dictionary mapping names to the Device's PowerPorts (optional); if given, this is used
+            instead of querying the database for the PowerPort to be assigned
+        """
         if self.power_port:
-            power_port = PowerPort.objects.get(device=device, name=self.power_port.name)
+            if power_ports is not None:
+                power_port = power_ports[self.power_port.name]
+            else:
+                power_port = PowerPort.objects.get(device=device, name=self.power_port.name)
         else:
             power_port = None
         return PowerOutlet(
@@ -292,9 +299,16 @@ class FrontPortTemplate(ComponentTemplateModel):
                 )
             )
 
-    def instantiate(self, device):
+    def instantiate(self, device, rear_ports=None):
+        """
+        :param rear_ports: Dictionary mapping names to the Device's RearPorts (optional); if given, this is used
+            instead of querying the database for the RearPort to be assigned
+        """
         if self.rear_port:
-            rear_port = RearPort.objects.get(device=device, name=self.rear_port.name)
+            if rear_ports is not None:
+                rear_port = rear_ports[self.rear_port.name]
+            else:
+                rear_port = RearPort.objects.get(device=device, name=self.rear_port.name)
         else:
             rear_port = None
         return FrontPort(
@@ -300,6 +300,64 @@ class DeviceType(PrimaryModel):
         if self.rear_image:
             self.rear_image.delete(save=False)
 
+    def instantiate_components(self, devices, batch_size=DEVICE_PROVISIONING_BATCH_SIZE):
+        """
+        Create all of the components defined by this DeviceType's templates on each of the given (saved) Devices.
+
+        Each type of template is retrieved only once, and the components of each type are created for all of the
+        Devices together using `bulk_create()`.
+        """
+        devices = list(devices)
+        if not devices:
+            return
+
+        ConsolePort.objects.bulk_create(
+            [template.instantiate(device) for template in self.consoleporttemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+        ConsoleServerPort.objects.bulk_create(
+            [template.instantiate(device) for template in self.consoleserverporttemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+        power_ports = PowerPort.objects.bulk_create(
+            [template.instantiate(device) for template in self.powerporttemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+        power_ports_by_device = {device.pk: {} for device in devices}
+        for power_port in power_ports:
+            power_ports_by_device[power_port.device_id][power_port.name] = power_port
+        PowerOutlet.objects.bulk_create(
+            [
+                template.instantiate(device, power_ports=power_ports_by_device[device.pk])
+                for template in self.poweroutlettemplates.select_related("power_port")
+                for device in devices
+            ],
+            batch_size=batch_size,
+        )
+        Interface.objects.bulk_create(
+            [template.instantiate(device) for template in self.interfacetemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+        rear_ports = RearPort.objects.bulk_create(
+            [template.instantiate(device) for template in self.rearporttemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+        rear_ports_by_device = {device.pk: {} for device in devices}
+        for rear_port in rear_ports:
+            rear_ports_by_device[rear_port.device_id][rear_port.name] = rear_port
+        FrontPort.objects.bulk_create(
+            [
+                template.instantiate(device, rear_ports=rear_ports_by_device[device.pk])
+                for template in self.frontporttemplates.select_related("rear_port")
+                for device in devices
+            ],
+            batch_size=batch_size,
+        )
+        DeviceBay.objects.bulk_create(
+            [template.instantiate(device) for template in self.devicebaytemplates.all() for device in devices],
+            batch_size=batch_size,
+        )
+
     @property
     def display(self):
         return f"{self.manufacturer.name} {self.model}"
@@ -561,6 +619,13 @@ class Device(PrimaryModel, ConfigContextModel, StatusModel):
             ("virtual_chassis", "vc_position"),
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Save a copy of the rack assignment (unless deferred), so that the elevation of a rack from which the Device is
+        # moved can be invalidated without another query
+        self._original_rack_id = self.__dict__.get("rack_id", models.DEFERRED)
+
     def __str__(self):
         return self.display or super().__str__()
 
@@ -714,16 +779,7 @@ class Device(PrimaryModel, ConfigContextModel, StatusModel):
 
         # If this is a new Device, instantiate all of the related components per the DeviceType definition
         if is_new:
-            ConsolePort.objects.bulk_create([x.instantiate(self) for x in self.device_type.consoleporttemplates.all()])
-            ConsoleServerPort.objects.bulk_create(
-                [x.instantiate(self) for x in self.device_type.consoleserverporttemplates.all()]
-            )
-            PowerPort.objects.bulk_create([x.instantiate(self) for x in self.device_type.powerporttemplates.all()])
-            PowerOutlet.objects.bulk_create([x.instantiate(self) for x in self.device_type.poweroutlettemplates.all()])
-            Interface.objects.bulk_create([x.instantiate(self) for x in self.device_type.interfacetemplates.all()])
-            RearPort.objects.bulk_create([x.instantiate(self) for x in self.device_type.rearporttemplates.all()])
-            FrontPort.objects.bulk_create([x.instantiate(self) for x in self.device_type.frontporttemplates.all()])
-            DeviceBay.objects.bulk_create([x.instantiate(self) for x in self.device_type.devicebaytemplates.all()])
+            self.device_type.instantiate_components([self])
 
         # Update Site and Rack assignment for any child Devices
         devices = Device.objects.filter(parent_bay__device=self)
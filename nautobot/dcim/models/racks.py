@@ -2,27 +2,26 @@ from collections import OrderedDict
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
-from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import Count, Sum
+from django.db.models import Count
 from django.urls import reverse
 from mptt.models import MPTTModel, TreeForeignKey
 
 from nautobot.dcim.choices import *
 from nautobot.dcim.constants import *
 from nautobot.dcim.elevations import RackElevationSVG
+from nautobot.dcim.querysets import get_power_utilization, get_space_utilization, RackQuerySet
+from nautobot.dcim.utils import RackOccupancy
 from nautobot.extras.models import ObjectChange, StatusModel
 from nautobot.extras.utils import extras_features
 from nautobot.core.models.generics import OrganizationalModel, PrimaryModel
 from nautobot.utilities.choices import ColorChoices
 from nautobot.utilities.fields import ColorField, NaturalOrderingField, JSONArrayField
 from nautobot.utilities.mptt import TreeManager
-from nautobot.utilities.utils import array_to_string, serialize_object, UtilizationData
-from .device_components import PowerOutlet, PowerPort
+from nautobot.utilities.utils import array_to_string, serialize_object
 from .devices import Device
-from .power import PowerFeed
 
 __all__ = (
     "Rack",
@@ -233,6 +232,8 @@ class Rack(PrimaryModel, StatusModel):
         blank=True,
     )
     comments = models.TextField(blank=True)
+
+    objects = RackQuerySet.as_manager()
     images = GenericRelation(to="extras.ImageAttachment")
 
     csv_headers = [
@@ -354,6 +355,7 @@ class Rack(PrimaryModel, StatusModel):
         face=DeviceFaceChoices.FACE_FRONT,
         exclude=None,
         expand_devices=True,
+        devices=None,
     ):
         """
         Return a list of rack units as dictionaries. Example: {'device': None, 'face': 0, 'id': 48, 'name': 'U48'}
@@ -366,6 +368,8 @@ class Rack(PrimaryModel, StatusModel):
         :param expand_devices: When True, all units that a device occupies will be listed with each containing a
             reference to the device. When False, only the bottom most unit for a device is included and that unit
             contains a height attribute for the device
+        :param devices: List of all Devices within the rack, as returned by `get_elevation_devices()` (optional);
+            if given, these are used instead of querying the database
         """
 
         elevation = OrderedDict()
@@ -382,13 +386,22 @@ class Rack(PrimaryModel, StatusModel):
         if self.present_in_database:
 
             # Retrieve all devices installed within the rack
-            queryset = (
-                Device.objects.prefetch_related("device_type", "device_type__manufacturer", "device_role")
-                .annotate(devicebay_count=Count("devicebays"))
-                .exclude(pk=exclude)
-                .filter(rack=self, position__gt=0, device_type__u_height__gt=0)
-                .filter(Q(face=face) | Q(device_type__is_full_depth=True))
-            )
+            if devices is None:
+                queryset = (
+                    self.get_elevation_devices()
+                    .exclude(pk=exclude)
+                    .filter(rack=self, position__gt=0, device_type__u_height__gt=0)
+                    .filter(Q(face=face) | Q(device_type__is_full_depth=True))
+                )
+            else:
+                queryset = [
+                    device
+                    for device in devices
+                    if device.pk != exclude
+                    and device.position
+                    and device.device_type.u_height
+                    and (device.face == face or device.device_type.is_full_depth)
+                ]
 
             # Determine which devices the user has permission to view
             permitted_device_ids = []
@@ -414,6 +427,15 @@ class Rack(PrimaryModel, StatusModel):
 
         return [u for u in elevation.values()]
 
+    @staticmethod
+    def get_elevation_devices():
+        """
+        Return a queryset of Devices, with the related objects and annotations needed to draw them in a rack elevation.
+        """
+        return Device.objects.prefetch_related("device_type", "device_type__manufacturer", "device_role").annotate(
+            devicebay_count=Count("devicebays")
+        )
+
     def get_available_units(self, u_height=1, rack_face=None, exclude=None):
         """
         Return a list of units within the rack available to accommodate a device of a given U height (default 1).
@@ -425,37 +447,30 @@ class Rack(PrimaryModel, StatusModel):
         :param exclude: List of devices IDs to exclude (useful when moving a device within a rack)
         """
         # Gather all devices which consume U space within the rack
-        devices = self.devices.prefetch_related("device_type").filter(position__gte=1)
+        devices = self.devices.filter(position__gte=1)
         if exclude is not None:
             devices = devices.exclude(pk__in=exclude)
+        if rack_face is not None:
+            devices = devices.filter(Q(face=rack_face) | Q(device_type__is_full_depth=True))
 
-        # Initialize the rack unit skeleton
-        units = list(range(1, self.u_height + 1))
+        # Mark the units consumed by installed devices
+        occupancy = RackOccupancy(self.u_height)
+        for position, device_u_height in devices.values_list("position", "device_type__u_height"):
+            occupancy.occupy(position, device_u_height)
 
-        # Remove units consumed by installed devices
-        for d in devices:
-            if rack_face is None or d.face == rack_face or d.device_type.is_full_depth:
-                for u in range(d.position, d.position + d.device_type.u_height):
-                    try:
-                        units.remove(u)
-                    except ValueError:
-                        # Found overlapping devices in the rack!
-                        pass
+        return occupancy.get_available_units(u_height)
 
-        # Remove units without enough space above them to accommodate a device of the specified height
-        available_units = []
-        for u in units:
-            if set(range(u, u + u_height)).issubset(units):
-                available_units.append(u)
-
-        return list(reversed(available_units))
-
-    def get_reserved_units(self):
+    def get_reserved_units(self, reservations=None):
         """
         Return a dictionary mapping all reserved units within the rack to their reservation.
+
+        :param reservations: List of all RackReservations of the rack (optional); if given, these are used instead of
+            querying the database
         """
+        if reservations is None:
+            reservations = self.reservations.all()
         reserved_units = {}
-        for r in self.reservations.all():
+        for r in reservations:
             for u in r.units:
                 reserved_units[u] = r
         return reserved_units
@@ -496,16 +511,12 @@ class Rack(PrimaryModel, StatusModel):
         Returns:
             UtilizationData: (numerator=Occupied Unit Count, denominator=U Height of the rack)
         """
-        # Determine unoccupied units
-        available_units = self.get_available_units()
-
-        # Remove reserved units
-        for u in self.get_reserved_units():
-            if u in available_units:
-                available_units.remove(u)
+        # Use the utilization computed by RackQuerySet.annotate_utilization(), if any
+        if hasattr(self, "_utilization"):
+            return self._utilization
 
         # Return the numerator and denominator as percentage is to be calculated later where needed
-        return UtilizationData(numerator=self.u_height - len(available_units), denominator=self.u_height)
+        return get_space_utilization([self])[self.pk]
 
     def get_power_utilization(self):
         """Determine the utilization numerator and denominator for power utilization on the rack.
@@ -513,25 +524,11 @@ class Rack(PrimaryModel, StatusModel):
         Returns:
             UtilizationData: (numerator, denominator)
         """
-        powerfeeds = PowerFeed.objects.filter(rack=self)
-        available_power_total = sum(pf.available_power for pf in powerfeeds)
-        if not available_power_total:
-            return UtilizationData(numerator=0, denominator=0)
-
-        pf_powerports = PowerPort.objects.filter(
-            _cable_peer_type=ContentType.objects.get_for_model(PowerFeed),
-            _cable_peer_id__in=powerfeeds.values_list("id", flat=True),
-        )
-        poweroutlets = PowerOutlet.objects.filter(power_port_id__in=pf_powerports)
-        allocated_draw_total = (
-            PowerPort.objects.filter(
-                _cable_peer_type=ContentType.objects.get_for_model(PowerOutlet),
-                _cable_peer_id__in=poweroutlets.values_list("id", flat=True),
-            ).aggregate(Sum("allocated_draw"))["allocated_draw__sum"]
-            or 0
-        )
+        # Use the utilization computed by RackQuerySet.annotate_utilization(), if any
+        if hasattr(self, "_power_utilization"):
+            return self._power_utilization
 
-        return UtilizationData(numerator=allocated_draw_total, denominator=available_power_total)
+        return get_power_utilization([self])[self.pk]
 
 
 @extras_features(
@@ -0,0 +1,144 @@
+"""
+Bulk device provisioning.
+
+`provision_devices()` creates any number of new Devices together with all of the components defined by their
+DeviceTypes. Each DeviceType's component templates are loaded once, and the Devices, their components and their change
+records are each inserted with a handful of large `bulk_create()` calls, rather than by saving each Device in turn.
+"""
+from collections import defaultdict
+
+from cacheops import invalidate_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from nautobot.dcim.choices import DeviceFaceChoices
+from nautobot.dcim.constants import DEVICE_PROVISIONING_BATCH_SIZE
+from nautobot.dcim.elevations import invalidate_rack_elevations
+from nautobot.dcim.models import (
+    ConsolePort,
+    ConsoleServerPort,
+    Device,
+    DeviceBay,
+    FrontPort,
+    Interface,
+    PowerOutlet,
+    PowerPort,
+    RearPort,
+)
+from nautobot.dcim.utils import RackOccupancy
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.models import TaggedItem
+from nautobot.extras.signals import bulk_log_changes
+
+COMPONENT_MODELS = (
+    ConsolePort,
+    ConsoleServerPort,
+    DeviceBay,
+    FrontPort,
+    Interface,
+    PowerOutlet,
+    PowerPort,
+    RearPort,
+)
+
+
+def check_device_conflicts(devices):
+    """
+    Raise ValidationError if any of the given new Devices conflict with one another; that is, if two Devices share a
+    name within the same site and tenant, or occupy the same rack unit(s). (Conflicts with existing Devices are
+    detected by `Device.clean()`.)
+    """
+    errors = []
+    names = set()
+    # (Rack pk, face) => RackOccupancy of the Devices seen so far
+    occupancies = {}
+
+    for device in devices:
+        if device.name:
+            key = (device.site_id, device.tenant_id, device.name)
+            if key in names:
+                errors.append(f"Device name {device.name} is used more than once within the same site and tenant.")
+            names.add(key)
+
+        u_height = device.device_type.u_height
+        if device.rack_id is None or not device.position or not u_height:
+            continue
+        if device.device_type.is_full_depth:
+            faces = (DeviceFaceChoices.FACE_FRONT, DeviceFaceChoices.FACE_REAR)
+        else:
+            faces = (device.face,)
+        for face in faces:
+            occupancy = occupancies.setdefault((device.rack_id, face), RackOccupancy(device.rack.u_height))
+            if device.position not in occupancy.get_available_units(u_height=u_height):
+                errors.append(f"Device {device} overlaps another new device in U{device.position} of {device.rack}.")
+                break
+        else:
+            for face in faces:
+                occupancies[(device.rack_id, face)].occupy(device.position, u_height)
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def provision_devices(devices, request=None, validate=True, batch_size=DEVICE_PROVISIONING_BATCH_SIZE):
+    """
+    Create the given new (unsaved) Devices, along with all of the components defined by their DeviceTypes, in bulk.
+
+    Devices are validated with `full_clean()` (unless `validate` is False, such as when they have already been validated
+    by a serializer) and checked for conflicts with one another before anything is created. All of the Devices and
+    their components are then created within a single transaction, using a fixed number of queries per DeviceType.
+    Any Tags to be assigned to a Device may be given as a list in its `_tags` attribute.
+
+    Creating Devices in bulk does not send the `post_save` signal for each Device. If `request` is given (for example
+    the request of a REST API view, or `self.request` within a Job), a change record is written for each Device and any
+    applicable webhooks are enqueued, as if each Device had been saved individually.
+
+    Returns the list of created Devices. Raises ValidationError if any Device is invalid, in which case nothing is
+    created.
+    """
+    devices = list(devices)
+    if not devices:
+        return devices
+
+    if validate:
+        errors = []
+        for device in devices:
+            try:
+                device.full_clean()
+            except ValidationError as e:
+                errors.extend(f"{device}: {message}" for message in e.messages)
+        if errors:
+            raise ValidationError(errors)
+    check_device_conflicts(devices)
+
+    devices_by_type = defaultdict(list)
+    for device in devices:
+        devices_by_type[device.device_type].append(device)
+
+    with transaction.atomic():
+        Device.objects.bulk_create(devices, batch_size=batch_size)
+        for device_type, type_devices in devices_by_type.items():
+            device_type.instantiate_components(type_devices, batch_size=batch_size)
+
+        device_content_type = ContentType.objects.get_for_model(Device)
+        TaggedItem.objects.bulk_create(
+            [
+                TaggedItem(content_type=device_content_type, object_id=device.pk, tag=tag)
+                for device in devices
+                for tag in getattr(device, "_tags", None) or []
+            ],
+            batch_size=batch_size,
+        )
+
+        if request is not None:
+            bulk_log_changes(request, devices, ObjectChangeActionChoices.ACTION_CREATE, batch_size=batch_size)
+
+    # bulk_create() bypasses cacheops' automatic invalidation, as well as the signals which invalidate rack elevations
+    invalidate_model(Device)
+    invalidate_model(TaggedItem)
+    for model in COMPONENT_MODELS:
+        invalidate_model(model)
+    invalidate_rack_elevations({device.rack_id for device in devices})
+
+    return devices
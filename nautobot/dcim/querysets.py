@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.query import ModelIterable
+
+from nautobot.dcim.utils import RackOccupancy
+from nautobot.utilities.querysets import RestrictedQuerySet
+from nautobot.utilities.utils import UtilizationData
+
+
+def get_space_utilization(racks):
+    """
+    Compute the space utilization of each of the given Racks using two queries.
+
+    Returns a dict mapping each Rack's PK to its UtilizationData.
+    """
+    from nautobot.dcim.models import Device, RackReservation
+
+    racks = {rack.pk: rack for rack in racks}
+    if not racks:
+        return {}
+
+    occupancies = {pk: RackOccupancy(rack.u_height) for pk, rack in racks.items()}
+    for rack_id, position, u_height in Device.objects.filter(rack__in=list(racks), position__gte=1).values_list(
+        "rack_id", "position", "device_type__u_height"
+    ):
+        occupancies[rack_id].occupy(position, u_height)
+    for rack_id, units in RackReservation.objects.filter(rack__in=list(racks)).values_list("rack_id", "units"):
+        occupancies[rack_id].occupy_units(units)
+
+    return {
+        pk: UtilizationData(numerator=occupancies[pk].occupied_count, denominator=rack.u_height)
+        for pk, rack in racks.items()
+    }
+
+
+def annotate_space_utilization(racks):
+    """
+    Compute the space utilization of each of the given Racks, and store it on each Rack to be returned by
+    `Rack.get_utilization()`.
+    """
+    utilization = get_space_utilization(racks)
+    for rack in racks:
+        rack._utilization = utilization[rack.pk]
+
+
+def get_power_utilization(racks):
+    """
+    Compute the power utilization of each of the given Racks using (at most) four queries.
+
+    Returns a dict mapping each Rack's PK to its UtilizationData.
+
+    A Rack's allocated power draw is the total allocated draw of all PowerPorts connected to PowerOutlets which are in
+    turn fed by the Rack's PowerFeeds.
+    """
+    from nautobot.dcim.models import PowerFeed, PowerOutlet, PowerPort
+
+    racks = {rack.pk: rack for rack in racks}
+    if not racks:
+        return {}
+
+    available_power = defaultdict(int)
+    allocated_draw = defaultdict(int)
+
+    # Map each PowerFeed, and in turn each PowerPort and PowerOutlet it feeds, to its Rack
+    feed_racks = {}
+    for pk, rack_id, available in PowerFeed.objects.filter(rack__in=list(racks)).values_list(
+        "pk", "rack_id", "available_power"
+    ):
+        feed_racks[pk] = rack_id
+        available_power[rack_id] += available
+
+    port_racks = {}
+    if feed_racks:
+        for pk, feed_id in PowerPort.objects.filter(
+            _cable_peer_type=ContentType.objects.get_for_model(PowerFeed),
+            _cable_peer_id__in=list(feed_racks),
+        ).values_list("pk", "_cable_peer_id"):
+            port_racks[pk] = feed_racks[feed_id]
+
+    outlet_racks = {}
+    if port_racks:
+        for pk, power_port_id in PowerOutlet.objects.filter(power_port__in=list(port_racks)).values_list(
+            "pk", "power_port_id"
+        ):
+            outlet_racks[pk] = port_racks[power_port_id]
+
+    if outlet_racks:
+        for outlet_id, draw in PowerPort.objects.filter(
+            _cable_peer_type=ContentType.objects.get_for_model(PowerOutlet),
+            _cable_peer_id__in=list(outlet_racks),
+            allocated_draw__isnull=False,
+        ).values_list("_cable_peer_id", "allocated_draw"):
+            allocated_draw[outlet_racks[outlet_id]] += draw
+
+    utilization = {}
+    for pk in racks:
+        if available_power[pk]:
+            utilization[pk] = UtilizationData(numerator=allocated_draw[pk], denominator=available_power[pk])
+        else:
+            utilization[pk] = UtilizationData(numerator=0, denominator=0)
+    return utilization
+
+
+def annotate_power_utilization(racks):
+    """
+    Compute the power utilization of each of the given Racks, and store it on each Rack to be returned by
+    `Rack.get_power_utilization()`.
+    """
+    utilization = get_power_utilization(racks)
+    for rack in racks:
+        rack._power_utilization = utilization[rack.pk]
+
+
+class RackQuerySet(RestrictedQuerySet):
+    """
+    QuerySet used by the Rack model.
+
+    Includes a method which computes the space and power utilization of all Racks retrieved by the QuerySet in bulk,
+    using a fixed number of queries, rather than querying for each Rack individually.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._annotate_utilization = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._annotate_utilization = self._annotate_utilization
+        return clone
+
+    def annotate_utilization(self):
+        """
+        Compute the utilization of each Rack once the QuerySet is evaluated, so that calls to `get_utilization()` and
+        `get_power_utilization()` on the resulting Racks do not query the database.
+
+        As with `prefetch_related()`, this applies to whichever Racks are ultimately retrieved (for example, only a
+        single page of Racks when the QuerySet is paginated).
+        """
+        clone = self._chain()
+        clone._annotate_utilization = True
+        return clone
+
+    def _fetch_all(self):
+        annotate = self._annotate_utilization and self._result_cache is None
+        super()._fetch_all()
+        if annotate and issubclass(self._iterable_class, ModelIterable):
+            annotate_space_utilization(self._result_cache)
+            annotate_power_utilization(self._result_cache)
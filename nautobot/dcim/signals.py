@@ -1,30 +1,42 @@
 import logging
 
-from cacheops import invalidate_obj
+from cacheops import invalidate_model, invalidate_obj
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_save, post_delete, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.db import transaction
+from django.db.models import DEFERRED, BooleanField, Case, Exists, OuterRef, Value, When
 from django.dispatch import receiver
 
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.signals import bulk_log_changes, get_change_logging_request
 from .models import (
     Cable,
     CablePath,
+    CablePathNode,
     Device,
+    DeviceBay,
+    DeviceRole,
+    DeviceType,
+    Manufacturer,
     PathEndpoint,
     PowerPanel,
     Rack,
     RackGroup,
+    RackReservation,
     VirtualChassis,
 )
+from .elevations import invalidate_rack_elevations
+from .tracing import CablePathTracer
 
 
-def create_cablepath(node, rebuild=True):
+def create_cablepath(node, rebuild=True, tracer=None):
     """
     Create CablePaths for all paths originating from the specified node.
 
     rebuild (bool) - Used to refresh paths where this node is not an endpoint.
+    tracer (CablePathTracer) - Optional tracer whose snapshot of the cable graph should be used to trace the path.
     """
-    cp = CablePath.from_origin(node)
+    cp = CablePath.from_origin(node, tracer=tracer)
     if cp:
         try:
             cp.save()
@@ -39,14 +51,41 @@ def rebuild_paths(obj):
     """
     Rebuild all CablePaths which traverse the specified node
     """
-    cable_paths = CablePath.objects.filter(path__contains=obj)
+    cable_paths = list(CablePath.objects.filter(path__contains=obj).prefetch_related("origin"))
+
+    # Trace all of the affected paths against a single snapshot of the cable graph
+    tracer = CablePathTracer()
+    tracer.preload(cp.origin for cp in cable_paths)
 
     with transaction.atomic():
         for cp in cable_paths:
             invalidate_obj(cp.origin)
             cp.delete()
             # Prevent looping back to rebuild_paths during the atomic transaction.
-            create_cablepath(cp.origin, rebuild=False)
+            create_cablepath(cp.origin, rebuild=False, tracer=tracer)
+
+
+def update_paths_is_active(cable):
+    """
+    Recompute `is_active` for all CablePaths which traverse the specified Cable, without retracing them.
+
+    A change in a Cable's status does not alter the topology of the paths it belongs to, so each path remains active
+    only if it has a destination and every Cable within it is connected.
+    """
+    cable_type = ContentType.objects.get_for_model(Cable)
+    disconnected_cables = CablePathNode.objects.filter(
+        cable_path=OuterRef("pk"),
+        node_type=cable_type,
+        node_id__in=Cable.objects.exclude(status=Cable.STATUS_CONNECTED).values("pk"),
+    )
+    CablePath.objects.filter(path__contains=cable).update(
+        is_active=Case(
+            When(destination_id__isnull=True, then=Value(False)),
+            When(Exists(disconnected_cables), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        )
+    )
 
 
 #
@@ -54,22 +93,55 @@ def rebuild_paths(obj):
 #
 
 
+def cascade_site_change(site, querysets):
+    """
+    Assign the given Site to every object matched by each of the given QuerySets, which should exclude any objects
+    already assigned to the Site.
+
+    Each QuerySet is updated with a single UPDATE rather than by saving each object. If changes are being logged, the
+    matching ObjectChanges are written in bulk. Cached queries are invalidated once per model.
+    """
+    request = get_change_logging_request()
+    changed_objects = []
+
+    with transaction.atomic():
+        for queryset in querysets:
+            if request is not None:
+                # Retrieve the objects to record their updated representation
+                if hasattr(queryset.model, "tags"):
+                    instances = list(queryset.prefetch_related("tags"))
+                else:
+                    instances = list(queryset)
+                for instance in instances:
+                    instance.site = site
+                changed_objects.extend(instances)
+            queryset.update(site=site)
+
+        if changed_objects:
+            bulk_log_changes(request, changed_objects, ObjectChangeActionChoices.ACTION_UPDATE)
+
+    # update() bypasses cacheops' automatic invalidation
+    for queryset in querysets:
+        invalidate_model(queryset.model)
+
+
 @receiver(post_save, sender=RackGroup)
 def handle_rackgroup_site_change(instance, created, **kwargs):
     """
-    Update child RackGroups and Racks if Site assignment has changed. We intentionally recurse through each child
-    object instead of calling update() on the QuerySet to ensure the proper change records get created for each.
+    Update all descendant RackGroups, and the Racks, PowerPanels and Devices within them, if Site assignment has
+    changed.
     """
     if not created:
-        for rackgroup in instance.get_children():
-            rackgroup.site = instance.site
-            rackgroup.save()
-        for rack in Rack.objects.filter(group=instance).exclude(site=instance.site):
-            rack.site = instance.site
-            rack.save()
-        for powerpanel in PowerPanel.objects.filter(rack_group=instance).exclude(site=instance.site):
-            powerpanel.site = instance.site
-            powerpanel.save()
+        group_ids = instance.get_descendants(include_self=True).values("pk")
+        cascade_site_change(
+            instance.site,
+            [
+                instance.get_descendants().exclude(site=instance.site),
+                Rack.objects.filter(group__in=group_ids).exclude(site=instance.site),
+                PowerPanel.objects.filter(rack_group__in=group_ids).exclude(site=instance.site),
+                Device.objects.filter(rack__group__in=group_ids).exclude(site=instance.site),
+            ],
+        )
 
 
 @receiver(post_save, sender=Rack)
@@ -78,9 +150,75 @@ def handle_rack_site_change(instance, created, **kwargs):
     Update child Devices if Site assignment has changed.
     """
     if not created:
-        for device in Device.objects.filter(rack=instance).exclude(site=instance.site):
-            device.site = instance.site
-            device.save()
+        cascade_site_change(instance.site, [Device.objects.filter(rack=instance).exclude(site=instance.site)])
+
+
+#
+# Rack elevations
+#
+
+
+@receiver(pre_save, sender=Device)
+def record_device_rack(instance, raw=False, **kwargs):
+    """
+    Remember the rack to which an existing Device was assigned, so that its elevation can be invalidated if the
+    Device is moved. The rack is known from when the Device was loaded, unless that field was deferred.
+    """
+    instance._prior_rack_id = None
+    if not raw and instance.present_in_database:
+        if instance._original_rack_id is not DEFERRED:
+            instance._prior_rack_id = instance._original_rack_id
+        else:
+            instance._prior_rack_id = Device.objects.filter(pk=instance.pk).values_list("rack_id", flat=True).first()
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def invalidate_device_rack_elevations(instance, **kwargs):
+    """
+    Invalidate the cached elevations of the rack(s) in which a Device is (or was) installed.
+    """
+    invalidate_rack_elevations([instance.rack_id, getattr(instance, "_prior_rack_id", None)])
+    # The Device may be saved again
+    instance._original_rack_id = instance.rack_id
+
+
+@receiver(post_save, sender=Rack)
+@receiver(post_delete, sender=Rack)
+def invalidate_rack_elevation(instance, **kwargs):
+    invalidate_rack_elevations([instance.pk])
+
+
+@receiver(post_save, sender=RackReservation)
+@receiver(post_delete, sender=RackReservation)
+def invalidate_rackreservation_rack_elevation(instance, **kwargs):
+    invalidate_rack_elevations([instance.rack_id])
+
+
+@receiver(post_save, sender=DeviceBay)
+@receiver(post_delete, sender=DeviceBay)
+def invalidate_devicebay_rack_elevation(instance, **kwargs):
+    invalidate_rack_elevations(Device.objects.filter(pk=instance.device_id).values_list("rack_id", flat=True))
+
+
+@receiver(post_save, sender=DeviceType)
+@receiver(post_save, sender=DeviceRole)
+@receiver(post_save, sender=Manufacturer)
+def invalidate_device_attribute_rack_elevations(sender, instance, created, **kwargs):
+    """
+    Invalidate the cached elevations of all racks containing Devices of a changed DeviceType, DeviceRole, or
+    Manufacturer.
+    """
+    if created:
+        return
+    devices = Device.objects.filter(rack__isnull=False)
+    if sender is DeviceType:
+        devices = devices.filter(device_type=instance)
+    elif sender is DeviceRole:
+        devices = devices.filter(device_role=instance)
+    else:
+        devices = devices.filter(device_type__manufacturer=instance)
+    invalidate_rack_elevations(devices.values_list("rack_id", flat=True).distinct())
 
 
 #
@@ -151,10 +289,7 @@ def update_connected_endpoints(instance, created, raw=False, **kwargs):
         # We currently don't support modifying either termination of an existing Cable. (This
         # may change in the future.) However, we do need to capture status changes and update
         # any CablePaths accordingly.
-        if instance.status != Cable.STATUS_CONNECTED:
-            CablePath.objects.filter(path__contains=instance).update(is_active=False)
-        else:
-            rebuild_paths(instance)
+        update_paths_is_active(instance)
 
 
 @receiver(post_delete, sender=Cable)
@@ -177,8 +312,11 @@ def nullify_connected_endpoints(instance, **kwargs):
         instance.termination_b.save()
 
     # Delete and retrace any dependent cable paths
-    for cablepath in CablePath.objects.filter(path__contains=instance):
-        cp = CablePath.from_origin(cablepath.origin)
+    cable_paths = list(CablePath.objects.filter(path__contains=instance).prefetch_related("origin"))
+    tracer = CablePathTracer()
+    tracer.preload(cablepath.origin for cablepath in cable_paths)
+    for cablepath in cable_paths:
+        cp = CablePath.from_origin(cablepath.origin, tracer=tracer)
         if cp:
             CablePath.objects.filter(pk=cablepath.pk).update(
                 path=cp.path,
@@ -187,5 +325,7 @@ def nullify_connected_endpoints(instance, **kwargs):
                 is_active=cp.is_active,
                 is_split=cp.is_split,
             )
+            cablepath.path = cp.path
+            cablepath.save_nodes()
         else:
             cablepath.delete()
@@ -1,4 +1,7 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
@@ -38,7 +41,8 @@ from nautobot.dcim.models import (
     Site,
     VirtualChassis,
 )
-from nautobot.extras.models import ConfigContextSchema, Status
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.models import ConfigContextSchema, ObjectChange, Status
 from nautobot.ipam.models import VLAN
 from nautobot.utilities.testing import APITestCase, APIViewTestCases
 from nautobot.virtualization.models import Cluster, ClusterType
@@ -468,6 +472,64 @@ class RackTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_200_OK)
         self.assertEqual(response.get("Content-Type"), "image/svg+xml")
 
+    def test_get_rack_elevation_svg_invalidated_on_device_change(self):
+        """
+        Check that a cached rack elevation is re-rendered once a device is installed in the rack.
+        """
+        rack = Rack.objects.first()
+        self.add_permissions("dcim.view_rack", "dcim.view_device")
+        url = "{}?render=svg".format(reverse("dcim-api:rack-elevation", kwargs={"pk": rack.pk}))
+
+        response = self.client.get(url, **self.header)
+        self.assertNotIn("Elevation Device", response.content.decode())
+
+        manufacturer = Manufacturer.objects.create(name="Manufacturer 1", slug="manufacturer-1")
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model="Device Type 1", slug="device-type-1")
+        device_role = DeviceRole.objects.create(name="Device Role 1", slug="device-role-1", color="ff0000")
+        device = Device.objects.create(
+            device_type=device_type,
+            device_role=device_role,
+            name="Elevation Device",
+            site=rack.site,
+            rack=rack,
+            position=1,
+            face=DeviceFaceChoices.FACE_FRONT,
+            status=Status.objects.get_for_model(Device).get(slug="active"),
+        )
+
+        response = self.client.get(url, **self.header)
+        self.assertIn("Elevation Device", response.content.decode())
+
+        device.name = "Renamed Device"
+        device.save()
+        response = self.client.get(url, **self.header)
+        self.assertIn("Renamed Device", response.content.decode())
+
+        # Removing a freshly loaded device from the rack removes it from the rack's elevation
+        device = Device.objects.get(pk=device.pk)
+        device.rack = None
+        device.position = None
+        device.save()
+        response = self.client.get(url, **self.header)
+        self.assertNotIn("Renamed Device", response.content.decode())
+
+    def test_get_rack_elevations_svg(self):
+        """
+        GET the SVG elevations of a filtered list of racks.
+        """
+        self.add_permissions("dcim.view_rack")
+        url = reverse("dcim-api:rack-elevations")
+
+        response = self.client.get(f"{url}?name=Rack 1&name=Rack 2&face=rear", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            {result["id"] for result in response.data["results"]},
+            {str(pk) for pk in Rack.objects.filter(name__in=["Rack 1", "Rack 2"]).values_list("pk", flat=True)},
+        )
+        for result in response.data["results"]:
+            self.assertTrue(result["svg"].startswith("<svg"))
+
 
 class RackReservationTest(APIViewTestCases.APIViewTestCase):
     model = RackReservation
@@ -1183,6 +1245,57 @@ class DeviceTest(APIViewTestCases.APIViewTestCase):
         )
         self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_provision(self):
+        """
+        Create devices, along with their components, using the bulk provisioning endpoint.
+        """
+        device_type = DeviceType.objects.get(slug="device-type-2")
+        InterfaceTemplate.objects.create(device_type=device_type, name="eth0")
+        InterfaceTemplate.objects.create(device_type=device_type, name="eth1")
+        power_port_template = PowerPortTemplate.objects.create(device_type=device_type, name="PSU")
+        PowerOutletTemplate.objects.create(device_type=device_type, name="Outlet 1", power_port=power_port_template)
+        rear_port_template = RearPortTemplate.objects.create(device_type=device_type, name="Rear 1", positions=1)
+        FrontPortTemplate.objects.create(device_type=device_type, name="Front 1", rear_port=rear_port_template)
+
+        self.add_permissions("dcim.add_device")
+        url = reverse("dcim-api:device-bulk-provision")
+        response = self.client.post(url, self.create_data, format="json", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        devices = Device.objects.filter(name__in=[data["name"] for data in self.create_data])
+        self.assertEqual(devices.count(), 3)
+        for device in devices:
+            self.assertEqual(device.device_type, device_type)
+            self.assertEqual(
+                sorted(device.interfaces.values_list("name", flat=True)),
+                ["eth0", "eth1"],
+            )
+            self.assertEqual(device.poweroutlets.get().power_port, device.powerports.get())
+            self.assertEqual(device.frontports.get().rear_port, device.rearports.get())
+        self.assertEqual(
+            ObjectChange.objects.filter(
+                changed_object_type__model="device",
+                changed_object_id__in=devices.values("pk"),
+                action=ObjectChangeActionChoices.ACTION_CREATE,
+            ).count(),
+            3,
+        )
+
+    def test_bulk_provision_conflicting_devices(self):
+        """
+        Check that no devices are created if any of the devices to be provisioned conflict with one another.
+        """
+        create_data = [dict(self.create_data[0]), dict(self.create_data[1])]
+        create_data[1]["name"] = create_data[0]["name"]
+
+        self.add_permissions("dcim.add_device")
+        url = reverse("dcim-api:device-bulk-provision")
+        response = self.client.post(url, create_data, format="json", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Device.objects.filter(name=create_data[0]["name"]).exists())
+
 
 class ConsolePortTest(Mixins.ComponentTraceMixin, APIViewTestCases.APIViewTestCase):
     model = ConsolePort
@@ -1766,6 +1879,96 @@ class ConnectedDeviceTest(APITestCase):
         self.assertEqual(response.data["name"], self.device1.name)
 
 
+class TopologyTest(APITestCase):
+    """
+    [Device 1: eth0] --C1-- [Panel: FP1] [Panel: RP1] --C2-- [Device 2: eth0]
+    """
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.site = Site.objects.create(name="Test Site 1", slug="test-site-1")
+        manufacturer = Manufacturer.objects.create(name="Test Manufacturer 1", slug="test-manufacturer-1")
+        devicetype = DeviceType.objects.create(
+            manufacturer=manufacturer, model="Test Device Type 1", slug="test-device-type-1"
+        )
+        devicerole = DeviceRole.objects.create(name="Test Device Role 1", slug="test-device-role-1", color="ff0000")
+        self.device1 = Device.objects.create(
+            device_type=devicetype, device_role=devicerole, name="TestDevice1", site=self.site
+        )
+        self.device2 = Device.objects.create(
+            device_type=devicetype, device_role=devicerole, name="TestDevice2", site=self.site
+        )
+        self.panel = Device.objects.create(device_type=devicetype, device_role=devicerole, name="Panel", site=self.site)
+        self.interface1 = Interface.objects.create(device=self.device1, name="eth0")
+        self.interface2 = Interface.objects.create(device=self.device2, name="eth0")
+        rearport = RearPort.objects.create(device=self.panel, name="RP1", positions=1)
+        frontport = FrontPort.objects.create(device=self.panel, name="FP1", rear_port=rearport, rear_port_position=1)
+        Cable(termination_a=self.interface1, termination_b=frontport).save()
+        Cable(termination_a=rearport, termination_b=self.interface2).save()
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_export_json(self):
+        url = reverse("dcim-api:topology-list")
+        response = self.client.get(url + "?site=test-site-1", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        graph = json.loads(b"".join(response.streaming_content))
+        self.assertIn(f"dcim.device:{self.device1.pk}", {node["id"] for node in graph["nodes"]})
+        self.assertEqual(
+            sorted(edge["type"] for edge in graph["edges"] if edge["type"] != "component"),
+            ["cable", "cable", "pass-through"],
+        )
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_export_graphml(self):
+        url = reverse("dcim-api:topology-list")
+        response = self.client.get(url + "?site=test-site-1&graph_format=graphml", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/graphml+xml")
+        self.assertIn(f'<node id="dcim.interface:{self.interface2.pk}">', b"".join(response.streaming_content).decode())
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_shortest_path(self):
+        url = reverse("dcim-api:topology-shortest-path")
+        response = self.client.get(
+            url + f"?source=dcim.device:{self.device1.pk}&target=dcim.device:{self.device2.pk}", **self.header
+        )
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(
+            [node["type"] for node in response.data["nodes"]],
+            ["dcim.device", "dcim.interface", "dcim.frontport", "dcim.rearport", "dcim.interface", "dcim.device"],
+        )
+        self.assertEqual(len(response.data["edges"]), 5)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_reachable(self):
+        url = reverse("dcim-api:topology-reachable")
+        response = self.client.get(
+            url + f"?source=dcim.interface:{self.interface1.pk}&node_type=dcim.device", **self.header
+        )
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual({node["name"] for node in response.data["nodes"]}, {"TestDevice1", "Panel", "TestDevice2"})
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_unknown_source(self):
+        url = reverse("dcim-api:topology-reachable")
+        response = self.client.get(url + f"?source=dcim.device:{self.device1.pk}&name=Panel", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_invalid_filter(self):
+        url = reverse("dcim-api:topology-list")
+        response = self.client.get(url + "?site=nonexistent", **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+
 class VirtualChassisTest(APIViewTestCases.APIViewTestCase):
     model = VirtualChassis
     brief_fields = ["display", "id", "master", "member_count", "name", "url"]
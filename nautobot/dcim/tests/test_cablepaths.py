@@ -1,13 +1,40 @@
+from concurrent.futures import Future
+from io import StringIO
+from unittest.mock import patch
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from nautobot.circuits.models import *
+from nautobot.dcim.management.commands.trace_paths import CHECKPOINT_CACHE_KEY
 from nautobot.dcim.models import *
-from nautobot.dcim.utils import object_to_path_node
+from nautobot.dcim.utils import object_to_path_node, prefetch_cable_paths
 from nautobot.extras.models import Status
 
 
+class InlineExecutor:
+    """
+    Stands in for a ProcessPoolExecutor, running each submitted task immediately within this process (and therefore
+    within the test's transaction).
+    """
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
 class CablePathTestCase(TestCase):
     """
     Test Nautobot's ability to trace and retrace CablePaths in response to data model changes. Tests are numbered
@@ -16,6 +43,7 @@ class CablePathTestCase(TestCase):
         1XX: Test direct connections between different endpoint types
         2XX: Test different cable topologies
         3XX: Test responses to changes in existing objects
+        4XX: Test tracing of multiple paths at once
     """
 
     @classmethod
@@ -83,9 +111,17 @@ class CablePathTestCase(TestCase):
 
         cablepath = CablePath.objects.filter(**kwargs).first()
         self.assertIsNotNone(cablepath, msg=msg)
+        self.assertPathNodesMatch(cablepath)
 
         return cablepath
 
+    def assertPathNodesMatch(self, cablepath):
+        """
+        Assert that the CablePathNode records of a CablePath match its `path`.
+        """
+        nodes = sorted(f"{node.node_type_id}:{node.node_id}" for node in cablepath.nodes.all())
+        self.assertEqual(nodes, sorted(cablepath.path))
+
     def assertPathIsSet(self, origin, cablepath, msg=None):
         """
         Assert that a specific CablePath instance is set as the path on the origin.
@@ -1458,3 +1494,222 @@ class CablePathTestCase(TestCase):
                 rearport1: 2,
             }
         )
+
+    def test_303_update_path_nodes_on_retrace(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [RP2] [FP2] --C3-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=1)
+        rearport2 = RearPort.objects.create(device=self.device, name="Rear Port 2", positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1", rear_port=rearport1, rear_port_position=1
+        )
+        frontport2 = FrontPort.objects.create(
+            device=self.device, name="Front Port 2", rear_port=rearport2, rear_port_position=1
+        )
+
+        cable1 = Cable(termination_a=interface1, termination_b=frontport1, status=self.status)
+        cable1.save()
+        cable2 = Cable(termination_a=rearport1, termination_b=rearport2, status=self.status)
+        cable2.save()
+        cable3 = Cable(termination_a=frontport2, termination_b=interface2, status=self.status)
+        cable3.save()
+        path1 = self.assertPathExists(
+            origin=interface1,
+            destination=interface2,
+            path=(cable1, frontport1, rearport1, cable2, rearport2, frontport2, cable3),
+            is_active=True,
+        )
+        self.assertEqual(path1.nodes.count(), 7)
+        self.assertIn(path1, CablePath.objects.filter(path__contains=cable2))
+
+        # Deleting C2 truncates the path; the CablePathNodes must follow suit
+        cable2.delete()
+        path1 = self.assertPathExists(
+            origin=interface1,
+            destination=None,
+            path=(cable1, frontport1, rearport1),
+            is_active=False,
+        )
+        self.assertEqual(path1.nodes.count(), 3)
+        self.assertFalse(CablePath.objects.filter(path__contains=rearport2).exists())
+        self.assertFalse(CablePathNode.objects.filter(node_id=cable2.pk).exists())
+
+    def test_304_update_path_status_without_retrace(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1", rear_port=rearport1, rear_port_position=1
+        )
+        cable1 = Cable(termination_a=interface1, termination_b=frontport1, status=self.status_planned)
+        cable1.save()
+        cable2 = Cable(termination_a=rearport1, termination_b=interface2, status=self.status_planned)
+        cable2.save()
+        path = (cable1, frontport1, rearport1, cable2)
+        cablepath = self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=False)
+
+        # Connecting only one of the two cables leaves the path inactive
+        cable2 = Cable.objects.get(pk=cable2.pk)
+        cable2.status = self.status
+        cable2.save()
+        self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=False)
+
+        # Connecting both cables activates the path, which is updated in place rather than retraced
+        cable1 = Cable.objects.get(pk=cable1.pk)
+        cable1.status = self.status
+        cable1.save()
+        self.assertEqual(
+            self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True), cablepath
+        )
+        self.assertEqual(CablePath.objects.filter(is_active=True).count(), 2)
+
+    def test_401_trace_multiple_origins(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C5-- [RP2] [FP2:1] --C3-- [IF3]
+        [IF2] --C2-- [FP1:2]                    [FP2:2] --C4-- [IF4]
+        """
+        interfaces = [Interface.objects.create(device=self.device, name=f"Interface {i}") for i in range(1, 5)]
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=2)
+        rearport2 = RearPort.objects.create(device=self.device, name="Rear Port 2", positions=2)
+        frontports = [
+            FrontPort.objects.create(
+                device=self.device,
+                name=f"Front Port {rearport.name[-1]}:{position}",
+                rear_port=rearport,
+                rear_port_position=position,
+            )
+            for rearport in (rearport1, rearport2)
+            for position in (1, 2)
+        ]
+        for interface, frontport in zip(interfaces, frontports):
+            Cable(termination_a=interface, termination_b=frontport, status=self.status).save()
+        Cable(termination_a=rearport1, termination_b=rearport2, status=self.status).save()
+        interfaces = list(Interface.objects.filter(pk__in=[interface.pk for interface in interfaces]))
+
+        # Tracing against a shared snapshot must yield the same paths as the stored (individually traced) ones
+        cable_paths = CablePath.from_origins(interfaces)
+        self.assertEqual(len(cable_paths), 4)
+        for interface, cp in cable_paths.items():
+            stored = CablePath.objects.get(pk=interface._path_id)
+            self.assertEqual(cp.path, stored.path)
+            self.assertEqual(cp.destination, stored.destination)
+            self.assertTrue(cp.is_active)
+
+        # The number of queries depends on the length of the paths, not on the number of origins traced
+        with CaptureQueriesContext(connection) as single_origin:
+            CablePath.from_origins(interfaces[:1])
+        with CaptureQueriesContext(connection) as all_origins:
+            CablePath.from_origins(interfaces)
+        self.assertEqual(len(all_origins), len(single_origin))
+
+    def _create_trace_paths_topology(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1", rear_port=rearport1, rear_port_position=1
+        )
+        cable1 = Cable(termination_a=interface1, termination_b=frontport1, status=self.status)
+        cable1.save()
+        cable2 = Cable(termination_a=rearport1, termination_b=interface2, status=self.status)
+        cable2.save()
+        return interface1, interface2, (cable1, frontport1, rearport1, cable2)
+
+    def test_402_trace_paths_command(self):
+        interface1, interface2, path = self._create_trace_paths_topology()
+        old_path = self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+
+        # A forced retrace replaces every existing path
+        call_command("trace_paths", force=True, no_input=True, batch_size=1, stdout=StringIO())
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertFalse(CablePath.objects.filter(pk=old_path.pk).exists())
+        new_path = self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+        interface1.refresh_from_db()
+        self.assertPathIsSet(interface1, new_path)
+
+        # Otherwise only missing paths are traced
+        CablePath.objects.filter(pk=new_path.pk).delete()
+        call_command("trace_paths", no_input=True, stdout=StringIO())
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+
+    @patch("nautobot.dcim.management.commands.trace_paths.ProcessPoolExecutor", InlineExecutor)
+    def test_402_trace_paths_command_workers(self):
+        interface1, interface2, path = self._create_trace_paths_topology()
+        old_path = self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+
+        call_command("trace_paths", force=True, no_input=True, workers=2, batch_size=1, stdout=StringIO())
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertFalse(CablePath.objects.filter(pk=old_path.pk).exists())
+        self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+        self.assertPathExists(origin=interface2, destination=interface1, path=reversed(path), is_active=True)
+
+    def test_402_trace_paths_command_resume(self):
+        interface1, interface2, path = self._create_trace_paths_topology()
+        old_path = self.assertPathExists(origin=interface1, destination=interface2, path=path, is_active=True)
+
+        # Simulate a forced run which was interrupted after retracing the path from Interface 1
+        checkpoint = {"dcim.interface": [[str(interface1.pk), str(interface1.pk)]]}
+        cache.set(CHECKPOINT_CACHE_KEY, checkpoint, timeout=None)
+
+        # A run without --force leaves the checkpoint in place
+        call_command("trace_paths", no_input=True, stdout=StringIO())
+        self.assertEqual(cache.get(CHECKPOINT_CACHE_KEY), checkpoint)
+
+        # Resuming the forced run skips the completed origins, and discards the checkpoint once finished
+        old_reverse_path = CablePath.objects.get(origin_id=interface2.pk)
+        call_command("trace_paths", force=True, resume=True, no_input=True, batch_size=1, stdout=StringIO())
+        self.assertTrue(CablePath.objects.filter(pk=old_path.pk).exists())
+        self.assertFalse(CablePath.objects.filter(pk=old_reverse_path.pk).exists())
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertIsNone(cache.get(CHECKPOINT_CACHE_KEY))
+
+    def test_403_prefetch_cable_paths(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [RP2] [FP2] --C3-- [IF2]
+        [IF3] --C4-- [CT1A] [CT1Z]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        interface3 = Interface.objects.create(device=self.device, name="Interface 3")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=1)
+        rearport2 = RearPort.objects.create(device=self.device, name="Rear Port 2", positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1", rear_port=rearport1, rear_port_position=1
+        )
+        frontport2 = FrontPort.objects.create(
+            device=self.device, name="Front Port 2", rear_port=rearport2, rear_port_position=1
+        )
+        circuittermination1 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side="A")
+        CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side="Z")
+        Cable(termination_a=interface1, termination_b=frontport1, status=self.status).save()
+        Cable(termination_a=rearport1, termination_b=rearport2, status=self.status).save()
+        Cable(termination_a=frontport2, termination_b=interface2, status=self.status).save()
+        Cable(termination_a=interface3, termination_b=circuittermination1, status=self.status).save()
+
+        interfaces = prefetch_cable_paths(Interface.objects.filter(device=self.device).order_by("name"))
+        expected_traces = {interface.pk: interface.trace() for interface in Interface.objects.all()}
+
+        # All path and cable peer accessors must be served from the prefetched objects
+        with self.assertNumQueries(0):
+            for interface in interfaces:
+                self.assertEqual(interface.trace(), expected_traces[interface.pk])
+                if interface.connected_endpoint is not None:
+                    str(interface.connected_endpoint.parent)
+                if interface._cable_peer is not None:
+                    str(interface._cable_peer.parent)
+                for near_end, _, far_end in interface.trace():
+                    for end in (near_end, far_end):
+                        if end is not None:
+                            str(end.parent)
+        self.assertEqual(interfaces[0].connected_endpoint, interface2)
+        self.assertEqual(interfaces[2].connected_endpoint, None)
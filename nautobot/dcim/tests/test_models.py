@@ -1,12 +1,19 @@
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from nautobot.circuits.models import *
 from nautobot.dcim.choices import *
 from nautobot.dcim.models import *
-from nautobot.extras.models import Status
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.context_managers import web_request_context
+from nautobot.extras.models import ObjectChange, Status
 from nautobot.tenancy.models import Tenant
 
+User = get_user_model()
+
 
 class RackGroupTestCase(TestCase):
     def test_change_rackgroup_site(self):
@@ -42,6 +49,35 @@ class RackGroupTestCase(TestCase):
         self.assertEqual(Rack.objects.get(pk=rack2.pk).site, site_b)
         self.assertEqual(PowerPanel.objects.get(pk=powerpanel1.pk).site, site_b)
 
+    def test_change_rackgroup_site_logs_changes(self):
+        """
+        Check that a change is logged for each object updated when a RackGroup is moved to a new Site.
+        """
+        site_a = Site.objects.create(name="Site A", slug="site-a")
+        site_b = Site.objects.create(name="Site B", slug="site-b")
+        manufacturer = Manufacturer.objects.create(name="Manufacturer 1", slug="manufacturer-1")
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model="Device Type 1", slug="device-type-1")
+        device_role = DeviceRole.objects.create(name="Device Role 1", slug="device-role-1", color="ff0000")
+
+        rackgroup_a1 = RackGroup.objects.create(site=site_a, name="RackGroup A1", slug="rackgroup-a1")
+        rackgroup_a2 = RackGroup.objects.create(
+            site=site_a, parent=rackgroup_a1, name="RackGroup A2", slug="rackgroup-a2"
+        )
+        rack = Rack.objects.create(site=site_a, group=rackgroup_a2, name="Rack 1")
+        device = Device.objects.create(site=site_a, rack=rack, device_type=device_type, device_role=device_role)
+
+        user = User.objects.create(username="testuser")
+        with web_request_context(user):
+            rackgroup_a1.site = site_b
+            rackgroup_a1.save()
+
+        self.assertEqual(Device.objects.get(pk=device.pk).site, site_b)
+        for obj in (rackgroup_a1, rackgroup_a2, rack, device):
+            objectchange = ObjectChange.objects.get(changed_object_id=obj.pk)
+            self.assertEqual(objectchange.action, ObjectChangeActionChoices.ACTION_UPDATE)
+            self.assertEqual(objectchange.user, user)
+            self.assertEqual(objectchange.object_data["site"], str(site_b.pk))
+
 
 class RackTestCase(TestCase):
     def setUp(self):
@@ -175,6 +211,124 @@ class RackTestCase(TestCase):
         )
         self.assertTrue(pdu)
 
+    def test_get_available_units(self):
+        rack = Rack.objects.create(name="TestRack2", site=self.site1, status=self.status, u_height=10)
+        device_type_2u = DeviceType.objects.create(
+            manufacturer=self.manufacturer, model="FrameForwarder 4096", slug="ff4096", u_height=2
+        )
+        device_type_half_depth = DeviceType.objects.create(
+            manufacturer=self.manufacturer, model="FrameForwarder 1024", slug="ff1024", is_full_depth=False
+        )
+        for name, device_type, position, face in (
+            ("Device 1", device_type_2u, 1, DeviceFaceChoices.FACE_FRONT),
+            ("Device 2", device_type_half_depth, 5, DeviceFaceChoices.FACE_REAR),
+            ("Device 3", self.device_type["cc5000"], None, ""),
+        ):
+            Device.objects.create(
+                name=name,
+                device_type=device_type,
+                device_role=self.role["Server"],
+                site=self.site1,
+                rack=rack,
+                position=position,
+                face=face,
+            )
+
+        self.assertEqual(rack.get_available_units(), [10, 9, 8, 7, 6, 4, 3])
+        self.assertEqual(rack.get_available_units(u_height=2), [9, 8, 7, 6, 3])
+        self.assertEqual(rack.get_available_units(u_height=3), [8, 7, 6])
+        self.assertEqual(
+            rack.get_available_units(u_height=2, rack_face=DeviceFaceChoices.FACE_FRONT), [9, 8, 7, 6, 5, 4, 3]
+        )
+        self.assertEqual(
+            rack.get_available_units(exclude=[Device.objects.get(name="Device 1").pk]),
+            [10, 9, 8, 7, 6, 4, 3, 2, 1],
+        )
+
+    def test_annotate_utilization(self):
+        """
+        Check that RackQuerySet.annotate_utilization() computes the same utilization as each Rack individually, using
+        a fixed number of queries.
+        """
+        rack2 = Rack.objects.create(name="TestRack2", site=self.site1, status=self.status, u_height=10)
+        Device.objects.create(
+            name="TestSwitch1",
+            device_type=self.device_type["ff2048"],
+            device_role=self.role["Switch"],
+            site=self.site1,
+            rack=rack2,
+            position=1,
+            face=DeviceFaceChoices.FACE_FRONT,
+        )
+        RackReservation.objects.create(
+            rack=rack2,
+            units=[1, 2, 3],
+            user=User.objects.create(username="testuser"),
+            description="Reservation",
+        )
+
+        # Feed a PDU in the rack from a PowerFeed, and connect a server's PowerPort to one of the PDU's outlets
+        power_panel = PowerPanel.objects.create(site=self.site1, name="Power Panel 1")
+        powerfeed = PowerFeed.objects.create(power_panel=power_panel, rack=rack2, name="Power Feed 1")
+        pdu = Device.objects.create(
+            name="TestPDU",
+            device_type=self.device_type["cc5000"],
+            device_role=self.role["PDU"],
+            site=self.site1,
+            rack=rack2,
+        )
+        pdu_powerport = PowerPort.objects.create(device=pdu, name="PSU")
+        pdu_poweroutlet = PowerOutlet.objects.create(device=pdu, name="Outlet 1", power_port=pdu_powerport)
+        server = Device.objects.create(
+            name="TestServer1",
+            device_type=self.device_type["cc5000"],
+            device_role=self.role["Server"],
+            site=self.site1,
+            rack=rack2,
+        )
+        server_powerport = PowerPort.objects.create(device=server, name="PSU", allocated_draw=500)
+        Cable.objects.create(termination_a=powerfeed, termination_b=pdu_powerport)
+        Cable.objects.create(termination_a=pdu_poweroutlet, termination_b=server_powerport)
+
+        expected = {
+            rack.pk: (rack.get_utilization(), rack.get_power_utilization())
+            for rack in Rack.objects.filter(pk__in=[self.rack.pk, rack2.pk])
+        }
+        self.assertEqual(expected[rack2.pk][0], (3, 10))
+        self.assertEqual(expected[rack2.pk][1], (500, powerfeed.available_power))
+        self.assertEqual(expected[self.rack.pk], ((0, 42), (0, 0)))
+
+        # At most one query for the racks, two for space utilization and four for power utilization (fewer if any
+        # are served from the query cache)
+        with CaptureQueriesContext(connection) as queries:
+            racks = list(Rack.objects.filter(pk__in=[self.rack.pk, rack2.pk]).annotate_utilization())
+            for rack in racks:
+                self.assertEqual((rack.get_utilization(), rack.get_power_utilization()), expected[rack.pk])
+        self.assertLessEqual(len(queries), 7)
+
+    def test_get_utilization_not_cached(self):
+        """
+        Check that the utilization of a Rack which was not retrieved with annotate_utilization() reflects changes made
+        after it was first computed.
+        """
+        rack = Rack.objects.create(name="TestRack2", site=self.site1, status=self.status, u_height=10)
+        self.assertEqual(rack.get_utilization(), (0, 10))
+        self.assertEqual(rack.get_power_utilization(), (0, 0))
+
+        Device.objects.create(
+            name="TestSwitch1",
+            device_type=self.device_type["ff2048"],
+            device_role=self.role["Switch"],
+            site=self.site1,
+            rack=rack,
+            position=1,
+            face=DeviceFaceChoices.FACE_FRONT,
+        )
+        power_panel = PowerPanel.objects.create(site=self.site1, name="Power Panel 1")
+        powerfeed = PowerFeed.objects.create(power_panel=power_panel, rack=rack, name="Power Feed 1")
+        self.assertEqual(rack.get_utilization(), (1, 10))
+        self.assertEqual(rack.get_power_utilization(), (0, powerfeed.available_power))
+
     def test_change_rack_site(self):
         """
         Check that child Devices get updated when a Rack is moved to a new Site.
@@ -1,4 +1,5 @@
 from decimal import Decimal
+from unittest.mock import patch
 
 import pytz
 import yaml
@@ -389,6 +390,16 @@ class RackTestCase(ViewTestCases.PrimaryObjectViewTestCase):
         response = self.client.get(reverse("dcim:rack_elevation_list"))
         self.assertHttpStatus(response, 200)
 
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"], RACK_ELEVATION_CACHE_TIMEOUT=0)
+    def test_list_rack_elevations_without_caching(self):
+        """
+        Test that the elevations are not rendered ahead of time when they would not be cached.
+        """
+        with patch("nautobot.dcim.views.render_rack_elevations") as render_rack_elevations:
+            response = self.client.get(reverse("dcim:rack_elevation_list"))
+        self.assertHttpStatus(response, 200)
+        render_rack_elevations.assert_not_called()
+
 
 class ManufacturerTestCase(ViewTestCases.OrganizationalObjectViewTestCase):
     model = Manufacturer
@@ -0,0 +1,296 @@
+"""
+Physical connectivity graphs.
+
+`TopologyGraph` holds an in-memory adjacency index of devices, their cable-capable components, circuit terminations
+and power feeds, and the cables, pass-throughs and circuits which join them. It is loaded with one query per model for
+an entire set of devices, after which graph exports and path queries require no further database access.
+"""
+import json
+from collections import defaultdict, deque
+from xml.sax.saxutils import escape, quoteattr
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from nautobot.circuits.models import CircuitTermination
+from nautobot.dcim.models import (
+    Cable,
+    ConsolePort,
+    ConsoleServerPort,
+    Device,
+    FrontPort,
+    Interface,
+    PowerFeed,
+    PowerOutlet,
+    PowerPort,
+    RearPort,
+)
+
+# Device components which may be attached to a cable
+COMPONENT_MODELS = (
+    ConsolePort,
+    ConsoleServerPort,
+    FrontPort,
+    Interface,
+    PowerOutlet,
+    PowerPort,
+    RearPort,
+)
+
+CABLE_FIELDS = (
+    "pk",
+    "label",
+    "status__slug",
+    "termination_a_type__app_label",
+    "termination_a_type__model",
+    "termination_a_id",
+    "termination_b_type__app_label",
+    "termination_b_type__model",
+    "termination_b_id",
+)
+
+# Node attributes included in GraphML exports
+GRAPHML_NODE_KEYS = ("type", "name", "device", "circuit")
+GRAPHML_EDGE_KEYS = ("type", "label", "status")
+
+
+def get_node_id(model, pk):
+    """
+    Return the graph node ID representing the given object, in the form `<app_label>.<model_name>:<pk>`.
+    """
+    return f"{model._meta.label_lower}:{pk}"
+
+
+class TopologyGraph:
+    """
+    An undirected graph of physical connectivity.
+
+    Each node is a dictionary of attributes keyed by its node ID (see `get_node_id()`); each edge is a dictionary
+    with `id`, `type`, `source` and `target` attributes. Edge types are "component" (a device and one of its
+    components), "cable", "pass-through" (a front port and its rear port) and "circuit" (the two terminations of a
+    circuit).
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+        # Node ID => set of (neighbor node ID, edge ID)
+        self.adjacency = defaultdict(set)
+
+    def add_node(self, node_id, **attrs):
+        self.nodes[node_id] = {"id": node_id, **attrs}
+
+    def add_edge(self, edge_id, source, target, **attrs):
+        """
+        Add an edge between two nodes. Edges whose ends are not both present in the graph are ignored.
+        """
+        if source not in self.nodes or target not in self.nodes:
+            return
+        self.edges[edge_id] = {"id": edge_id, "source": source, "target": target, **attrs}
+        self.adjacency[source].add((target, edge_id))
+        self.adjacency[target].add((source, edge_id))
+
+    @classmethod
+    def from_devices(cls, devices, user=None):
+        """
+        Build the graph of the given Device queryset, including all cables attached to the devices' components and
+        any circuit terminations and power feeds at the far end of those cables. If `user` is given, every object
+        loaded is restricted to those the user has permission to view.
+        """
+
+        def restrict(queryset):
+            return queryset.restrict(user, "view") if user is not None else queryset
+
+        graph = cls()
+        device_ids = devices.values("pk")
+
+        for pk, name in devices.values_list("pk", "name"):
+            graph.add_node(get_node_id(devices.model, pk), type=devices.model._meta.label_lower, name=name)
+
+        pass_throughs = []
+        for model in COMPONENT_MODELS:
+            fields = ["pk", "name", "device_id"]
+            if model is FrontPort:
+                fields.append("rear_port_id")
+            for values in restrict(model.objects.filter(device__in=device_ids)).values_list(*fields):
+                node_id = get_node_id(model, values[0])
+                device_node_id = get_node_id(devices.model, values[2])
+                graph.add_node(node_id, type=model._meta.label_lower, name=values[1], device=device_node_id)
+                graph.add_edge(f"component:{values[0]}", device_node_id, node_id, type="component")
+                if model is FrontPort:
+                    pass_throughs.append((values[0], values[3]))
+
+        # Add pass-through edges once all FrontPorts and RearPorts are present
+        for pk, rear_port_id in pass_throughs:
+            graph.add_edge(
+                f"pass-through:{pk}",
+                get_node_id(FrontPort, pk),
+                get_node_id(RearPort, rear_port_id),
+                type="pass-through",
+            )
+
+        cables = list(
+            restrict(
+                Cable.objects.filter(Q(_termination_a_device__in=device_ids) | Q(_termination_b_device__in=device_ids))
+            ).values_list(*CABLE_FIELDS)
+        )
+
+        # Load the circuit terminations and power feeds at the far end of any cables, along with their circuits' other
+        # terminations (and the cables attached to those)
+        far_end_ids = defaultdict(set)
+        for cable in cables:
+            for app_label, model_name, pk in (cable[3:6], cable[6:9]):
+                far_end_ids[f"{app_label}.{model_name}"].add(pk)
+
+        circuit_ids = restrict(
+            CircuitTermination.objects.filter(pk__in=far_end_ids[CircuitTermination._meta.label_lower])
+        ).values("circuit")
+        circuit_terminations = restrict(CircuitTermination.objects.filter(circuit__in=circuit_ids)).values_list(
+            "pk", "circuit_id", "circuit__cid", "term_side"
+        )
+        terminations_by_circuit = defaultdict(list)
+        for pk, circuit_id, cid, term_side in circuit_terminations:
+            graph.add_node(
+                get_node_id(CircuitTermination, pk),
+                type=CircuitTermination._meta.label_lower,
+                name=f"{cid} (Side {term_side})",
+                circuit=cid,
+            )
+            terminations_by_circuit[circuit_id].append(pk)
+        for circuit_id, termination_ids in terminations_by_circuit.items():
+            if len(termination_ids) == 2:
+                graph.add_edge(
+                    f"circuit:{circuit_id}",
+                    get_node_id(CircuitTermination, termination_ids[0]),
+                    get_node_id(CircuitTermination, termination_ids[1]),
+                    type="circuit",
+                )
+
+        circuit_termination_type = ContentType.objects.get_for_model(CircuitTermination)
+        circuit_termination_ids = circuit_terminations.values("pk")
+        loaded_cable_ids = {cable[0] for cable in cables}
+        cables.extend(
+            cable
+            for cable in restrict(
+                Cable.objects.filter(
+                    Q(termination_a_type=circuit_termination_type, termination_a_id__in=circuit_termination_ids)
+                    | Q(termination_b_type=circuit_termination_type, termination_b_id__in=circuit_termination_ids)
+                )
+            ).values_list(*CABLE_FIELDS)
+            if cable[0] not in loaded_cable_ids
+        )
+
+        for pk, name in restrict(PowerFeed.objects.filter(pk__in=far_end_ids[PowerFeed._meta.label_lower])).values_list(
+            "pk", "name"
+        ):
+            graph.add_node(get_node_id(PowerFeed, pk), type=PowerFeed._meta.label_lower, name=name)
+
+        for pk, label, status, a_app_label, a_model, a_id, b_app_label, b_model, b_id in cables:
+            graph.add_edge(
+                f"cable:{pk}",
+                f"{a_app_label}.{a_model}:{a_id}",
+                f"{b_app_label}.{b_model}:{b_id}",
+                type="cable",
+                label=label,
+                status=status,
+            )
+
+        return graph
+
+    def _neighbors(self, node_id, source, traverse_devices):
+        # Unless traversing devices, a device is a dead end (other than when it is the start of the search): its
+        # components are connected to one another only through their own cables and pass-throughs.
+        if not traverse_devices and node_id != source and self.nodes[node_id]["type"] == Device._meta.label_lower:
+            return ()
+        return self.adjacency[node_id]
+
+    def shortest_path(self, source, target, traverse_devices=False):
+        """
+        Return the list of node IDs and the list of edge IDs along a shortest path from `source` to `target`, or
+        `(None, None)` if `target` is not reachable from `source`.
+        """
+        if source not in self.nodes or target not in self.nodes:
+            return None, None
+
+        previous = {source: (None, None)}
+        queue = deque([source])
+        while queue:
+            node_id = queue.popleft()
+            if node_id == target:
+                break
+            for neighbor, edge_id in self._neighbors(node_id, source, traverse_devices):
+                if neighbor not in previous:
+                    previous[neighbor] = (node_id, edge_id)
+                    queue.append(neighbor)
+        else:
+            return None, None
+
+        nodes, edges = [target], []
+        node_id, edge_id = previous[target]
+        while node_id is not None:
+            nodes.append(node_id)
+            edges.append(edge_id)
+            node_id, edge_id = previous[node_id]
+        return nodes[::-1], edges[::-1]
+
+    def reachable(self, source, node_type=None, traverse_devices=False):
+        """
+        Return the IDs of all nodes (optionally, only those of the given type) reachable from `source`, in order of
+        increasing distance.
+        """
+        if source not in self.nodes:
+            return []
+
+        seen = {source}
+        queue = deque([source])
+        reachable = []
+        while queue:
+            node_id = queue.popleft()
+            for neighbor, _ in self._neighbors(node_id, source, traverse_devices):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+                    if node_type is None or self.nodes[neighbor]["type"] == node_type:
+                        reachable.append(neighbor)
+        return reachable
+
+    def iter_json(self):
+        """
+        Yield the graph serialized as a JSON object of the form `{"nodes": [...], "edges": [...]}`, in chunks.
+        """
+        yield '{"nodes": ['
+        for i, node in enumerate(self.nodes.values()):
+            yield ("," if i else "") + json.dumps(node)
+        yield '], "edges": ['
+        for i, edge in enumerate(self.edges.values()):
+            yield ("," if i else "") + json.dumps(edge)
+        yield "]}"
+
+    def iter_graphml(self):
+        """
+        Yield the graph serialized as a GraphML document, in chunks.
+        """
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        for key in GRAPHML_NODE_KEYS:
+            yield f'  <key id="node_{key}" for="node" attr.name="{key}" attr.type="string"/>\n'
+        for key in GRAPHML_EDGE_KEYS:
+            yield f'  <key id="edge_{key}" for="edge" attr.name="{key}" attr.type="string"/>\n'
+        yield '  <graph id="topology" edgedefault="undirected">\n'
+        for node in self.nodes.values():
+            yield f"    <node id={quoteattr(node['id'])}>{self._graphml_data(node, 'node', GRAPHML_NODE_KEYS)}</node>\n"
+        for edge in self.edges.values():
+            yield (
+                f"    <edge id={quoteattr(edge['id'])} source={quoteattr(edge['source'])} "
+                f"target={quoteattr(edge['target'])}>{self._graphml_data(edge, 'edge', GRAPHML_EDGE_KEYS)}</edge>\n"
+            )
+        yield "  </graph>\n"
+        yield "</graphml>\n"
+
+    @staticmethod
+    def _graphml_data(attrs, prefix, keys):
+        return "".join(
+            f'<data key="{prefix}_{key}">{escape(str(attrs[key]))}</data>'
+            for key in keys
+            if attrs.get(key) not in (None, "")
+        )
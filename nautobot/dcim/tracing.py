@@ -0,0 +1,219 @@
+"""
+In-memory cable path tracing.
+
+`CablePathTracer` loads the portion of the cable graph reachable from a set of origins using a handful of bulk queries
+per hop (rather than several queries per node per hop), and then walks each path entirely in memory. A single tracer
+may be used to trace any number of origins, all of which share the same snapshot of the graph.
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+
+from nautobot.circuits.models import CircuitTermination
+from nautobot.dcim.models import Cable, FrontPort, RearPort
+from nautobot.dcim.utils import compile_path_node
+
+
+class CablePathTracer:
+    """
+    Trace CablePaths against a snapshot of the cable graph.
+
+    Objects are loaded lazily the first time they are needed and are never refreshed, so a tracer should not be reused
+    across changes to the cable plant. Call `preload()` with all of the origins to be traced up front to load their
+    graph in as few queries as possible.
+    """
+
+    def __init__(self):
+        # (ContentType ID, pk) => CableTermination instance
+        self._objects = {}
+        # Cable pk => Cable instance
+        self._cables = {}
+        # (RearPort pk, position) => FrontPort instance
+        self._front_ports = {}
+        self._rear_port_ids = set()
+        # (Circuit pk, term_side) => CircuitTermination instance
+        self._circuit_terminations = {}
+        self._circuit_ids = set()
+        # Keys of the objects whose next hop has already been loaded
+        self._expanded = set()
+
+    @staticmethod
+    def _get_content_type_id(model):
+        # ContentTypes are cached by their manager, so this does not hit the database after the first call per model
+        return ContentType.objects.get_for_model(model).pk
+
+    def _key(self, obj):
+        return self._get_content_type_id(obj._meta.model), obj.pk
+
+    def _add_object(self, obj):
+        return self._objects.setdefault(self._key(obj), obj)
+
+    def _get_peer(self, node):
+        if node._cable_peer_type_id is None or node._cable_peer_id is None:
+            return None
+        return self._objects.get((node._cable_peer_type_id, node._cable_peer_id))
+
+    def preload(self, origins):
+        """
+        Load all Cables and CableTerminations reachable from the given origins, one breadth-first hop at a time.
+        """
+        frontier = [origin for origin in origins if origin is not None and origin.cable_id is not None]
+        while frontier:
+            frontier = self._expand(frontier)
+
+    def _expand(self, nodes):
+        """
+        Load the next hop for each of the given nodes, and return the nodes from which tracing must continue.
+        """
+        nodes = [node for node in nodes if self._key(node) not in self._expanded]
+        if not nodes:
+            return []
+        for node in nodes:
+            self._expanded.add(self._key(node))
+
+        # Load the attached Cables
+        cable_ids = {node.cable_id for node in nodes} - self._cables.keys()
+        if cable_ids:
+            self._cables.update(Cable.objects.in_bulk(cable_ids))
+
+        # Load the far-end terminations, one query per termination type
+        peers_to_load = defaultdict(set)
+        for node in nodes:
+            if node._cable_peer_type_id is not None and self._get_peer(node) is None:
+                peers_to_load[node._cable_peer_type_id].add(node._cable_peer_id)
+        for ct_id, object_ids in peers_to_load.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            for obj in model.objects.filter(pk__in=object_ids):
+                self._add_object(obj)
+
+        peers = [peer for peer in (self._get_peer(node) for node in nodes) if peer is not None]
+        next_nodes = []
+
+        # FrontPorts lead to their RearPorts
+        rear_port_ids = {peer.rear_port_id for peer in peers if isinstance(peer, FrontPort)}
+        rear_port_ct_id = self._get_content_type_id(RearPort)
+        missing_ids = {pk for pk in rear_port_ids if (rear_port_ct_id, pk) not in self._objects}
+        if missing_ids:
+            for rear_port in RearPort.objects.filter(pk__in=missing_ids):
+                self._add_object(rear_port)
+        next_nodes.extend(self._objects[(rear_port_ct_id, pk)] for pk in rear_port_ids)
+
+        # RearPorts lead to their FrontPorts
+        rear_port_ids = {peer.pk for peer in peers if isinstance(peer, RearPort)}
+        missing_ids = rear_port_ids - self._rear_port_ids
+        if missing_ids:
+            for front_port in FrontPort.objects.filter(rear_port__in=missing_ids):
+                front_port = self._add_object(front_port)
+                self._front_ports[(front_port.rear_port_id, front_port.rear_port_position)] = front_port
+            self._rear_port_ids.update(missing_ids)
+        next_nodes.extend(
+            front_port for (rear_port_id, _), front_port in self._front_ports.items() if rear_port_id in rear_port_ids
+        )
+
+        # CircuitTerminations lead to the opposite termination of their Circuit
+        circuit_ids = {peer.circuit_id for peer in peers if isinstance(peer, CircuitTermination)}
+        missing_ids = circuit_ids - self._circuit_ids
+        if missing_ids:
+            for termination in CircuitTermination.objects.filter(circuit__in=missing_ids):
+                termination = self._add_object(termination)
+                self._circuit_terminations[(termination.circuit_id, termination.term_side)] = termination
+            self._circuit_ids.update(missing_ids)
+        next_nodes.extend(
+            termination
+            for (circuit_id, _), termination in self._circuit_terminations.items()
+            if circuit_id in circuit_ids
+        )
+
+        return [node for node in next_nodes if node.cable_id is not None]
+
+    def trace(self, origin):
+        """
+        Return a new (unsaved) CablePath instance as traced from the given path origin, or None if the origin is not
+        connected to a cable.
+        """
+        # Import added here to avoid circular imports with CablePath.
+        from nautobot.dcim.models import CablePath
+
+        if origin is None or origin.cable_id is None:
+            return None
+
+        self.preload([origin])
+
+        cable_ct_id = self._get_content_type_id(Cable)
+        connected_status_id = Cable.STATUS_CONNECTED.pk
+
+        destination = None
+        path = []
+        position_stack = []
+        is_active = True
+        is_split = False
+
+        node = origin
+        visited_nodes = set()
+        while node.cable_id is not None:
+            if node.pk in visited_nodes:
+                raise ValidationError("a loop is detected in the path")
+            visited_nodes.add(node.pk)
+            if self._cables[node.cable_id].status_id != connected_status_id:
+                is_active = False
+
+            # Follow the cable to its far-end termination
+            path.append(compile_path_node(cable_ct_id, node.cable_id))
+            peer_termination = self._get_peer(node)
+
+            # Follow a FrontPort to its corresponding RearPort
+            if isinstance(peer_termination, FrontPort):
+                path.append(compile_path_node(*self._key(peer_termination)))
+                node = self._objects[(self._get_content_type_id(RearPort), peer_termination.rear_port_id)]
+                if node.positions > 1:
+                    position_stack.append(peer_termination.rear_port_position)
+                path.append(compile_path_node(*self._key(node)))
+
+            # Follow a RearPort to its corresponding FrontPort (if any)
+            elif isinstance(peer_termination, RearPort):
+                path.append(compile_path_node(*self._key(peer_termination)))
+
+                # Determine the peer FrontPort's position
+                if peer_termination.positions == 1:
+                    position = 1
+                elif position_stack:
+                    position = position_stack.pop()
+                else:
+                    # No position indicated: path has split, so we stop at the RearPort
+                    is_split = True
+                    break
+
+                node = self._front_ports.get((peer_termination.pk, position))
+                if node is None:
+                    # No corresponding FrontPort found for the RearPort
+                    break
+                path.append(compile_path_node(*self._key(node)))
+
+            # Follow a Circuit Termination if there is a corresponding Circuit Termination
+            # Side A and Side Z exist
+            elif isinstance(peer_termination, CircuitTermination):
+                peer_side = "Z" if peer_termination.term_side == "A" else "A"
+                node = self._circuit_terminations.get((peer_termination.circuit_id, peer_side))
+                # A Circuit Termination does not require a peer.
+                if node is None:
+                    destination = peer_termination
+                    break
+                path.append(compile_path_node(*self._key(peer_termination)))
+                path.append(compile_path_node(*self._key(node)))
+
+            # Anything else marks the end of the path
+            else:
+                destination = peer_termination
+                break
+
+        if destination is None:
+            is_active = False
+
+        return CablePath(
+            origin=origin,
+            destination=destination,
+            path=path,
+            is_active=is_active,
+            is_split=is_split,
+        )
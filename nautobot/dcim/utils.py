@@ -1,4 +1,5 @@
 import uuid
+from collections import defaultdict
 
 from django.contrib.contenttypes.models import ContentType
 
@@ -34,6 +35,111 @@ def path_node_to_object(repr):
     return ct.model_class().objects.get(pk=object_id)
 
 
+def prefetch_cable_paths(origins):
+    """
+    Given an iterable of PathEndpoints, load all of their CablePaths, every object within those paths, the path
+    destinations and the origins' cable peers in bulk (one query per model), so that the `path`, `connected_endpoint`
+    and `trace()` accessors and the `_cable_peer` of each endpoint can be evaluated without any further queries.
+
+    The parent Device, Circuit (and Provider) or PowerPanel of each loaded object is also loaded. Returns the origins
+    as a list.
+    """
+    # Import added here to avoid circular imports with the models module.
+    from nautobot.dcim.models import CablePath
+
+    origins = list(origins)
+    path_ids = {origin._path_id for origin in origins if origin._path_id is not None}
+    cable_paths = CablePath.objects.in_bulk(path_ids) if path_ids else {}
+
+    # Compile the IDs of all objects to load, grouped by content type
+    to_prefetch = defaultdict(set)
+    for cable_path in cable_paths.values():
+        for node in cable_path.path:
+            ct_id, object_id = decompile_path_node(node)
+            to_prefetch[ct_id].add(object_id)
+        if cable_path.destination_id is not None:
+            to_prefetch[cable_path.destination_type_id].add(cable_path.destination_id)
+    for origin in origins:
+        if origin._cable_peer_id is not None:
+            to_prefetch[origin._cable_peer_type_id].add(origin._cable_peer_id)
+
+    prefetched = {}
+    for ct_id, object_ids in to_prefetch.items():
+        model_class = ContentType.objects.get_for_id(ct_id).model_class()
+        field_names = {field.name for field in model_class._meta.fields}
+        queryset = model_class.objects.filter(pk__in=object_ids)
+        if "device" in field_names:
+            queryset = queryset.select_related("device")
+        if "circuit" in field_names:
+            queryset = queryset.select_related("circuit__provider")
+        if "power_panel" in field_names:
+            queryset = queryset.select_related("power_panel")
+        for obj in queryset:
+            prefetched[(ct_id, obj.pk)] = obj
+
+    # Populate the relation caches of the CablePaths and origins with the loaded objects
+    for cable_path in cable_paths.values():
+        destination = prefetched.get((cable_path.destination_type_id, cable_path.destination_id))
+        CablePath._meta.get_field("destination").set_cached_value(cable_path, destination)
+        path_objects = [prefetched.get(decompile_path_node(node)) for node in cable_path.path]
+        if None not in path_objects:
+            cable_path._path_objects = path_objects
+    for origin in origins:
+        cable_path = cable_paths.get(origin._path_id)
+        origin._meta.get_field("_path").set_cached_value(origin, cable_path)
+        if cable_path is not None:
+            CablePath._meta.get_field("origin").set_cached_value(cable_path, origin)
+        cable_peer = prefetched.get((origin._cable_peer_type_id, origin._cable_peer_id))
+        origin._meta.get_field("_cable_peer").set_cached_value(origin, cable_peer)
+
+    return origins
+
+
+class RackOccupancy:
+    """
+    The occupied units of a rack, represented as an integer bitmap in which bit N is set if unit N is occupied.
+
+    Marking a device's units and searching for runs of free units are each a handful of integer operations,
+    regardless of the number of devices installed in the rack.
+    """
+
+    def __init__(self, u_height):
+        self.u_height = u_height
+        # Bits 1 through u_height represent the rack's units; bit 0 is unused
+        self.all_units = ((1 << u_height) - 1) << 1
+        self.occupied = 0
+
+    def occupy(self, position, u_height=1):
+        """
+        Mark `u_height` units starting at `position` as occupied. Units outside the rack are ignored.
+        """
+        if position and u_height:
+            self.occupied |= (((1 << u_height) - 1) << position) & self.all_units
+
+    def occupy_units(self, units):
+        """
+        Mark each of the given units as occupied. Units outside the rack are ignored.
+        """
+        for u in units:
+            if 1 <= u <= self.u_height:
+                self.occupied |= 1 << u
+
+    @property
+    def occupied_count(self):
+        return bin(self.occupied).count("1")
+
+    def get_available_units(self, u_height=1):
+        """
+        Return a list of units (in descending order) at which a device of the given U height could be installed.
+        """
+        free = self.all_units & ~self.occupied
+        # A unit is a valid position only if it and each of the (u_height - 1) units above it are free
+        available = free
+        for i in range(1, u_height):
+            available &= free >> i
+        return [u for u in range(self.u_height, 0, -1) if available >> u & 1]
+
+
 def cable_status_color_css(record):
     """
     Given a record such as an Interface, return the CSS needed to apply appropriate coloring to it.
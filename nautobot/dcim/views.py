@@ -1,5 +1,6 @@
 from collections import OrderedDict, namedtuple
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import EmptyPage, PageNotAnInteger
@@ -30,6 +31,7 @@ from nautobot.virtualization.models import VirtualMachine
 from . import filters, forms, tables
 from .choices import DeviceFaceChoices
 from .constants import NONCONNECTABLE_IFACE_TYPES
+from .elevations import render_rack_elevations
 from .models import (
     Cable,
     CablePath,
@@ -66,6 +68,7 @@ from .models import (
     Site,
     VirtualChassis,
 )
+from .utils import prefetch_cable_paths
 
 
 class BulkDisconnectView(GetReturnURLMixin, ObjectPermissionRequiredMixin, View):
@@ -378,8 +381,10 @@ class RackRoleBulkDeleteView(generic.BulkDeleteView):
 
 
 class RackListView(generic.ObjectListView):
-    queryset = Rack.objects.prefetch_related("site", "group", "tenant", "role", "devices__device_type").annotate(
-        device_count=count_related(Device, "rack")
+    queryset = (
+        Rack.objects.prefetch_related("site", "group", "tenant", "role")
+        .annotate(device_count=count_related(Device, "rack"))
+        .annotate_utilization()
     )
     filterset = filters.RackFilterSet
     filterset_form = forms.RackFilterForm
@@ -419,6 +424,13 @@ class RackElevationListView(generic.ObjectListView):
         if rack_face not in DeviceFaceChoices.values():
             rack_face = DeviceFaceChoices.FACE_FRONT
 
+        # Render the page's elevations in bulk ahead of the browser requesting each one individually from the REST API
+        # (unless they would not be cached, in which case each would be rendered twice)
+        if settings.RACK_ELEVATION_CACHE_TIMEOUT:
+            render_rack_elevations(
+                page.object_list, face=rack_face, user=request.user, base_url=request.build_absolute_uri("/")
+            )
+
         return render(
             request,
             "dcim/rack_elevation_list.html",
@@ -1210,9 +1222,9 @@ class DeviceConsolePortsView(generic.ObjectView):
             .filter(device=instance)
             .prefetch_related(
                 "cable",
-                "_path__destination",
             )
         )
+        consoleports = prefetch_cable_paths(consoleports)
         consoleport_table = tables.DeviceConsolePortTable(data=consoleports, user=request.user, orderable=False)
         if request.user.has_perm("dcim.change_consoleport") or request.user.has_perm("dcim.delete_consoleport"):
             consoleport_table.columns.show("pk")
@@ -1233,9 +1245,9 @@ class DeviceConsoleServerPortsView(generic.ObjectView):
             .filter(device=instance)
             .prefetch_related(
                 "cable",
-                "_path__destination",
             )
         )
+        consoleserverports = prefetch_cable_paths(consoleserverports)
         consoleserverport_table = tables.DeviceConsoleServerPortTable(
             data=consoleserverports, user=request.user, orderable=False
         )
@@ -1260,9 +1272,9 @@ class DevicePowerPortsView(generic.ObjectView):
             .filter(device=instance)
             .prefetch_related(
                 "cable",
-                "_path__destination",
             )
         )
+        powerports = prefetch_cable_paths(powerports)
         powerport_table = tables.DevicePowerPortTable(data=powerports, user=request.user, orderable=False)
         if request.user.has_perm("dcim.change_powerport") or request.user.has_perm("dcim.delete_powerport"):
             powerport_table.columns.show("pk")
@@ -1284,9 +1296,9 @@ class DevicePowerOutletsView(generic.ObjectView):
             .prefetch_related(
                 "cable",
                 "power_port",
-                "_path__destination",
             )
         )
+        poweroutlets = prefetch_cable_paths(poweroutlets)
         poweroutlet_table = tables.DevicePowerOutletTable(data=poweroutlets, user=request.user, orderable=False)
         if request.user.has_perm("dcim.change_poweroutlet") or request.user.has_perm("dcim.delete_poweroutlet"):
             poweroutlet_table.columns.show("pk")
@@ -1307,9 +1319,9 @@ class DeviceInterfacesView(generic.ObjectView):
             Prefetch("member_interfaces", queryset=Interface.objects.restrict(request.user)),
             "lag",
             "cable",
-            "_path__destination",
             "tags",
         )
+        interfaces = prefetch_cable_paths(interfaces)
         interface_table = tables.DeviceInterfaceTable(data=interfaces, user=request.user, orderable=False)
         if request.user.has_perm("dcim.change_interface") or request.user.has_perm("dcim.delete_interface"):
             interface_table.columns.show("pk")
@@ -1418,11 +1430,8 @@ class DeviceLLDPNeighborsView(generic.ObjectView):
     template_name = "dcim/device/lldp_neighbors.html"
 
     def get_extra_context(self, request, instance):
-        interfaces = (
-            instance.vc_interfaces.restrict(request.user, "view")
-            .prefetch_related("_path__destination")
-            .exclude(type__in=NONCONNECTABLE_IFACE_TYPES)
-        )
+        interfaces = instance.vc_interfaces.restrict(request.user, "view").exclude(type__in=NONCONNECTABLE_IFACE_TYPES)
+        interfaces = prefetch_cable_paths(interfaces)
 
         return {
             "interfaces": interfaces,
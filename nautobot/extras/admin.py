@@ -131,6 +131,7 @@ class CustomFieldAdmin(admin.ModelAdmin):
         "type",
         "required",
         "filter_logic",
+        "indexed",
         "default",
         "weight",
         "description",
@@ -153,6 +154,7 @@ class CustomFieldAdmin(admin.ModelAdmin):
                     "required",
                     "default",
                     "filter_logic",
+                    "indexed",
                 )
             },
         ),
@@ -88,6 +88,7 @@ class CustomFieldSerializer(ValidatedModelSerializer):
             "description",
             "required",
             "filter_logic",
+            "indexed",
             "default",
             "weight",
             "validation_minimum",
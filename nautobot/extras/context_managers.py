@@ -6,7 +6,7 @@ from django.core.handlers.wsgi import WSGIRequest
 from django.db.models.signals import m2m_changed, pre_delete, post_save
 from django.test.client import RequestFactory
 
-from nautobot.extras.signals import _handle_changed_object, _handle_deleted_object
+from nautobot.extras.signals import _handle_changed_object, _handle_deleted_object, _change_logging
 from nautobot.utilities.utils import curry
 
 
@@ -27,7 +27,13 @@ def change_logging(request):
     m2m_changed.connect(handle_changed_object, dispatch_uid="handle_changed_object")
     pre_delete.connect(handle_deleted_object, dispatch_uid="handle_deleted_object")
 
-    yield
+    # Make the request available to code which logs changes in bulk
+    prior_request = getattr(_change_logging, "request", None)
+    _change_logging.request = request
+    try:
+        yield
+    finally:
+        _change_logging.request = prior_request
 
     # Disconnect change logging signals. This is necessary to avoid recording any errant
     # changes during test cleanup.
@@ -104,11 +104,9 @@ class CustomFieldModelFilterSet(django_filters.FilterSet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        custom_fields = CustomField.objects.filter(
-            content_types=ContentType.objects.get_for_model(self._meta.model)
-        ).exclude(filter_logic=CustomFieldFilterLogicChoices.FILTER_DISABLED)
-        for cf in custom_fields:
-            self.filters["cf_{}".format(cf.name)] = CustomFieldFilter(field_name=cf.name, custom_field=cf)
+        for cf in CustomField.objects.get_for_model_cached(self._meta.model):
+            if cf.filter_logic != CustomFieldFilterLogicChoices.FILTER_DISABLED:
+                self.filters["cf_{}".format(cf.name)] = CustomFieldFilter(field_name=cf.name, custom_field=cf)
 
 
 class CustomFieldFilterSet(BaseFilterSet):
@@ -122,7 +120,7 @@ class CustomFieldFilterSet(BaseFilterSet):
 
     class Meta:
         model = CustomField
-        fields = ["id", "content_types", "name", "required", "filter_logic", "weight"]
+        fields = ["id", "content_types", "name", "required", "filter_logic", "indexed", "weight"]
 
     def search(self, queryset, name, value):
         if not value.strip():
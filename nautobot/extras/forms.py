@@ -72,7 +72,7 @@ class CustomFieldModelForm(forms.ModelForm):
         Append form fields for all CustomFields assigned to this model.
         """
         # Append form fields; assign initial values if modifying and existing object
-        for cf in CustomField.objects.filter(content_types=self.obj_type):
+        for cf in CustomField.objects.get_for_model_cached(self._meta.model):
             field_name = "cf_{}".format(cf.name)
             if self.instance.present_in_database:
                 self.fields[field_name] = cf.to_form_field(set_initial=False)
@@ -96,7 +96,7 @@ class CustomFieldModelCSVForm(CSVModelForm, CustomFieldModelForm):
     def _append_customfield_fields(self):
 
         # Append form fields
-        for cf in CustomField.objects.filter(content_types=self.obj_type):
+        for cf in CustomField.objects.get_for_model_cached(self._meta.model):
             field_name = "cf_{}".format(cf.name)
             self.fields[field_name] = cf.to_form_field(for_csv_import=True)
 
@@ -112,7 +112,7 @@ class CustomFieldBulkEditForm(BulkEditForm):
         self.obj_type = ContentType.objects.get_for_model(self.model)
 
         # Add all applicable CustomFields to the form
-        custom_fields = CustomField.objects.filter(content_types=self.obj_type)
+        custom_fields = CustomField.objects.get_for_model_cached(self.model)
         for cf in custom_fields:
             name = self._get_field_name(cf.name)
             # Annotate non-required custom fields as nullable
@@ -147,9 +147,11 @@ class CustomFieldFilterForm(forms.Form):
         super().__init__(*args, **kwargs)
 
         # Add all applicable CustomFields to the form
-        custom_fields = CustomField.objects.filter(content_types=self.obj_type).exclude(
-            filter_logic=CustomFieldFilterLogicChoices.FILTER_DISABLED
-        )
+        custom_fields = [
+            cf
+            for cf in CustomField.objects.get_for_model_cached(self.model)
+            if cf.filter_logic != CustomFieldFilterLogicChoices.FILTER_DISABLED
+        ]
         for cf in custom_fields:
             field_name = "cf_{}".format(cf.name)
             self.fields[field_name] = cf.to_form_field(set_initial=True, enforce_required=False)
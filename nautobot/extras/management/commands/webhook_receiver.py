@@ -8,6 +8,9 @@ request_counter = 1
 
 
 class WebhookHandler(BaseHTTPRequestHandler):
+    # Support persistent connections, as used by Nautobot's pooled webhook sessions
+    protocol_version = "HTTP/1.1"
+    response_code = 200
     show_headers = True
 
     def __getattr__(self, item):
@@ -33,10 +36,12 @@ class WebhookHandler(BaseHTTPRequestHandler):
     def do_ANY(self):
         global request_counter
 
-        # Send a 200 response regardless of the request content
-        self.send_response(200)
+        # Send the same response regardless of the request content
+        response_body = b"Webhook received!\n"
+        self.send_response(self.response_code)
+        self.send_header("Content-Length", str(len(response_body)))
         self.end_headers()
-        self.wfile.write(b"Webhook received!\n")
+        self.wfile.write(response_body)
 
         request_counter += 1
 
@@ -75,12 +80,20 @@ class Command(BaseCommand):
             dest="no_headers",
             help="Hide HTTP request headers",
         )
+        parser.add_argument(
+            "--response-code",
+            type=int,
+            default=WebhookHandler.response_code,
+            dest="response_code",
+            help="HTTP status code to return for every request (default: {})".format(WebhookHandler.response_code),
+        )
 
     def handle(self, *args, **options):
         port = options["port"]
         quit_command = "CTRL-BREAK" if sys.platform == "win32" else "CONTROL-C"
 
         WebhookHandler.show_headers = not options["no_headers"]
+        WebhookHandler.response_code = options["response_code"]
 
         self.stdout.write("Listening on port http://localhost:{}. Stop with {}.".format(port, quit_command))
         httpd = HTTPServer(("localhost", port), WebhookHandler)
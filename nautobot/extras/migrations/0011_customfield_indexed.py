@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("extras", "0010_change_cf_validation_max_min_field_to_bigint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customfield",
+            name="indexed",
+            field=models.BooleanField(
+                default=False,
+                help_text="If true, a database index is maintained for this field to speed up filtering by exact value "
+                "(PostgreSQL only). Indexed text and URL fields must use exact filter logic.",
+            ),
+        ),
+    ]
@@ -4,7 +4,8 @@ from collections import OrderedDict
 from datetime import datetime, date
 
 from django import forms
-from django.db import transaction
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import RegexValidator, ValidationError
@@ -116,13 +117,13 @@ class CustomFieldModel(models.Model):
         """
         Return a dictionary of custom fields for a single object in the form {<field>: value}.
         """
-        fields = CustomField.objects.get_for_model(self)
+        fields = CustomField.objects.get_for_model_cached(self)
         return OrderedDict([(field, self.cf.get(field.name)) for field in fields])
 
     def clean(self):
         super().clean()
 
-        custom_fields = {cf.name: cf for cf in CustomField.objects.get_for_model(self)}
+        custom_fields = {cf.name: cf for cf in CustomField.objects.get_for_model_cached(self)}
 
         # Validate all field values
         for field_name, value in self._custom_field_data.items():
@@ -173,6 +174,58 @@ class CustomFieldModel(models.Model):
         return computed_fields_dict
 
 
+CUSTOM_FIELD_CACHE_VERSION_KEY = "nautobot.extras.customfield.version"
+
+# Process-local copy of the cached CustomField definitions, as {content_type_pk: (cache_version, custom_fields)}
+_custom_field_definitions = {}
+
+
+def get_custom_field_cache_version():
+    """
+    Return the current version of the CustomField definitions cache.
+    """
+    version = cache.get(CUSTOM_FIELD_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(CUSTOM_FIELD_CACHE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CUSTOM_FIELD_CACHE_VERSION_KEY)
+    return version
+
+
+def invalidate_custom_field_cache():
+    """
+    Invalidate all cached CustomField definitions by incrementing the cache version.
+    """
+    try:
+        cache.incr(CUSTOM_FIELD_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.add(CUSTOM_FIELD_CACHE_VERSION_KEY, 1, timeout=None)
+    connection._custom_field_definitions = None
+
+
+def get_transaction_custom_field_definitions():
+    """
+    Return the CustomField definitions cached for the current transaction.
+
+    Definitions read within a transaction may yet be rolled back, so they are cached only until the transaction (or
+    the savepoint within which they were first read) is committed or rolled back. This is tracked by registering a
+    callback to be run on commit, which Django discards upon a rollback.
+    """
+    definitions = getattr(connection, "_custom_field_definitions", None)
+    if definitions is not None:
+        on_commit, custom_fields = definitions
+        if any(callback[1] is on_commit for callback in connection.run_on_commit):
+            return custom_fields
+
+    custom_fields = {}
+
+    def on_commit():
+        connection._custom_field_definitions = None
+
+    connection._custom_field_definitions = (on_commit, custom_fields)
+    transaction.on_commit(on_commit)
+    return custom_fields
+
+
 class CustomFieldManager(models.Manager.from_queryset(RestrictedQuerySet)):
     use_in_migrations = True
 
@@ -183,6 +236,37 @@ class CustomFieldManager(models.Manager.from_queryset(RestrictedQuerySet)):
         content_type = ContentType.objects.get_for_model(model._meta.concrete_model)
         return self.get_queryset().filter(content_types=content_type)
 
+    def get_for_model_cached(self, model):
+        """
+        Return a tuple of all CustomFields (with their choices prefetched) assigned to the given model.
+
+        Definitions are cached in Redis and in each process, and are invalidated whenever a CustomField, a
+        CustomFieldChoice, or the content types assigned to a CustomField change. Definitions read within a
+        transaction are only cached for the remainder of that transaction. The returned instances are shared and must
+        not be modified.
+        """
+        content_type = ContentType.objects.get_for_model(model._meta.concrete_model)
+        version = get_custom_field_cache_version()
+
+        # Uncommitted changes may yet be rolled back, so don't share anything read within a transaction
+        local_definitions = _custom_field_definitions
+        if connection.in_atomic_block:
+            local_definitions = get_transaction_custom_field_definitions()
+
+        local_version, custom_fields = local_definitions.get(content_type.pk, (None, None))
+        if local_version == version:
+            return custom_fields
+
+        cache_key = f"nautobot.extras.customfield.{version}.{content_type.pk}"
+        custom_fields = cache.get(cache_key)
+        if custom_fields is None:
+            custom_fields = tuple(self.get_queryset().filter(content_types=content_type).prefetch_related("choices"))
+            if not connection.in_atomic_block:
+                cache.set(cache_key, custom_fields, timeout=None)
+
+        local_definitions[content_type.pk] = (version, custom_fields)
+        return custom_fields
+
 
 class CustomField(BaseModel):
     content_types = models.ManyToManyField(
@@ -214,6 +298,11 @@ class CustomField(BaseModel):
         default=CustomFieldFilterLogicChoices.FILTER_LOOSE,
         help_text="Loose matches any instance of a given string; exact " "matches the entire field.",
     )
+    indexed = models.BooleanField(
+        default=False,
+        help_text="If true, a database index is maintained for this field to speed up filtering by exact value "
+        "(PostgreSQL only). Indexed text and URL fields must use exact filter logic.",
+    )
     default = models.JSONField(
         encoder=DjangoJSONEncoder,
         blank=True,
@@ -266,6 +355,16 @@ class CustomField(BaseModel):
             if self.type != database_object.type:
                 raise ValidationError({"type": "Type cannot be changed once created"})
 
+        # Indexes only support exact matching
+        if self.indexed:
+            if self.filter_logic == CustomFieldFilterLogicChoices.FILTER_DISABLED:
+                raise ValidationError({"indexed": "Filtering must be enabled for an indexed field."})
+            if (
+                self.type in (CustomFieldTypeChoices.TYPE_TEXT, CustomFieldTypeChoices.TYPE_URL)
+                and self.filter_logic == CustomFieldFilterLogicChoices.FILTER_LOOSE
+            ):
+                raise ValidationError({"indexed": "Indexed text and URL fields must use exact filter logic."})
+
         # Validate the field's default value (if any)
         if self.default is not None:
             try:
@@ -306,6 +405,12 @@ class CustomField(BaseModel):
                 {"default": f"The specified default value ({self.default}) is not listed as an available choice."}
             )
 
+    def get_choices(self):
+        """
+        Return the list of values of this field's choices, making use of prefetched choices if available.
+        """
+        return [choice.value for choice in self.choices.all()]
+
     def to_form_field(self, set_initial=True, enforce_required=True, for_csv_import=False):
         """
         Return a form field suitable for setting a CustomField's value for an object.
@@ -360,15 +465,16 @@ class CustomField(BaseModel):
 
         # Select or Multi-select
         else:
-            choices = [(cfc.value, cfc.value) for cfc in self.choices.all()]
-            default_choice = self.choices.filter(value=self.default).first()
+            choice_values = self.get_choices()
+            choices = [(value, value) for value in choice_values]
+            default_choice = self.default if self.default in choice_values else None
 
             if not required or default_choice is None:
                 choices = add_blank_choice(choices)
 
             # Set the initial value to the first available choice (if any)
             if set_initial and default_choice:
-                initial = default_choice.value
+                initial = default_choice
 
             if self.type == CustomFieldTypeChoices.TYPE_SELECT:
                 field_class = CSVChoiceField if for_csv_import else forms.ChoiceField
@@ -430,15 +536,15 @@ class CustomField(BaseModel):
 
             # Validate selected choice
             if self.type == CustomFieldTypeChoices.TYPE_SELECT:
-                if value not in self.choices.values_list("value", flat=True):
+                if value not in self.get_choices():
                     raise ValidationError(
-                        f"Invalid choice ({value}). Available choices are: {', '.join(self.choices.values_list('value', flat=True))}"
+                        f"Invalid choice ({value}). Available choices are: {', '.join(self.get_choices())}"
                     )
 
             if self.type == CustomFieldTypeChoices.TYPE_MULTISELECT:
-                if not set(value).issubset(self.choices.values_list("value", flat=True)):
+                if not set(value).issubset(self.get_choices()):
                     raise ValidationError(
-                        f"Invalid choice(s) ({value}). Available choices are: {', '.join(self.choices.values_list('value', flat=True))}"
+                        f"Invalid choice(s) ({value}). Available choices are: {', '.join(self.get_choices())}"
                     )
 
         elif self.required:
@@ -1,6 +1,7 @@
 import os
 import random
 import shutil
+import threading
 import uuid
 import logging
 from datetime import timedelta
@@ -9,19 +10,31 @@ from cacheops.signals import cache_invalidated, cache_read
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
-from django.db.models.signals import m2m_changed, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django_prometheus.models import model_deletes, model_inserts, model_updates
 from prometheus_client import Counter
 
-from nautobot.extras.tasks import delete_custom_field_data, provision_field
+from nautobot.extras.tasks import delete_custom_field_data, provision_field, sync_custom_field_indexes
 from .choices import JobResultStatusChoices, ObjectChangeActionChoices
-from .models import CustomField, GitRepository, JobResult, ObjectChange
+from .models import CustomField, CustomFieldChoice, GitRepository, JobResult, ObjectChange, Webhook
+from .models.customfields import invalidate_custom_field_cache
 from .webhooks import enqueue_webhooks
 
 logger = logging.getLogger("nautobot.extras.signals")
 
+# The request for which changes are currently being logged, if any (see `change_logging()`). This allows changes which
+# are made in bulk, and which therefore do not send the signals handled below, to be logged with `bulk_log_changes()`.
+_change_logging = threading.local()
+
+
+def get_change_logging_request():
+    """
+    Return the request for which changes are currently being logged in this thread, or None.
+    """
+    return getattr(_change_logging, "request", None)
+
 
 #
 # Change logging/webhooks
@@ -96,6 +109,61 @@ def _handle_deleted_object(request, sender, instance, **kwargs):
     model_deletes.labels(instance._meta.model_name).inc()
 
 
+def bulk_log_changes(request, instances, action, batch_size=1000):
+    """
+    Record ObjectChanges and enqueue webhooks for objects which were created, updated or deleted in bulk (for example
+    using `bulk_create()` or `QuerySet.update()`) and therefore did not send the signals which normally do so.
+
+    The ObjectChanges are written using `bulk_create()`. For deletions, this must be called before the objects are
+    deleted.
+
+    :param request: The current request, as passed to `change_logging()`
+    :param instances: Iterable of the (current) model instances which were changed
+    :param action: One of ObjectChangeActionChoices
+    """
+    instances = list(instances)
+    if not instances:
+        return
+
+    user = request.user if request.user.is_authenticated else None
+    objectchanges = []
+    for instance in instances:
+        if hasattr(instance, "to_objectchange"):
+            objectchange = instance.to_objectchange(action)
+            objectchange.user = user
+            objectchange.user_name = user.username if user is not None else "Undefined"
+            objectchange.request_id = request.id
+            if not objectchange.object_repr:
+                objectchange.object_repr = str(instance)
+            objectchanges.append(objectchange)
+    ObjectChange.objects.bulk_create(objectchanges, batch_size=batch_size)
+
+    # Enqueue webhooks, unless none apply to this type of object
+    action_flag = {
+        ObjectChangeActionChoices.ACTION_CREATE: "type_create",
+        ObjectChangeActionChoices.ACTION_UPDATE: "type_update",
+        ObjectChangeActionChoices.ACTION_DELETE: "type_delete",
+    }[action]
+    content_types = {instance._meta.model: ContentType.objects.get_for_model(instance) for instance in instances}
+    webhook_models = {
+        model
+        for model, content_type in content_types.items()
+        if Webhook.objects.filter(content_types=content_type, enabled=True, **{action_flag: True}).exists()
+    }
+    for instance in instances:
+        if instance._meta.model in webhook_models:
+            enqueue_webhooks(instance, request.user, request.id, action)
+
+    # Increment metric counters
+    counter = {
+        ObjectChangeActionChoices.ACTION_CREATE: model_inserts,
+        ObjectChangeActionChoices.ACTION_UPDATE: model_updates,
+        ObjectChangeActionChoices.ACTION_DELETE: model_deletes,
+    }[action]
+    for model in content_types:
+        counter.labels(model._meta.model_name).inc(sum(1 for instance in instances if instance._meta.model is model))
+
+
 #
 # Custom fields
 #
@@ -113,10 +181,67 @@ def handle_cf_removed_obj_types(instance, action, pk_set, **kwargs):
         # New content types have been added to the custom field, provision them
         transaction.on_commit(lambda: provision_field.delay(instance.pk, pk_set))
 
+    if action in ("post_add", "post_remove", "post_clear") and instance.indexed:
+        transaction.on_commit(lambda: sync_custom_field_indexes.delay(instance.name))
+
 
 m2m_changed.connect(handle_cf_removed_obj_types, sender=CustomField.content_types.through)
 
 
+@receiver(post_save, sender=CustomField)
+@receiver(post_delete, sender=CustomField)
+@receiver(post_save, sender=CustomFieldChoice)
+@receiver(post_delete, sender=CustomFieldChoice)
+@receiver(m2m_changed, sender=CustomField.content_types.through)
+def handle_cf_definition_changed(**kwargs):
+    """
+    Invalidate the cached CustomField definitions whenever a field, its choices, or its content types change.
+
+    The cache is invalidated immediately, so that this process sees its own changes, and again once the transaction
+    is committed, so that other processes cannot retain definitions read before the changes became visible to them.
+    """
+    invalidate_custom_field_cache()
+    transaction.on_commit(invalidate_custom_field_cache)
+
+
+@receiver(pre_save, sender=CustomField)
+def record_cf_index_state(instance, raw=False, **kwargs):
+    """
+    Remember the name and `indexed` flag of an existing CustomField, so that its indexes are only synchronized if
+    either is changed.
+    """
+    instance._prior_index_state = None
+    if not raw and instance.present_in_database:
+        instance._prior_index_state = CustomField.objects.filter(pk=instance.pk).values_list("name", "indexed").first()
+
+
+@receiver(post_save, sender=CustomField)
+def handle_cf_indexes(instance, created, raw=False, **kwargs):
+    """
+    Create or drop the database indexes backing a CustomField when it is created, renamed, or its `indexed` flag is
+    changed. The indexes of a renamed field are keyed on its old name, so they are dropped.
+    """
+    if raw:
+        return
+    prior_name, prior_indexed = getattr(instance, "_prior_index_state", None) or (instance.name, False)
+    if not instance.indexed and not prior_indexed:
+        return
+    if not created and (prior_name, prior_indexed) == (instance.name, instance.indexed):
+        return
+
+    old_name = prior_name if prior_name != instance.name else None
+    transaction.on_commit(lambda: sync_custom_field_indexes.delay(instance.name, old_field_name=old_name))
+
+
+@receiver(post_delete, sender=CustomField)
+def handle_cf_deleted_indexes(instance, **kwargs):
+    """
+    Drop the database indexes backing an indexed CustomField when it is deleted.
+    """
+    if instance.indexed:
+        transaction.on_commit(lambda: sync_custom_field_indexes.delay(instance.name))
+
+
 #
 # Caching
 #
@@ -1,21 +1,111 @@
+import hashlib
+import uuid
 from logging import getLogger
 
 import requests
+from cacheops import invalidate_model
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from django.db import connection, transaction
 from jinja2.exceptions import TemplateError
 
 from nautobot.core.celery import nautobot_task
-from nautobot.extras.choices import CustomFieldTypeChoices, ObjectChangeActionChoices
-from nautobot.extras.utils import generate_signature
+from nautobot.extras.choices import (
+    CustomFieldTypeChoices,
+    JobResultStatusChoices,
+    LogLevelChoices,
+    ObjectChangeActionChoices,
+)
+from nautobot.extras.utils import FeatureQuery, generate_signature
+from nautobot.extras.webhook_delivery import (
+    WebhookDeliveryDeferred,
+    WebhookDeliveryFailed,
+    get_retry_countdown,
+    send_webhook_request,
+)
+from nautobot.utilities.query_functions import JSONRemove, JSONSet
 
 
 logger = getLogger("nautobot.extras.tasks")
 
 
-@nautobot_task
-def update_custom_field_choice_data(field_id, old_value, new_value):
+# Number of objects whose custom field data is updated per database transaction
+CUSTOM_FIELD_DATA_BATCH_SIZE = 1000
+
+
+def _get_custom_field_job_result(task, field_name):
+    """
+    Return the JobResult used to report the progress of a custom field data task, creating it if needed.
+
+    The JobResult is keyed on the task ID, so a task which is redelivered after a worker restart reports its progress
+    against the same JobResult.
+    """
+    from nautobot.extras.models import CustomField, JobResult
+
+    job_result, _ = JobResult.objects.get_or_create(
+        job_id=task.request.id or uuid.uuid4(),
+        defaults={
+            "name": field_name,
+            "obj_type": ContentType.objects.get_for_model(CustomField),
+        },
+    )
+    job_result.set_status(JobResultStatusChoices.STATUS_RUNNING)
+    job_result.save()
+    return job_result
+
+
+def _update_custom_field_data_in_batches(job_result, queryset, update):
+    """
+    Apply `update` to successive batches of objects matching `queryset` until no matching objects remain.
+
+    `update` receives a queryset of up to CUSTOM_FIELD_DATA_BATCH_SIZE objects and returns the number of objects it
+    updated. Each batch is updated in its own transaction. Because an object no longer matches `queryset` once it
+    has been updated, the process can safely be interrupted and re-run, picking up where it left off.
+    """
+    model = queryset.model
+    label = model._meta.label_lower
+    total = queryset.count()
+    processed = 0
+    job_result.log(f"Updating custom field data of {total} {model._meta.verbose_name_plural}", grouping=label)
+
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.nocache().order_by("pk").values_list("pk", flat=True)[:CUSTOM_FIELD_DATA_BATCH_SIZE])
+            if not pks:
+                break
+            processed += update(model.objects.nocache().filter(pk__in=pks))
+
+        job_result.data["output"] = f"{label}: {processed} of {total} objects updated"
+        job_result.save()
+
+    # The updates above bypassed the per-object cache invalidation performed by Model.save()
+    invalidate_model(model)
+
+    job_result.log(
+        f"Updated custom field data of {processed} {model._meta.verbose_name_plural}",
+        level_choice=LogLevelChoices.LOG_SUCCESS,
+        grouping=label,
+    )
+    return processed
+
+
+def _run_custom_field_data_task(job_result, func):
+    """
+    Run `func(job_result)`, recording its outcome on the given JobResult.
+    """
+    try:
+        func(job_result)
+    except Exception as e:
+        job_result.log(f"Error updating custom field data: {e}", level_choice=LogLevelChoices.LOG_FAILURE)
+        job_result.set_status(JobResultStatusChoices.STATUS_ERRORED)
+        job_result.save()
+        raise
+    job_result.set_status(JobResultStatusChoices.STATUS_COMPLETED)
+    job_result.save()
+
+
+@nautobot_task(bind=True, acks_late=True)
+def update_custom_field_choice_data(self, field_id, old_value, new_value):
     """
     Update the values for a custom field choice used in objects' _custom_field_data for the given field.
 
@@ -33,30 +123,40 @@ def update_custom_field_choice_data(field_id, old_value, new_value):
         return False
 
     if field.type == CustomFieldTypeChoices.TYPE_SELECT:
-        # Loop through all field content types and search for values to update
-        for ct in field.content_types.all():
-            model = ct.model_class()
-            for obj in model.objects.filter(**{f"_custom_field_data__{field.name}": old_value}):
-                obj._custom_field_data[field.name] = new_value
-                obj.save()
+
+        def replace_choice(queryset):
+            return queryset.update(_custom_field_data=JSONSet("_custom_field_data", field.name, new_value))
+
+        lookup = f"_custom_field_data__{field.name}"
 
     elif field.type == CustomFieldTypeChoices.TYPE_MULTISELECT:
-        # Loop through all field content types and search for values to update
-        for ct in field.content_types.all():
-            model = ct.model_class()
-            for obj in model.objects.filter(**{f"_custom_field_data__{field.name}__contains": old_value}):
+
+        def replace_choice(queryset):
+            objects = list(queryset.only("pk", "_custom_field_data"))
+            for obj in objects:
                 old_list = obj._custom_field_data[field.name]
-                new_list = [new_value if e == old_value else e for e in old_list]
-                obj._custom_field_data[field.name] = new_list
-                obj.save()
+                obj._custom_field_data[field.name] = [new_value if e == old_value else e for e in old_list]
+            queryset.model.objects.bulk_update(objects, ["_custom_field_data"])
+            return len(objects)
+
+        lookup = f"_custom_field_data__{field.name}__contains"
 
     else:
         logger.error(f"Unknown field type, failing to act on choice data for this field {field.name}.")
         return False
 
+    def update_all(job_result):
+        # Loop through all field content types and search for values to update
+        for ct in field.content_types.all():
+            model = ct.model_class()
+            queryset = model.objects.filter(**{lookup: old_value})
+            _update_custom_field_data_in_batches(job_result, queryset, replace_choice)
 
-@nautobot_task
-def delete_custom_field_data(field_name, content_type_pk_set):
+    _run_custom_field_data_task(_get_custom_field_job_result(self, field.name), update_all)
+
+
+@nautobot_task(bind=True, acks_late=True)
+def delete_custom_field_data(self, field_name, content_type_pk_set):
     """
     Delete the values for a custom field
 
@@ -64,16 +164,21 @@ def delete_custom_field_data(field_name, content_type_pk_set):
         field_name (str): The name of the custom field which is being deleted
         content_type_pk_set (list): List of PKs for content types to act upon
     """
-    with transaction.atomic():
+
+    def remove_key(queryset):
+        return queryset.update(_custom_field_data=JSONRemove("_custom_field_data", field_name))
+
+    def delete_all(job_result):
         for ct in ContentType.objects.filter(pk__in=content_type_pk_set):
             model = ct.model_class()
-            for obj in model.objects.filter(**{f"_custom_field_data__{field_name}__isnull": False}):
-                del obj._custom_field_data[field_name]
-                obj.save()
+            queryset = model.objects.filter(_custom_field_data__has_key=field_name)
+            _update_custom_field_data_in_batches(job_result, queryset, remove_key)
 
+    _run_custom_field_data_task(_get_custom_field_job_result(self, field_name), delete_all)
 
-@nautobot_task
-def provision_field(field_id, content_type_pk_set):
+
+@nautobot_task(bind=True, acks_late=True)
+def provision_field(self, field_id, content_type_pk_set):
     """
     Provision a new custom field on all relevant content type object instances.
 
@@ -89,18 +194,112 @@ def provision_field(field_id, content_type_pk_set):
         logger.error(f"Custom field with ID {field_id} not found, failing to provision.")
         return False
 
-    with transaction.atomic():
+    def set_default(queryset):
+        return queryset.update(_custom_field_data=JSONSet("_custom_field_data", field.name, field.default))
+
+    def provision_all(job_result):
         for ct in ContentType.objects.filter(pk__in=content_type_pk_set):
             model = ct.model_class()
-            for obj in model.objects.all():
-                obj._custom_field_data[field.name] = field.default
-                obj.save()
+            queryset = model.objects.exclude(_custom_field_data__has_key=field.name)
+            _update_custom_field_data_in_batches(job_result, queryset, set_default)
+
+    _run_custom_field_data_task(_get_custom_field_job_result(self, field.name), provision_all)
+
+
+def get_custom_field_index_name(model, field_name):
+    """
+    Return the name of the database index maintained on the given model's table for an indexed custom field.
+    """
+    table = model._meta.db_table
+    digest = hashlib.sha256(f"{table}.{field_name}".encode("utf8")).hexdigest()[:16]
+    return f"{table[:30]}_cf_{digest}"
+
+
+def _get_index_validity(cursor, index_name):
+    """
+    Return None if the named index does not exist, otherwise whether it is valid (i.e. completely built).
+    """
+    cursor.execute(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s",
+        [index_name],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
 
 
 @nautobot_task
-def process_webhook(webhook_pk, data, model_name, event, timestamp, username, request_id):
+def sync_custom_field_indexes(field_name, old_field_name=None):
+    """
+    Create or drop the database indexes for the named custom field to match its `indexed` flag and content types.
+    If the field has been renamed, the indexes for its old name are dropped.
+
+    Each index is an expression index on the field's key within `_custom_field_data`, so that Django's key lookups
+    use it directly: a GIN index (supporting `@>` containment) for multi-select fields, and a B-tree index
+    (supporting equality) for all other types. Indexes are created and dropped concurrently so as not to block writes
+    to the affected tables. This is a no-op on databases other than PostgreSQL.
+
+    Args:
+        field_name (str): The name of the custom field whose indexes should be synchronized
+        old_field_name (str): The previous name of the custom field, if it has been renamed
+    """
+    from nautobot.extras.models import CustomField
+
+    if connection.vendor != "postgresql":
+        return
+
+    field = CustomField.objects.filter(name=field_name).first()
+    if field is not None and field.indexed:
+        indexed_content_types = set(field.content_types.values_list("pk", flat=True))
+        method = "GIN" if field.type == CustomFieldTypeChoices.TYPE_MULTISELECT else "BTREE"
+    else:
+        indexed_content_types = set()
+
+    # CONCURRENTLY cannot be used inside a transaction block
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY"
+    quote_name = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        for ct in ContentType.objects.filter(FeatureQuery("custom_fields").get_query()):
+            model = ct.model_class()
+            if model is None:
+                continue
+
+            if old_field_name:
+                old_index_name = get_custom_field_index_name(model, old_field_name)
+                if _get_index_validity(cursor, old_index_name) is not None:
+                    logger.info("Dropping index %s for renamed custom field %s", old_index_name, old_field_name)
+                    cursor.execute(f"DROP INDEX {concurrently} IF EXISTS {quote_name(old_index_name)}")
+
+            index_name = get_custom_field_index_name(model, field_name)
+            valid = _get_index_validity(cursor, index_name)
+
+            # An invalid index is left behind by an interrupted concurrent build and must be rebuilt
+            if valid is not None and (ct.pk not in indexed_content_types or not valid):
+                logger.info("Dropping index %s for custom field %s", index_name, field_name)
+                cursor.execute(f"DROP INDEX {concurrently} IF EXISTS {quote_name(index_name)}")
+                valid = None
+
+            if valid is None and ct.pk in indexed_content_types:
+                logger.info("Creating index %s for custom field %s", index_name, field_name)
+                cursor.execute(
+                    f"CREATE INDEX {concurrently} IF NOT EXISTS {quote_name(index_name)} "
+                    f"ON {quote_name(model._meta.db_table)} USING {method} "
+                    f"(({quote_name('_custom_field_data')} -> %s))",
+                    [field_name],
+                )
+
+
+@nautobot_task(bind=True, max_retries=settings.WEBHOOK_MAX_RETRIES)
+def process_webhook(self, webhook_pk, data, model_name, event, timestamp, username, request_id, deferrals=0):
     """
     Make a POST request to the defined Webhook
+
+    Requests are sent over a pooled per-receiver session. Connection errors, timeouts and retryable response statuses
+    (such as 429 or 503) cause the task to be retried with exponential backoff, up to WEBHOOK_MAX_RETRIES times.
+
+    Deliveries deferred because the webhook's concurrency limit has been reached or its circuit breaker is open are
+    retried once the delivery can be attempted. These deferrals (counted by `deferrals`) don't count against the retry
+    limit.
     """
     from nautobot.extras.models import Webhook  # avoiding circular import
 
@@ -152,19 +351,27 @@ def process_webhook(webhook_pk, data, model_name, event, timestamp, username, re
         prepared_request.headers["X-Hook-Signature"] = generate_signature(prepared_request.body, webhook.secret)
 
     # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
-        response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
-
-    if response.ok:
-        logger.info("Request succeeded; response status %s", response.status_code)
-        return "Status {} returned, webhook successfully processed.".format(response.status_code)
-    else:
-        logger.warning("Request failed; response status %s: %s", response.status_code, response.content)
-        raise requests.exceptions.RequestException(
-            "Status {} returned with content '{}', webhook FAILED to process.".format(
-                response.status_code, response.content
-            )
+    failed_attempts = self.request.retries - deferrals
+    max_retries = settings.WEBHOOK_MAX_RETRIES + deferrals
+    try:
+        response = send_webhook_request(webhook, prepared_request)
+    except WebhookDeliveryDeferred as e:
+        logger.info("%s; retrying in %d seconds", e, e.retry_after)
+        # Celery applies the task's own max_retries if None is given, so the limit must be raised explicitly
+        raise self.retry(
+            exc=e,
+            countdown=e.retry_after,
+            max_retries=self.request.retries + 1,
+            kwargs={**(self.request.kwargs or {}), "deferrals": deferrals + 1},
         )
+    except WebhookDeliveryFailed as e:
+        logger.warning("Request failed; response status %s", e.status_code)
+        if e.retryable:
+            raise self.retry(exc=e, countdown=get_retry_countdown(failed_attempts), max_retries=max_retries)
+        raise
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        logger.warning("Error sending request to %s: %s", webhook.payload_url, e)
+        raise self.retry(exc=e, countdown=get_retry_countdown(failed_attempts), max_retries=max_retries)
+
+    logger.info("Request succeeded; response status %s", response.status_code)
+    return "Status {} returned, webhook successfully processed.".format(response.status_code)
@@ -1,5 +1,8 @@
+from unittest import mock, skipUnless
+
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.db.models import ProtectedError
 from django.urls import reverse
 from rest_framework import status
@@ -8,7 +11,15 @@ from nautobot.dcim.filters import SiteFilterSet
 from nautobot.dcim.forms import SiteCSVForm
 from nautobot.dcim.models import Site, Rack, Device
 from nautobot.extras.choices import *
-from nautobot.extras.models import ComputedField, CustomField, CustomFieldChoice, Status
+from nautobot.extras.models import ComputedField, CustomField, CustomFieldChoice, JobResult, Status
+from nautobot.extras.models.customfields import invalidate_custom_field_cache
+from nautobot.extras.tasks import (
+    delete_custom_field_data,
+    get_custom_field_index_name,
+    provision_field,
+    sync_custom_field_indexes,
+    update_custom_field_choice_data,
+)
 from nautobot.utilities.testing import APITestCase, CeleryTestCase, TestCase
 from nautobot.virtualization.models import VirtualMachine
 
@@ -166,6 +177,46 @@ class CustomFieldManagerTest(TestCase):
         self.assertEqual(CustomField.objects.get_for_model(Site).count(), 1)
         self.assertEqual(CustomField.objects.get_for_model(VirtualMachine).count(), 0)
 
+    # Outside of a transaction, definitions are cached for use by other requests and processes
+    @mock.patch.object(connection, "in_atomic_block", False)
+    def test_get_for_model_cached(self):
+        self.addCleanup(invalidate_custom_field_cache)
+
+        self.assertEqual([cf.name for cf in CustomField.objects.get_for_model_cached(Site)], ["text_field"])
+        with self.assertNumQueries(0):
+            custom_fields = CustomField.objects.get_for_model_cached(Site)
+            self.assertEqual(custom_fields[0].get_choices(), [])
+        self.assertEqual(CustomField.objects.get_for_model_cached(VirtualMachine), ())
+
+        # Adding a new field or choice invalidates the cache
+        custom_field = CustomField.objects.create(type=CustomFieldTypeChoices.TYPE_SELECT, name="select_field")
+        CustomFieldChoice.objects.create(field=custom_field, value="Foo")
+        custom_field.content_types.set([ContentType.objects.get_for_model(Site)])
+        custom_fields = CustomField.objects.get_for_model_cached(Site)
+        self.assertEqual([cf.name for cf in custom_fields], ["select_field", "text_field"])
+        self.assertEqual(custom_fields[0].get_choices(), ["Foo"])
+
+        CustomFieldChoice.objects.create(field=custom_field, value="Bar")
+        self.assertEqual(CustomField.objects.get_for_model_cached(Site)[0].get_choices(), ["Bar", "Foo"])
+
+    def test_get_for_model_cached_in_transaction(self):
+        self.addCleanup(invalidate_custom_field_cache)
+
+        # Within a transaction (as in every TestCase), definitions are cached for the rest of the transaction
+        self.assertEqual([cf.name for cf in CustomField.objects.get_for_model_cached(Site)], ["text_field"])
+        with self.assertNumQueries(0):
+            CustomField.objects.get_for_model_cached(Site)
+
+        # Definitions read within a savepoint are discarded if it is rolled back
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                custom_field = CustomField.objects.create(type=CustomFieldTypeChoices.TYPE_TEXT, name="other_field")
+                custom_field.content_types.set([ContentType.objects.get_for_model(Site)])
+                custom_fields = CustomField.objects.get_for_model_cached(Site)
+                self.assertEqual([cf.name for cf in custom_fields], ["other_field", "text_field"])
+                raise RuntimeError("Roll back the savepoint")
+        self.assertEqual([cf.name for cf in CustomField.objects.get_for_model_cached(Site)], ["text_field"])
+
 
 class CustomFieldAPITest(APITestCase):
     @classmethod
@@ -1143,3 +1194,157 @@ class CustomFieldBackgroundTasks(CeleryTestCase):
         site.refresh_from_db()
 
         self.assertEqual(site.cf["cf1"], "Bar")
+
+
+@mock.patch("nautobot.extras.tasks.CUSTOM_FIELD_DATA_BATCH_SIZE", 2)
+class CustomFieldDataTaskTest(TestCase):
+    """
+    Call the custom field data tasks directly to exercise their batched updates.
+    """
+
+    def setUp(self):
+        self.site_ct = ContentType.objects.get_for_model(Site)
+        for i in range(1, 6):
+            Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+
+    def test_provision_field(self):
+        cf = CustomField.objects.create(name="cf1", type=CustomFieldTypeChoices.TYPE_TEXT, default="Foo")
+        # A previously interrupted run may have already provisioned some objects
+        Site.objects.filter(slug="site-1").update(_custom_field_data={"cf1": "Bar"})
+
+        provision_field(cf.pk, [self.site_ct.pk])
+
+        self.assertEqual(Site.objects.get(slug="site-1").cf["cf1"], "Bar")
+        for site in Site.objects.exclude(slug="site-1"):
+            self.assertEqual(site.cf["cf1"], "Foo")
+
+        job_result = JobResult.objects.get(name="cf1")
+        self.assertEqual(job_result.status, JobResultStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job_result.data["output"], "dcim.site: 4 of 4 objects updated")
+
+    def test_provision_field_null_default(self):
+        cf = CustomField.objects.create(name="cf1", type=CustomFieldTypeChoices.TYPE_TEXT)
+
+        provision_field(cf.pk, [self.site_ct.pk])
+
+        for site in Site.objects.all():
+            self.assertIn("cf1", site.cf)
+            self.assertIsNone(site.cf["cf1"])
+
+    def test_delete_custom_field_data(self):
+        Site.objects.update(_custom_field_data={"cf1": "Foo", "cf2": "Bar"})
+
+        delete_custom_field_data("cf1", [self.site_ct.pk])
+
+        for site in Site.objects.all():
+            self.assertEqual(site.cf, {"cf2": "Bar"})
+
+    def test_update_select_choice_data(self):
+        cf = CustomField.objects.create(name="cf1", type=CustomFieldTypeChoices.TYPE_SELECT)
+        cf.content_types.set([self.site_ct])
+        Site.objects.update(_custom_field_data={"cf1": "Foo"})
+        Site.objects.filter(slug="site-1").update(_custom_field_data={"cf1": "Baz"})
+
+        update_custom_field_choice_data(cf.pk, "Foo", "Bar")
+
+        self.assertEqual(Site.objects.get(slug="site-1").cf["cf1"], "Baz")
+        self.assertEqual(Site.objects.filter(_custom_field_data__cf1="Bar").count(), 4)
+
+    def test_update_multi_select_choice_data(self):
+        cf = CustomField.objects.create(name="cf1", type=CustomFieldTypeChoices.TYPE_MULTISELECT)
+        cf.content_types.set([self.site_ct])
+        Site.objects.update(_custom_field_data={"cf1": ["Foo", "Baz"]})
+
+        update_custom_field_choice_data(cf.pk, "Foo", "Bar")
+
+        for site in Site.objects.all():
+            self.assertEqual(site.cf["cf1"], ["Bar", "Baz"])
+
+
+class CustomFieldIndexTest(TestCase):
+    def setUp(self):
+        self.site_ct = ContentType.objects.get_for_model(Site)
+
+    def index_exists(self, model, field_name):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_indexes WHERE indexname = %s", [get_custom_field_index_name(model, field_name)]
+            )
+            return cursor.fetchone() is not None
+
+    def test_indexed_field_requires_exact_filter_logic(self):
+        cf = CustomField(name="cf1", type=CustomFieldTypeChoices.TYPE_TEXT, indexed=True)
+        with self.assertRaises(ValidationError):
+            cf.full_clean()
+
+        cf.filter_logic = CustomFieldFilterLogicChoices.FILTER_DISABLED
+        with self.assertRaises(ValidationError):
+            cf.full_clean()
+
+        cf.filter_logic = CustomFieldFilterLogicChoices.FILTER_EXACT
+        cf.full_clean()
+
+    def test_index_name_length(self):
+        name = get_custom_field_index_name(Site, "a" * 50)
+        self.assertLessEqual(len(name), 63)
+        self.assertNotEqual(name, get_custom_field_index_name(Site, "b" * 50))
+
+    @skipUnless(connection.vendor == "postgresql", "Custom field indexes are only supported on PostgreSQL")
+    def test_sync_custom_field_indexes(self):
+        cf = CustomField.objects.create(
+            name="cf1",
+            type=CustomFieldTypeChoices.TYPE_TEXT,
+            filter_logic=CustomFieldFilterLogicChoices.FILTER_EXACT,
+            indexed=True,
+        )
+        cf.content_types.set([self.site_ct])
+
+        sync_custom_field_indexes("cf1")
+        self.assertTrue(self.index_exists(Site, "cf1"))
+        self.assertFalse(self.index_exists(Rack, "cf1"))
+
+        Site.objects.create(name="Site 1", slug="site-1", _custom_field_data={"cf1": "foo"})
+        self.assertEqual(SiteFilterSet({"cf_cf1": "foo"}, Site.objects.all()).qs.count(), 1)
+
+        cf.indexed = False
+        cf.save()
+        sync_custom_field_indexes("cf1")
+        self.assertFalse(self.index_exists(Site, "cf1"))
+
+    @skipUnless(connection.vendor == "postgresql", "Custom field indexes are only supported on PostgreSQL")
+    def test_sync_renamed_custom_field_indexes(self):
+        cf = CustomField.objects.create(
+            name="cf1",
+            type=CustomFieldTypeChoices.TYPE_TEXT,
+            filter_logic=CustomFieldFilterLogicChoices.FILTER_EXACT,
+            indexed=True,
+        )
+        cf.content_types.set([self.site_ct])
+        sync_custom_field_indexes("cf1")
+
+        cf.name = "cf2"
+        cf.save()
+        sync_custom_field_indexes("cf2", old_field_name="cf1")
+        self.assertFalse(self.index_exists(Site, "cf1"))
+        self.assertTrue(self.index_exists(Site, "cf2"))
+
+    @mock.patch("nautobot.extras.signals.transaction.on_commit", side_effect=lambda func: func())
+    @mock.patch("nautobot.extras.signals.sync_custom_field_indexes")
+    def test_index_sync_queued_only_on_change(self, sync, on_commit):
+        cf = CustomField.objects.create(name="cf1", type=CustomFieldTypeChoices.TYPE_TEXT)
+        cf.description = "Not indexed"
+        cf.save()
+        sync.delay.assert_not_called()
+
+        cf.indexed = True
+        cf.save()
+        sync.delay.assert_called_once_with("cf1", old_field_name=None)
+
+        sync.reset_mock()
+        cf.description = "Still indexed"
+        cf.save()
+        sync.delay.assert_not_called()
+
+        cf.name = "cf2"
+        cf.save()
+        sync.delay.assert_called_once_with("cf2", old_field_name="cf1")
@@ -1,17 +1,32 @@
+import contextlib
+import io
 import json
+import threading
 import uuid
+from http.server import HTTPServer
 from unittest.mock import patch
 
+from celery.exceptions import Retry
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 from requests import Session
 
 from nautobot.dcim.api.serializers import SiteSerializer
 from nautobot.dcim.models import Site
 from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.management.commands.webhook_receiver import WebhookHandler
 from nautobot.extras.models import Webhook
 from nautobot.extras.tasks import process_webhook
 from nautobot.extras.utils import generate_signature
+from nautobot.extras.webhook_delivery import (
+    WebhookDeliveryDeferred,
+    WebhookDeliveryFailed,
+    close_sessions,
+    get_session,
+)
 from nautobot.utilities.testing import APITestCase
 
 
@@ -89,3 +104,121 @@ class WebhookTest(APITestCase):
                 self.user.username,
                 request_id,
             )
+
+
+class CountingWebhookHandler(WebhookHandler):
+    """WebhookHandler which counts the number of connections it has accepted."""
+
+    show_headers = False
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+
+class WebhookDeliveryTest(APITestCase):
+    """
+    Send webhooks to a local instance of the `webhook_receiver` management command's request handler.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        CountingWebhookHandler.connections = 0
+        CountingWebhookHandler.response_code = 200
+        self.httpd = HTTPServer(("localhost", 0), CountingWebhookHandler)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.stdout = contextlib.redirect_stdout(io.StringIO())
+        self.stdout.__enter__()
+
+        self.webhook = Webhook.objects.create(
+            name="Local Receiver",
+            type_create=True,
+            payload_url=f"http://localhost:{self.httpd.server_port}/",
+        )
+        self.webhook.content_types.set([ContentType.objects.get_for_model(Site)])
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.stdout.__exit__(None, None, None)
+        close_sessions()
+        cache.delete_many(
+            [
+                f"nautobot.extras.webhook.{self.webhook.pk}.concurrency",
+                f"nautobot.extras.webhook.{self.webhook.pk}.failures",
+                f"nautobot.extras.webhook.{self.webhook.pk}.circuit_open",
+            ]
+        )
+        super().tearDown()
+
+    def get_task_args(self):
+        return [
+            self.webhook.pk,
+            {"name": "Site 1"},
+            Site._meta.model_name,
+            ObjectChangeActionChoices.ACTION_CREATE,
+            str(timezone.now()),
+            self.user.username,
+            uuid.uuid4(),
+        ]
+
+    def send(self):
+        return process_webhook(*self.get_task_args())
+
+    def test_connection_reuse(self):
+        for _ in range(3):
+            self.assertEqual(self.send(), "Status 200 returned, webhook successfully processed.")
+        self.assertIs(get_session(self.webhook), get_session(self.webhook))
+        self.assertEqual(CountingWebhookHandler.connections, 1)
+
+    def test_failed_delivery(self):
+        CountingWebhookHandler.response_code = 404
+        with self.assertRaises(WebhookDeliveryFailed) as cm:
+            self.send()
+        self.assertEqual(cm.exception.status_code, 404)
+        self.assertFalse(cm.exception.retryable)
+
+    @override_settings(WEBHOOK_CIRCUIT_BREAKER_THRESHOLD=2, WEBHOOK_CIRCUIT_BREAKER_TIMEOUT=60)
+    def test_circuit_breaker(self):
+        CountingWebhookHandler.response_code = 503
+        for _ in range(2):
+            with self.assertRaises(WebhookDeliveryFailed):
+                self.send()
+
+        # The circuit is now open, so the receiver is not contacted again
+        CountingWebhookHandler.response_code = 200
+        with self.assertRaises(WebhookDeliveryDeferred) as cm:
+            self.send()
+        self.assertGreater(cm.exception.retry_after, 50)
+
+        # The delivery is retried once the circuit closes, even when it has already been deferred more times than the
+        # retry limit allows
+        deferrals = settings.WEBHOOK_MAX_RETRIES + 2
+        args = self.get_task_args()
+        with patch.object(process_webhook, "apply_async") as apply_async:
+            process_webhook.push_request(
+                args=args, kwargs={"deferrals": deferrals}, retries=deferrals, called_directly=False, is_eager=False
+            )
+            try:
+                with self.assertRaises(Retry):
+                    process_webhook.run(*args, deferrals=deferrals)
+            finally:
+                process_webhook.pop_request()
+        apply_async.assert_called_once()
+        self.assertGreater(apply_async.call_args[1]["countdown"], 50)
+        self.assertEqual(apply_async.call_args[0][1]["deferrals"], deferrals + 1)
+
+        # Once the circuit closes, deliveries resume
+        cache.delete(f"nautobot.extras.webhook.{self.webhook.pk}.circuit_open")
+        self.assertEqual(self.send(), "Status 200 returned, webhook successfully processed.")
+
+    @override_settings(WEBHOOK_MAX_CONCURRENCY=1)
+    def test_concurrency_limit(self):
+        cache.set(f"nautobot.extras.webhook.{self.webhook.pk}.concurrency", 1)
+        with self.assertRaises(WebhookDeliveryDeferred) as cm:
+            self.send()
+        self.assertEqual(CountingWebhookHandler.connections, 0)
+        self.assertGreater(cm.exception.retry_after, 0)
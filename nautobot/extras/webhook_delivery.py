@@ -0,0 +1,251 @@
+"""
+Connection pooling, concurrency limiting and circuit breaking for outgoing webhook requests.
+
+Each worker process keeps one `requests.Session` per (payload URL, SSL verification) pair so that TCP connections and
+TLS sessions to a webhook receiver are reused across deliveries. Concurrency limits and circuit breaker state are shared
+between all workers through the Redis-backed Django cache.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from logging import getLogger
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter, Histogram
+from requests.adapters import HTTPAdapter
+
+
+logger = getLogger("nautobot.extras.webhook_delivery")
+
+# Response status codes which indicate a transient receiver-side problem and therefore warrant a retry.
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+webhook_delivery_duration = Histogram(
+    "nautobot_webhook_delivery_duration_seconds",
+    "Time spent sending a webhook request and receiving its response",
+    ["webhook"],
+)
+webhook_delivery_total = Counter(
+    "nautobot_webhook_delivery_total",
+    "Number of webhook delivery attempts, by outcome",
+    ["webhook", "outcome"],
+)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class WebhookDeliveryDeferred(Exception):
+    """
+    Raised when a webhook request cannot be attempted right now (concurrency limit reached or circuit open) and
+    should be retried after `retry_after` seconds.
+    """
+
+    def __init__(self, *args, retry_after=None, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(*args, **kwargs)
+
+
+class WebhookDeliveryFailed(requests.exceptions.RequestException):
+    """
+    Raised when a webhook request was sent but the receiver did not return a successful response.
+    """
+
+    def __init__(self, *args, status_code=None, **kwargs):
+        self.status_code = status_code
+        super().__init__(*args, **kwargs)
+
+    @property
+    def retryable(self):
+        return self.status_code in RETRYABLE_STATUS_CODES
+
+
+def _get_verify(webhook):
+    """
+    Return the value to use for `Session.verify` for the given webhook.
+    """
+    if webhook.ssl_verification and webhook.ca_file_path:
+        return webhook.ca_file_path
+    return webhook.ssl_verification
+
+
+def get_session(webhook):
+    """
+    Return the pooled `requests.Session` to be used for sending requests for the given webhook.
+
+    Sessions are keyed on the payload URL and SSL verification settings, so that webhooks which differ in either never
+    share a connection pool.
+    """
+    verify = _get_verify(webhook)
+    key = (webhook.payload_url, verify)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.verify = verify
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(settings.WEBHOOK_MAX_CONCURRENCY, 1))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """
+    Close and discard all pooled sessions held by this process.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _concurrency_key(webhook):
+    return f"nautobot.extras.webhook.{webhook.pk}.concurrency"
+
+
+def _failures_key(webhook):
+    return f"nautobot.extras.webhook.{webhook.pk}.failures"
+
+
+def _circuit_key(webhook):
+    return f"nautobot.extras.webhook.{webhook.pk}.circuit_open"
+
+
+@contextmanager
+def concurrency_slot(webhook):
+    """
+    Context manager which holds one of the webhook's `WEBHOOK_MAX_CONCURRENCY` delivery slots for its duration.
+
+    Raises WebhookDeliveryDeferred if all slots are currently in use by other workers.
+    """
+    limit = settings.WEBHOOK_MAX_CONCURRENCY
+    if not limit:
+        yield
+        return
+
+    key = _concurrency_key(webhook)
+    # The counter expires on its own in case a worker is killed before releasing its slot. Its expiry is pushed back
+    # whenever a slot is taken, so that it cannot expire (and be reset) while other slots are still held.
+    timeout = settings.WEBHOOK_TIMEOUT * 2 or None
+    cache.add(key, 0, timeout=timeout)
+    count = cache.incr(key)
+    cache.touch(key, timeout=timeout)
+    if count > limit:
+        cache.decr(key)
+        # Retry after a randomized delay, so that the deferred deliveries don't all retry at once
+        raise WebhookDeliveryDeferred(
+            f"Concurrency limit of {limit} reached for webhook {webhook}",
+            retry_after=max(settings.WEBHOOK_RETRY_BACKOFF, 1) * (1 + random.random()),
+        )
+    try:
+        yield
+    finally:
+        try:
+            cache.decr(key)
+        except ValueError:
+            # The key has already expired
+            pass
+
+
+def check_circuit(webhook):
+    """
+    Raise WebhookDeliveryDeferred if the circuit breaker for the given webhook is currently open.
+    """
+    if settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD:
+        # The time at which the circuit closes
+        closes_at = cache.get(_circuit_key(webhook))
+        if closes_at:
+            raise WebhookDeliveryDeferred(
+                f"Circuit breaker is open for webhook {webhook}",
+                retry_after=max(closes_at - time.time(), 0) + 1,
+            )
+
+
+def record_success(webhook):
+    """
+    Reset the consecutive failure count (closing the circuit breaker) for the given webhook.
+    """
+    cache.delete(_failures_key(webhook))
+
+
+def record_failure(webhook):
+    """
+    Count a failed delivery for the given webhook, opening its circuit breaker once the threshold has been reached.
+    """
+    threshold = settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD
+    if not threshold:
+        return
+    key = _failures_key(webhook)
+    cache.add(key, 0, timeout=settings.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT * 10)
+    failures = cache.incr(key)
+    if failures >= threshold:
+        logger.warning(
+            "Webhook %s has failed %d consecutive times; suspending deliveries for %d seconds",
+            webhook,
+            failures,
+            settings.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT,
+        )
+        cache.set(
+            _circuit_key(webhook),
+            time.time() + settings.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT,
+            timeout=settings.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT,
+        )
+        cache.delete(key)
+
+
+def get_retry_countdown(retries):
+    """
+    Return the number of seconds to wait before the next attempt, doubling with each retry.
+    """
+    return settings.WEBHOOK_RETRY_BACKOFF * (2 ** retries)
+
+
+def send_webhook_request(webhook, prepared_request):
+    """
+    Send the prepared request for the given webhook using a pooled session, enforcing concurrency limits and the
+    circuit breaker, and recording the delivery latency and outcome.
+
+    Returns the response on success. Raises WebhookDeliveryDeferred if the request could not be attempted,
+    WebhookDeliveryFailed if the receiver returned an unsuccessful status, or any `requests` exception raised while
+    sending.
+    """
+    check_circuit(webhook)
+
+    with concurrency_slot(webhook):
+        session = get_session(webhook)
+        start = time.monotonic()
+        try:
+            response = session.send(
+                prepared_request,
+                proxies=settings.HTTP_PROXIES,
+                timeout=settings.WEBHOOK_TIMEOUT or None,
+            )
+        except requests.exceptions.RequestException:
+            webhook_delivery_total.labels(webhook.name, "error").inc()
+            record_failure(webhook)
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            webhook_delivery_duration.labels(webhook.name).observe(elapsed)
+
+    logger.info("Webhook %s returned status %s in %.3f seconds", webhook, response.status_code, elapsed)
+    webhook_delivery_total.labels(webhook.name, str(response.status_code)).inc()
+
+    if not response.ok:
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            record_failure(webhook)
+        raise WebhookDeliveryFailed(
+            "Status {} returned with content '{}', webhook FAILED to process.".format(
+                response.status_code, response.content
+            ),
+            status_code=response.status_code,
+        )
+
+    record_success(webhook)
+    return response
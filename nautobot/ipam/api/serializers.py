@@ -1,5 +1,6 @@
 from collections import OrderedDict
 
+import netaddr
 from django.contrib.contenttypes.models import ContentType
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
@@ -279,6 +280,24 @@ class VLANSerializer(TaggedObjectSerializer, StatusModelSerializerMixin, CustomF
         return data
 
 
+class AvailableVLANSerializer(serializers.Serializer):
+    """
+    Representation of a VLAN which does not exist in the database.
+    """
+
+    vid = serializers.IntegerField(read_only=True)
+    group = NestedVLANGroupSerializer(read_only=True)
+
+    def to_representation(self, instance):
+        group = NestedVLANGroupSerializer(self.context["group"], context={"request": self.context["request"]}).data
+        return OrderedDict(
+            [
+                ("vid", instance),
+                ("group", group),
+            ]
+        )
+
+
 #
 # Prefixes
 #
@@ -293,6 +312,7 @@ class PrefixSerializer(TaggedObjectSerializer, StatusModelSerializerMixin, Custo
     tenant = NestedTenantSerializer(required=False, allow_null=True)
     vlan = NestedVLANSerializer(required=False, allow_null=True)
     role = NestedRoleSerializer(required=False, allow_null=True)
+    utilization = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Prefix
@@ -314,9 +334,17 @@ class PrefixSerializer(TaggedObjectSerializer, StatusModelSerializerMixin, Custo
             "created",
             "last_updated",
             "computed_fields",
+            "utilization",
         ]
         read_only_fields = ["family"]
-        opt_in_fields = ["computed_fields"]
+        opt_in_fields = ["computed_fields", "utilization"]
+
+    @swagger_serializer_method(serializer_or_field=serializers.DictField)
+    def get_utilization(self, obj):
+        """
+        Return the utilization of the prefix as a numerator and denominator.
+        """
+        return obj.get_utilization()._asdict()
 
 
 class PrefixLengthSerializer(serializers.Serializer):
@@ -342,6 +370,20 @@ class PrefixLengthSerializer(serializers.Serializer):
         return data
 
 
+class PrefixAllocationSerializer(serializers.Serializer):
+    """
+    A request to allocate a number of IP addresses (or, if `prefix_length` is given, child prefixes) from within a
+    parent prefix, each created with the given attributes.
+    """
+
+    parent = serializers.UUIDField()
+    count = serializers.IntegerField(min_value=1, default=1)
+    prefix_length = serializers.IntegerField(
+        min_value=constants.PREFIX_LENGTH_MIN, max_value=constants.PREFIX_LENGTH_MAX, required=False
+    )
+    attributes = serializers.DictField(required=False, default=dict)
+
+
 class AvailablePrefixSerializer(serializers.Serializer):
     """
     Representation of a prefix which does not exist in the database.
@@ -365,6 +407,42 @@ class AvailablePrefixSerializer(serializers.Serializer):
         )
 
 
+class LongestMatchRequestSerializer(serializers.Serializer):
+    """
+    A list of IP addresses to be matched to the most specific Prefixes which contain them.
+    """
+
+    addresses = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=constants.LONGEST_MATCH_MAX_ADDRESSES
+    )
+    vrf = serializers.UUIDField(required=False, allow_null=True)
+
+    def validate_addresses(self, value):
+        addresses = []
+        errors = []
+        for address in value:
+            try:
+                addresses.append(netaddr.IPAddress(address))
+            except (netaddr.AddrFormatError, ValueError):
+                errors.append(f"Invalid IP address: {address}")
+        if errors:
+            raise serializers.ValidationError(errors)
+        return addresses
+
+
+class LongestMatchSerializer(serializers.Serializer):
+    """
+    An IP address, along with the most specific Prefix which contains it and the IPAddress object for it (if any).
+    """
+
+    address = serializers.CharField(read_only=True)
+    prefix = NestedPrefixSerializer(read_only=True)
+    vrf = NestedVRFSerializer(read_only=True)
+    site = NestedSiteSerializer(read_only=True)
+    vlan = NestedVLANSerializer(read_only=True)
+    ip_address = NestedIPAddressSerializer(read_only=True)
+
+
 #
 # IP addresses
 #
@@ -1,12 +1,24 @@
+from collections import defaultdict
+from contextlib import ExitStack
+from itertools import islice
+from uuid import UUID
+
+import netaddr
 from django.conf import settings
-from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from drf_yasg import openapi
+from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
 
+from nautobot.core.api.authentication import ReadOnlyPostTokenPermissions
 from nautobot.extras.api.views import CustomFieldModelViewSet, StatusViewSetMixin
 from nautobot.ipam import filters
 from nautobot.ipam.models import (
@@ -21,6 +33,9 @@ from nautobot.ipam.models import (
     VLANGroup,
     VRF,
 )
+from nautobot.ipam.prefix_index import get_prefix_index
+from nautobot.ipam.utils import get_allocation_lock, get_vlan_allocation_lock
+from nautobot.users.models import Token
 from nautobot.utilities.utils import count_related
 from . import serializers
 
@@ -116,6 +131,33 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
     )
     serializer_class = serializers.PrefixSerializer
     filterset_class = filters.PrefixFilterSet
+    _prefix_param = Parameter(
+        name="prefix",
+        in_="query",
+        description="Prefix or IP address, e.g. 192.0.2.0/24",
+        required=True,
+        type=openapi.TYPE_STRING,
+    )
+    _vrf_param = Parameter(
+        name="vrf_id",
+        in_="query",
+        description="ID of the VRF (default: the global table)",
+        required=False,
+        type=openapi.TYPE_STRING,
+    )
+
+    def get_permissions(self):
+        # Longest-match lookups are POSTed (as a list of addresses) but only read objects
+        if self.action == "longest_match":
+            return [ReadOnlyPostTokenPermissions()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Compute the utilization of the whole page of prefixes in bulk if it has been requested
+        if "utilization" in self.request.query_params.get("include", "").split(","):
+            queryset = queryset.annotate_utilization()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "available_prefixes" and self.request.method == "POST":
@@ -129,13 +171,14 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
         """
         A convenience method for returning available child prefixes within a parent.
 
-        The advisory lock decorator uses a PostgreSQL advisory lock to prevent this API from being
-        invoked in parallel, which results in a race condition where multiple insertions can occur.
+        Allocations from the same prefix (or any overlapping non-container prefix) are serialized by a lock to prevent a
+        race condition where multiple insertions of the same prefix can occur. Allocations from unrelated prefixes may
+        proceed in parallel, as may allocations from separate prefixes within a common container prefix.
         """
         prefix = get_object_or_404(self.queryset, pk=pk)
         if request.method == "POST":
 
-            with cache.lock("available-prefixes", blocking_timeout=5):
+            with get_allocation_lock(prefix, "available-prefixes"):
                 available_prefixes = prefix.get_available_prefixes()
 
                 # Validate Requested Prefixes' length
@@ -214,22 +257,23 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
         returned will be equivalent to PAGINATE_COUNT. An arbitrary limit (up to MAX_PAGE_SIZE, if set) may be passed,
         however results will not be paginated.
 
-        The advisory lock decorator uses a PostgreSQL advisory lock to prevent this API from being
-        invoked in parallel, which results in a race condition where multiple insertions can occur.
+        Allocations from the same prefix (or any overlapping non-container prefix) are serialized by a lock to prevent a
+        race condition where multiple insertions of the same IP address can occur. Allocations from unrelated prefixes
+        may proceed in parallel, as may allocations from separate prefixes within a common container prefix.
         """
         prefix = get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
         # Create the next available IP within the prefix
         if request.method == "POST":
 
-            with cache.lock("available-ips", blocking_timeout=5):
+            with get_allocation_lock(prefix, "available-ips"):
 
                 # Normalize to a list of objects
                 requested_ips = request.data if isinstance(request.data, list) else [request.data]
 
                 # Determine if the requested number of IPs is available
-                available_ips = prefix.get_available_ips()
-                if available_ips.size < len(requested_ips):
+                available_ips = list(islice(prefix.iter_available_ips(), len(requested_ips)))
+                if len(available_ips) < len(requested_ips):
                     return Response(
                         {
                             "detail": "An insufficient number of IP addresses are available within the prefix {} ({} "
@@ -239,10 +283,9 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                     )
 
                 # Assign addresses from the list of available IPs and copy VRF assignment from the parent prefix
-                available_ips = iter(available_ips)
                 prefix_length = prefix.prefix.prefixlen
-                for requested_ip in requested_ips:
-                    requested_ip["address"] = "{}/{}".format(next(available_ips), prefix_length)
+                for requested_ip, available_ip in zip(requested_ips, available_ips):
+                    requested_ip["address"] = "{}/{}".format(available_ip, prefix_length)
                     requested_ip["vrf"] = prefix.vrf.pk if prefix.vrf else None
 
                 # Initialize the serializer with a list or a single object depending on what was requested
@@ -267,11 +310,7 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 limit = min(limit, settings.MAX_PAGE_SIZE)
 
             # Calculate available IPs within the prefix
-            ip_list = []
-            for index, ip in enumerate(prefix.get_available_ips(), start=1):
-                ip_list.append(ip)
-                if index == limit:
-                    break
+            ip_list = list(islice(prefix.iter_available_ips(), limit or None))
             serializer = serializers.AvailableIPSerializer(
                 ip_list,
                 many=True,
@@ -284,6 +323,229 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
 
             return Response(serializer.data)
 
+    @swagger_auto_schema(
+        request_body=serializers.PrefixAllocationSerializer(many=True),
+        responses={201: serializers.IPAddressSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-allocate", permission_classes=[IsAuthenticated])
+    def bulk_allocate(self, request):
+        """
+        Allocate IP addresses and/or child prefixes from within any number of parent prefixes in a single request.
+
+        The availability within each parent prefix is computed once, and all of the requested objects are created
+        atomically: if any request cannot be satisfied, nothing is created. The response contains, for each request in
+        turn, the list of IP addresses or prefixes created for it.
+        """
+        if isinstance(request.auth, Token) and not request.auth.write_enabled:
+            raise PermissionDenied("This token does not permit write operations.")
+
+        serializer = serializers.PrefixAllocationSerializer(
+            data=request.data if isinstance(request.data, list) else [request.data], many=True
+        )
+        serializer.is_valid(raise_exception=True)
+        allocations = serializer.validated_data
+
+        models = {Prefix if allocation.get("prefix_length") else IPAddress for allocation in allocations}
+        for model in models:
+            if not request.user.has_perm(f"ipam.add_{model._meta.model_name}"):
+                raise PermissionDenied(f"This user does not have permission to add {model._meta.verbose_name_plural}.")
+
+        parents = Prefix.objects.restrict(request.user).in_bulk({allocation["parent"] for allocation in allocations})
+        for allocation in allocations:
+            parent = parents.get(allocation["parent"])
+            if parent is None:
+                raise ValidationError({"parent": f"Prefix {allocation['parent']} not found."})
+            if allocation.get("prefix_length", 0) > (32 if parent.family == 4 else 128):
+                raise ValidationError(
+                    {"prefix_length": f"Invalid prefix length ({allocation['prefix_length']}) for IPv{parent.family}"}
+                )
+
+        # Acquire each lock once (duplicate prefixes share a lock), in a consistent order to avoid deadlocks
+        locks = {}
+        for allocation in allocations:
+            lock = get_allocation_lock(
+                parents[allocation["parent"]],
+                "available-prefixes" if allocation.get("prefix_length") else "available-ips",
+            )
+            locks.setdefault(lock.name, lock)
+
+        with ExitStack() as stack:
+            for name in sorted(locks):
+                stack.enter_context(locks[name])
+
+            # Parent prefix PK => iterator of available IPs, or IPSet of available prefixes
+            available_ips = {}
+            available_prefixes = {}
+            # VRF PK => addresses and prefixes allocated so far by this request (possibly from other parent prefixes)
+            allocated_ips = defaultdict(set)
+            allocated_prefixes = defaultdict(list)
+            ip_data = []
+            prefix_data = []
+
+            for allocation in allocations:
+                parent = parents[allocation["parent"]]
+                count = allocation["count"]
+                vrf = parent.vrf_id
+                attributes = {**allocation["attributes"], "vrf": vrf}
+
+                if allocation.get("prefix_length"):
+                    if parent.pk not in available_prefixes:
+                        available_prefixes[parent.pk] = parent.get_available_prefixes()
+                        for allocated_prefix in allocated_prefixes[vrf]:
+                            available_prefixes[parent.pk].remove(allocated_prefix)
+                    available = available_prefixes[parent.pk]
+
+                    for _ in range(count):
+                        # Find the first available prefix equal to or larger than the requested size
+                        for available_prefix in available.iter_cidrs():
+                            if allocation["prefix_length"] >= available_prefix.prefixlen:
+                                allocated_prefix = netaddr.IPNetwork(
+                                    f"{available_prefix.network}/{allocation['prefix_length']}"
+                                )
+                                break
+                        else:
+                            return Response(
+                                {
+                                    "detail": f"Insufficient space is available within the prefix {parent} to "
+                                    f"accommodate the requested prefix size(s)"
+                                },
+                                status=status.HTTP_204_NO_CONTENT,
+                            )
+
+                        prefix_data.append({**attributes, "prefix": str(allocated_prefix)})
+                        allocated_prefixes[vrf].append(allocated_prefix)
+                        for pk, other_available in available_prefixes.items():
+                            if parents[pk].vrf_id == parent.vrf_id:
+                                other_available.remove(allocated_prefix)
+
+                else:
+                    if parent.pk not in available_ips:
+                        available_ips[parent.pk] = (
+                            ip for ip in parent.iter_available_ips() if ip not in allocated_ips[vrf]
+                        )
+                    ips = list(islice(available_ips[parent.pk], count))
+                    if len(ips) < count:
+                        return Response(
+                            {
+                                "detail": "An insufficient number of IP addresses are available within the prefix {} "
+                                "({} requested, {} available)".format(parent, count, len(ips))
+                            },
+                            status=status.HTTP_204_NO_CONTENT,
+                        )
+
+                    prefix_length = parent.prefix.prefixlen
+                    ip_data.extend({**attributes, "address": f"{ip}/{prefix_length}"} for ip in ips)
+                    allocated_ips[vrf].update(ips)
+
+            context = {"request": request}
+            ip_serializer = serializers.IPAddressSerializer(data=ip_data, many=True, context=context)
+            prefix_serializer = serializers.PrefixSerializer(data=prefix_data, many=True, context=context)
+            ip_serializer.is_valid(raise_exception=True)
+            prefix_serializer.is_valid(raise_exception=True)
+
+            # Create all of the new IP addresses and prefixes, enforcing object-level permissions
+            try:
+                with transaction.atomic():
+                    for model, model_serializer in ((IPAddress, ip_serializer), (Prefix, prefix_serializer)):
+                        instances = model_serializer.save()
+                        permitted = model.objects.restrict(request.user, "add").filter(
+                            pk__in=[instance.pk for instance in instances]
+                        )
+                        if permitted.count() != len(instances):
+                            raise ObjectDoesNotExist
+            except ObjectDoesNotExist:
+                raise PermissionDenied()
+
+        # Group the created objects by request
+        ips = iter(ip_serializer.data)
+        prefixes = iter(prefix_serializer.data)
+        return Response(
+            [
+                list(islice(prefixes if allocation.get("prefix_length") else ips, allocation["count"]))
+                for allocation in allocations
+            ],
+            status=status.HTTP_201_CREATED,
+        )
+
+    @swagger_auto_schema(
+        manual_parameters=[_prefix_param, _vrf_param],
+        responses={200: serializers.PrefixSerializer(many=True)},
+    )
+    @action(detail=False, url_path="covering")
+    def covering(self, request):
+        """
+        Return all prefixes of a VRF which contain or are equal to the given prefix (or IP address), most specific
+        first. Prefixes are found using an in-memory index rather than by searching the database.
+        """
+        try:
+            prefix = netaddr.IPNetwork(request.query_params[self._prefix_param.name])
+        except KeyError:
+            raise ValidationError({self._prefix_param.name: "This parameter is required."})
+        except (netaddr.AddrFormatError, ValueError):
+            raise ValidationError({self._prefix_param.name: "Invalid prefix or IP address."})
+        try:
+            vrf_id = UUID(request.query_params[self._vrf_param.name])
+        except KeyError:
+            vrf_id = None
+        except ValueError:
+            raise ValidationError({self._vrf_param.name: "Invalid VRF ID."})
+
+        pks = get_prefix_index().covering(prefix, vrf_id=vrf_id)
+        prefixes = self.get_queryset().in_bulk(pks)
+        serializer = self.get_serializer([prefixes[pk] for pk in pks if pk in prefixes], many=True)
+
+        return Response(serializer.data)
+
+    @swagger_auto_schema(
+        request_body=serializers.LongestMatchRequestSerializer,
+        responses={200: serializers.LongestMatchSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"], url_path="longest-match")
+    def longest_match(self, request):
+        """
+        Return, for each of a list of IP addresses in a VRF (by default, the global table), the most specific prefix
+        which contains it (along with its VRF, site and VLAN) and the IP address object for it, if any.
+
+        Prefixes are matched using an in-memory index, so the number of database queries does not depend on the number
+        of addresses. Only objects which the user has permission to view are returned: if the most specific prefix
+        containing an address is not viewable, the most specific one which is viewable is returned instead.
+        """
+        input_serializer = serializers.LongestMatchRequestSerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+        addresses = input_serializer.validated_data["addresses"]
+        vrf_id = input_serializer.validated_data.get("vrf")
+
+        # The PKs of the prefixes containing each address, most specific first
+        index = get_prefix_index()
+        covering_pks = [index.covering(address, vrf_id=vrf_id) for address in addresses]
+        prefixes = (
+            Prefix.objects.restrict(request.user, "view")
+            .select_related("site", "vlan", "vrf")
+            .in_bulk({pk for pks in covering_pks for pk in pks})
+        )
+        ip_addresses = {}
+        for ip_address in IPAddress.objects.restrict(request.user, "view").filter(
+            vrf_id=vrf_id, host__in=[str(address) for address in addresses]
+        ):
+            ip_addresses.setdefault(ip_address.address.ip, ip_address)
+
+        results = []
+        for address, pks in zip(addresses, covering_pks):
+            prefix = next((prefixes[pk] for pk in pks if pk in prefixes), None)
+            results.append(
+                {
+                    "address": str(address),
+                    "prefix": prefix,
+                    "vrf": prefix.vrf if prefix else None,
+                    "site": prefix.site if prefix else None,
+                    "vlan": prefix.vlan if prefix else None,
+                    "ip_address": ip_addresses.get(address),
+                }
+            )
+        serializer = serializers.LongestMatchSerializer(results, many=True, context={"request": request})
+
+        return Response(serializer.data)
+
 
 #
 # IP addresses
@@ -314,6 +576,89 @@ class VLANGroupViewSet(CustomFieldModelViewSet):
     serializer_class = serializers.VLANGroupSerializer
     filterset_class = filters.VLANGroupFilterSet
 
+    @swagger_auto_schema(method="get", responses={200: serializers.AvailableVLANSerializer(many=True)})
+    @swagger_auto_schema(
+        method="post",
+        responses={201: serializers.VLANSerializer(many=True)},
+        request_body=serializers.VLANSerializer(many=True),
+    )
+    @action(
+        detail=True,
+        url_path="available-vlans",
+        methods=["get", "post"],
+        queryset=VLAN.objects.all(),
+    )
+    def available_vlans(self, request, pk=None):
+        """
+        A convenience method for returning available VLAN IDs within a VLAN group. By default, the number of VLAN IDs
+        returned will be equivalent to PAGINATE_COUNT. An arbitrary limit (up to MAX_PAGE_SIZE, if set) may be passed,
+        however results will not be paginated.
+
+        Allocations from the same VLAN group are serialized by a lock, so that concurrent requests are assigned distinct
+        VLAN IDs rather than failing on a uniqueness violation. All of the requested VLANs are created atomically.
+        """
+        vlan_group = get_object_or_404(VLANGroup.objects.restrict(request.user), pk=pk)
+
+        # Create the next available VLAN(s) within the group
+        if request.method == "POST":
+
+            with get_vlan_allocation_lock(vlan_group):
+
+                # Normalize to a list of objects
+                requested_vlans = request.data if isinstance(request.data, list) else [request.data]
+
+                # Determine if the requested number of VLANs is available
+                available_vids = list(islice(vlan_group.iter_available_vids(), len(requested_vlans)))
+                if len(available_vids) < len(requested_vlans):
+                    return Response(
+                        {
+                            "detail": "An insufficient number of VLAN IDs are available within the VLAN group {} ({} "
+                            "requested, {} available)".format(vlan_group, len(requested_vlans), len(available_vids))
+                        },
+                        status=status.HTTP_204_NO_CONTENT,
+                    )
+
+                # Assign VLAN IDs from the list of available VIDs and copy site assignment from the VLAN group
+                for requested_vlan, available_vid in zip(requested_vlans, available_vids):
+                    requested_vlan["vid"] = available_vid
+                    requested_vlan["group"] = vlan_group.pk
+                    requested_vlan["site"] = vlan_group.site_id
+
+                # Initialize the serializer with a list or a single object depending on what was requested
+                context = {"request": request}
+                if isinstance(request.data, list):
+                    serializer = serializers.VLANSerializer(data=requested_vlans, many=True, context=context)
+                else:
+                    serializer = serializers.VLANSerializer(data=requested_vlans[0], context=context)
+
+                # Create the new VLAN(s)
+                serializer.is_valid(raise_exception=True)
+                with transaction.atomic():
+                    serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        # Determine the maximum number of VLAN IDs to return
+        else:
+            try:
+                limit = int(request.query_params.get("limit", settings.PAGINATE_COUNT))
+            except ValueError:
+                limit = settings.PAGINATE_COUNT
+            if settings.MAX_PAGE_SIZE:
+                limit = min(limit, settings.MAX_PAGE_SIZE)
+
+            # Calculate available VLAN IDs within the group
+            vid_list = list(islice(vlan_group.iter_available_vids(), limit or None))
+            serializer = serializers.AvailableVLANSerializer(
+                vid_list,
+                many=True,
+                context={
+                    "request": request,
+                    "group": vlan_group,
+                },
+            )
+
+            return Response(serializer.data)
+
 
 #
 # VLANs
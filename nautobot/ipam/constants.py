@@ -52,6 +52,16 @@ IPADDRESS_ROLES_NONUNIQUE = (
 IPV4_BYTE_LENGTH = 4
 IPV6_BYTE_LENGTH = 16
 
+# Ranges of at most this many addresses are searched for available IPs by retrieving the IPs within them, rather than
+# by dividing them further
+AVAILABLE_IP_SEARCH_RANGE_SIZE = 256
+
+# Maximum time (in seconds) to wait for another request to finish allocating from the same Prefix or VLAN group
+ALLOCATION_LOCK_TIMEOUT = 5
+
+# Maximum number of IP addresses which may be matched to Prefixes in a single request
+LONGEST_MATCH_MAX_ADDRESSES = 10000
+
 
 #
 # VLANs
@@ -1,3 +1,5 @@
+import socket
+
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.datastructures import DictWrapper
@@ -50,9 +52,42 @@ class VarbinaryIPField(models.BinaryField):
         except (TypeError, ValueError) as e:
             raise ValidationError(e)
 
+    def _unpack_address(self, value):
+        """
+        Convert `bytes` (varbinary) to `str`, determining the address family from the length of the value.
+
+        This is the fast path for values loaded from the database, which avoids constructing a `netaddr.IPAddress`.
+        IPv4-mapped and -compatible IPv6 addresses (whose representation varies between platforms) are formatted by
+        netaddr as before.
+        """
+        value = bytes(value)
+        if len(value) == 4:
+            return socket.inet_ntop(socket.AF_INET, value)
+        if len(value) == 16 and any(value[:10]):
+            return socket.inet_ntop(socket.AF_INET6, value)
+        if len(value) == 16:
+            return str(netaddr.IPAddress(int.from_bytes(value, "big"), 6))
+        return str(self._parse_address(value))
+
+    def _pack_address(self, value):
+        """
+        Convert `str` or `netaddr.IPAddress` to `bytes` (varbinary).
+        """
+        if isinstance(value, str):
+            # Fast path for strictly formatted addresses; anything else is left to netaddr to parse (or reject)
+            for family in (socket.AF_INET, socket.AF_INET6):
+                try:
+                    return socket.inet_pton(family, value)
+                except (OSError, ValueError):
+                    pass
+        return self._parse_address(value).packed
+
     def from_db_value(self, value, expression, connection):
         """Converts DB (varbinary) to Python (str)."""
-        return self.to_python(value)
+        if value is None:
+            return value
+
+        return self._unpack_address(value)
 
     def to_python(self, value):
         """Converts `value` to Python (str)."""
@@ -62,6 +97,9 @@ class VarbinaryIPField(models.BinaryField):
         if value is None:
             return value
 
+        if isinstance(value, (bytes, memoryview)):
+            return self._unpack_address(value)
+
         return str(self._parse_address(value))
 
     def get_db_prep_value(self, value, connection, prepared=False):
@@ -70,7 +108,7 @@ class VarbinaryIPField(models.BinaryField):
             return value
 
         # Parse the address and then pack it to binary.
-        value = self._parse_address(value).packed
+        value = self._pack_address(value)
 
         # Use defaults for PostgreSQL
         if connection.vendor == "postgresql":
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+import netaddr
+
+
+def populate_prefix_tree(apps, schema_editor):
+    """Compute the stored parent and depth of every existing Prefix."""
+    # Imported here as it is only needed when running forward
+    from nautobot.ipam.utils import get_prefix_tree
+
+    Prefix = apps.get_model("ipam", "Prefix")
+
+    tree = get_prefix_tree(
+        (pk, vrf_id, netaddr.IPNetwork(f"{network}/{prefix_length}"))
+        for pk, vrf_id, network, prefix_length in Prefix.objects.values_list(
+            "pk", "vrf_id", "network", "prefix_length"
+        ).iterator()
+    )
+    Prefix.objects.bulk_update(
+        [Prefix(pk=pk, parent_id=parent_id, depth=depth) for pk, (parent_id, depth) in tree.items() if depth],
+        ["parent", "depth"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ipam", "0004_fixup_p2p_broadcast"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="prefix",
+            name="depth",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                editable=False,
+                help_text="The number of other prefixes in the same VRF which contain this prefix",
+            ),
+        ),
+        migrations.AddField(
+            model_name="prefix",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                help_text="The most specific other prefix in the same VRF which contains this prefix",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="ipam.prefix",
+            ),
+        ),
+        migrations.RunPython(
+            code=populate_prefix_tree,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ipam", "0005_prefix_parent_depth"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="aggregate",
+            index=models.Index(fields=["network", "broadcast"], name="ipam_aggregate_net_bcast_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="prefix",
+            index=models.Index(fields=["vrf", "network", "broadcast"], name="ipam_prefix_vrf_net_bcast_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="prefix",
+            index=models.Index(fields=["network", "broadcast"], name="ipam_prefix_net_bcast_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ipaddress",
+            index=models.Index(fields=["vrf", "host"], name="ipam_ipaddress_vrf_host_idx"),
+        ),
+    ]
@@ -5,7 +5,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import F
+from django.db.models import Exists, F, OuterRef, Subquery
 from django.urls import reverse
 from django.utils.functional import classproperty
 
@@ -252,9 +252,14 @@ class Aggregate(PrimaryModel):
 
     class Meta:
         ordering = ("network", "broadcast", "pk")  # prefix may be non-unique
+        indexes = [
+            # Supports containment queries, which compare both ends of each network's range
+            models.Index(fields=["network", "broadcast"], name="ipam_aggregate_net_bcast_idx"),
+        ]
 
     def __init__(self, *args, **kwargs):
         prefix = kwargs.pop("prefix", None)
+        self._prefix_cache = None
         super(Aggregate, self).__init__(*args, **kwargs)
         self._deconstruct_prefix(prefix)
 
@@ -335,8 +340,12 @@ class Aggregate(PrimaryModel):
 
     @property
     def prefix(self):
-        if self.cidr_str:
-            return netaddr.IPNetwork(self.cidr_str)
+        # The IPNetwork is only constructed when first needed, and is reused for as long as the prefix is unchanged
+        if self.network is not None and self.prefix_length is not None:
+            key = (self.network, self.prefix_length)
+            if self._prefix_cache is None or self._prefix_cache[0] != key:
+                self._prefix_cache = (key, netaddr.IPNetwork("%s/%s" % key))
+            return self._prefix_cache[1]
 
     @prefix.setter
     def prefix(self, prefix):
@@ -363,9 +372,8 @@ class Aggregate(PrimaryModel):
         Returns:
             UtilizationData: Aggregate utilization (numerator=size of child prefixes, denominator=prefix size)
         """
-        queryset = Prefix.objects.net_contained_or_equal(self.prefix)
-        child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
-        return UtilizationData(numerator=child_prefixes.size, denominator=self.prefix.size)
+        child_size = Prefix.objects.net_contained_or_equal(self.prefix).get_size(self.family)
+        return UtilizationData(numerator=child_size, denominator=self.prefix.size)
 
 
 @extras_features(
@@ -476,6 +484,20 @@ class Prefix(PrimaryModel, StatusModel):
         help_text="All IP addresses within this prefix are considered usable",
     )
     description = models.CharField(max_length=200, blank=True)
+    parent = models.ForeignKey(
+        to="self",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="The most specific other prefix in the same VRF which contains this prefix",
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="The number of other prefixes in the same VRF which contain this prefix",
+    )
 
     objects = PrefixQuerySet.as_manager()
 
@@ -509,9 +531,16 @@ class Prefix(PrimaryModel, StatusModel):
             "prefix_length",
         )  # (vrf, prefix) may be non-unique
         verbose_name_plural = "prefixes"
+        indexes = [
+            # Support containment queries (within a single VRF, or across all VRFs), which compare both ends of each
+            # prefix's range
+            models.Index(fields=["vrf", "network", "broadcast"], name="ipam_prefix_vrf_net_bcast_idx"),
+            models.Index(fields=["network", "broadcast"], name="ipam_prefix_net_bcast_idx"),
+        ]
 
     def __init__(self, *args, **kwargs):
         prefix = kwargs.pop("prefix", None)
+        self._prefix_cache = None
         super(Prefix, self).__init__(*args, **kwargs)
         self._deconstruct_prefix(prefix)
 
@@ -597,8 +626,12 @@ class Prefix(PrimaryModel, StatusModel):
 
     @property
     def prefix(self):
-        if self.cidr_str:
-            return netaddr.IPNetwork(self.cidr_str)
+        # The IPNetwork is only constructed when first needed, and is reused for as long as the prefix is unchanged
+        if self.network is not None and self.prefix_length is not None:
+            key = (self.network, self.prefix_length)
+            if self._prefix_cache is None or self._prefix_cache[0] != key:
+                self._prefix_cache = (key, netaddr.IPNetwork("%s/%s" % key))
+            return self._prefix_cache[1]
 
     @prefix.setter
     def prefix(self, prefix):
@@ -633,15 +666,84 @@ class Prefix(PrimaryModel, StatusModel):
         else:
             return IPAddress.objects.net_host_contained(self.prefix).filter(vrf=self.vrf)
 
+    def iter_available_prefixes(self):
+        """
+        Yield the largest possible available Prefixes within this prefix, in order, as IPNetworks.
+
+        Child prefixes are retrieved in order of network address only until the next available space is found, so
+        finding the first few available prefixes does not require retrieving every child prefix.
+        """
+        child_prefixes = (
+            self.get_child_prefixes()
+            .ip_family(self.family)
+            .order_by("network", "prefix_length")
+            .values_list("network", "broadcast")
+        )
+        version = self.family
+        next_available = self.prefix.first
+        for network, broadcast in child_prefixes.iterator():
+            first, last = int(netaddr.IPAddress(network)), int(netaddr.IPAddress(broadcast))
+            if first > next_available:
+                yield from netaddr.IPRange(
+                    netaddr.IPAddress(next_available, version), netaddr.IPAddress(first - 1, version)
+                ).cidrs()
+            next_available = max(next_available, last + 1)
+        if next_available <= self.prefix.last:
+            yield from netaddr.IPRange(
+                netaddr.IPAddress(next_available, version), netaddr.IPAddress(self.prefix.last, version)
+            ).cidrs()
+
     def get_available_prefixes(self):
         """
         Return all available Prefixes within this prefix as an IPSet.
         """
-        prefix = netaddr.IPSet(self.prefix)
-        child_prefixes = netaddr.IPSet([child.prefix for child in self.get_child_prefixes()])
-        available_prefixes = prefix - child_prefixes
+        return netaddr.IPSet(self.iter_available_prefixes())
+
+    def iter_available_ips(self):
+        """
+        Yield the available IPs within this prefix, in order, as IPAddresses.
 
-        return available_prefixes
+        The prefix is searched by repeatedly halving it, counting the child IPs within each half and skipping any half
+        which is fully used, so only a few indexed queries are needed to find the next available IPs however many IPs
+        are already in use.
+        """
+        child_ips = self.get_child_ips().ip_family(self.family).order_by()
+        version = self.family
+
+        def iter_range(first, last):
+            return netaddr.iter_iprange(netaddr.IPAddress(first, version), netaddr.IPAddress(last, version))
+
+        # IPv6, pool, or IPv4 /31-32 sets are fully usable
+        # For "normal" IPv4 prefixes, omit first and last addresses
+        first, last = self.prefix.first, self.prefix.last
+        if self.family == 4 and self.prefix.prefixlen < 31 and not self.is_pool:
+            first, last = first + 1, last - 1
+
+        # Address ranges remaining to be searched, with the lowest on top
+        ranges = [(first, last)]
+        while ranges:
+            first, last = ranges.pop()
+            ips_in_range = child_ips.filter(
+                host__gte=netaddr.IPAddress(first, version), host__lte=netaddr.IPAddress(last, version)
+            )
+            size = last - first + 1
+            if size > AVAILABLE_IP_SEARCH_RANGE_SIZE:
+                used = ips_in_range.values("host").distinct().count()
+                if used == 0:
+                    yield from iter_range(first, last)
+                elif used < size:
+                    middle = first + size // 2
+                    ranges.extend(((middle, last), (first, middle - 1)))
+                continue
+
+            next_available = first
+            for host in ips_in_range.order_by("host").values_list("host", flat=True).distinct():
+                host = int(netaddr.IPAddress(host))
+                if host > next_available:
+                    yield from iter_range(next_available, host - 1)
+                next_available = host + 1
+            if next_available <= last:
+                yield from iter_range(next_available, last)
 
     def get_available_ips(self):
         """
@@ -669,19 +771,16 @@ class Prefix(PrimaryModel, StatusModel):
         """
         Return the first available child prefix within the prefix (or None).
         """
-        available_prefixes = self.get_available_prefixes()
-        if not available_prefixes:
-            return None
-        return available_prefixes.iter_cidrs()[0]
+        return next(self.iter_available_prefixes(), None)
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        available_ip = next(self.iter_available_ips(), None)
+        if available_ip is None:
             return None
-        return "{}/{}".format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return "{}/{}".format(available_ip, self.prefix.prefixlen)
 
     def get_utilization(self):
         """Get the child prefix size and parent size.
@@ -691,18 +790,24 @@ class Prefix(PrimaryModel, StatusModel):
         Returns:
             UtilizationData (namedtuple): (numerator, denominator)
         """
-        if self.status == Prefix.STATUS_CONTAINER:
-            queryset = Prefix.objects.net_contained(self.prefix).filter(vrf=self.vrf)
-            child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
-            return UtilizationData(numerator=child_prefixes.size, denominator=self.prefix.size)
+        # Use the utilization computed by PrefixQuerySet.annotate_utilization(), if any
+        if hasattr(self, "_utilization"):
+            return self._utilization
+
+        if self.status_id == Prefix.STATUS_CONTAINER.pk:
+            child_size = Prefix.objects.net_contained(self.prefix).filter(vrf=self.vrf_id).get_size(self.family)
+            return UtilizationData(numerator=child_size, denominator=self.prefix.size)
 
         else:
-            # Compile an IPSet to avoid counting duplicate IPs
-            child_count = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()]).size
-            prefix_size = self.prefix.size
-            if self.prefix.version == 4 and self.prefix.prefixlen < 31 and not self.is_pool:
-                prefix_size -= 2
-            return UtilizationData(numerator=child_count, denominator=prefix_size)
+            # Count distinct addresses to avoid counting duplicate IPs
+            child_count = self.get_child_ips().ip_family(self.family).order_by().values("host").distinct().count()
+            return self._get_ip_utilization(child_count)
+
+    def _get_ip_utilization(self, child_count):
+        prefix_size = self.prefix.size
+        if self.prefix.version == 4 and self.prefix.prefixlen < 31 and not self.is_pool:
+            prefix_size -= 2
+        return UtilizationData(numerator=child_count, denominator=prefix_size)
 
 
 @extras_features(
@@ -809,9 +914,14 @@ class IPAddress(PrimaryModel, StatusModel):
         ordering = ("host", "prefix_length")  # address may be non-unique
         verbose_name = "IP address"
         verbose_name_plural = "IP addresses"
+        indexes = [
+            # Supports queries for the IP addresses within a prefix of a given VRF
+            models.Index(fields=["vrf", "host"], name="ipam_ipaddress_vrf_host_idx"),
+        ]
 
     def __init__(self, *args, **kwargs):
         address = kwargs.pop("address", None)
+        self._address_cache = None
         super(IPAddress, self).__init__(*args, **kwargs)
         self._deconstruct_address(address)
 
@@ -936,9 +1046,12 @@ class IPAddress(PrimaryModel, StatusModel):
 
     @property
     def address(self):
+        # The IPNetwork is only constructed when first needed, and is reused for as long as the address is unchanged
         if self.host is not None and self.prefix_length is not None:
-            cidr = "%s/%s" % (self.host, self.prefix_length)
-            return netaddr.IPNetwork(cidr)
+            key = (self.host, self.prefix_length)
+            if self._address_cache is None or self._address_cache[0] != key:
+                self._address_cache = (key, netaddr.IPNetwork("%s/%s" % key))
+            return self._address_cache[1]
 
     @address.setter
     def address(self, address):
@@ -1014,15 +1127,48 @@ class VLANGroup(OrganizationalModel):
             self.description,
         )
 
+    def get_available_vid_ranges(self):
+        """
+        Return the ranges of available VLAN IDs (1-4094) in the group, in order, as a list of `(first, last)` tuples.
+
+        Gaps are found by the database rather than by loading every VLAN in the group: only the VLANs which are
+        immediately followed by an unused VLAN ID are retrieved, each with the next VLAN ID in use (if any).
+        """
+        vlans = VLAN.objects.filter(group=self)
+        first_vid = vlans.order_by("vid").values_list("vid", flat=True).first()
+        if first_vid is None:
+            return [(VLAN_VID_MIN, VLAN_VID_MAX)]
+
+        gaps = (
+            vlans.filter(vid__lt=VLAN_VID_MAX)
+            .annotate(
+                next_vid_used=Exists(vlans.filter(vid=OuterRef("vid") + 1)),
+                next_used_vid=Subquery(vlans.filter(vid__gt=OuterRef("vid")).order_by("vid").values("vid")[:1]),
+            )
+            .filter(next_vid_used=False)
+            .order_by("vid")
+            .values_list("vid", "next_used_vid")
+        )
+
+        ranges = []
+        if first_vid > VLAN_VID_MIN:
+            ranges.append((VLAN_VID_MIN, first_vid - 1))
+        for vid, next_used_vid in gaps:
+            ranges.append((vid + 1, next_used_vid - 1 if next_used_vid else VLAN_VID_MAX))
+        return ranges
+
+    def iter_available_vids(self):
+        """
+        Yield each available VLAN ID in the group, in order.
+        """
+        for first, last in self.get_available_vid_ranges():
+            yield from range(first, last + 1)
+
     def get_next_available_vid(self):
         """
         Return the first available VLAN ID (1-4094) in the group.
         """
-        vlan_ids = VLAN.objects.filter(group=self).values_list("vid", flat=True)
-        for i in range(1, 4095):
-            if i not in vlan_ids:
-                return i
-        return None
+        return next(self.iter_available_vids(), None)
 
 
 @extras_features(
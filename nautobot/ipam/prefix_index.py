@@ -0,0 +1,174 @@
+"""
+In-memory prefix index.
+
+`PrefixIndex` holds the prefixes of every VRF in memory, for longest-prefix-match and containment lookups which require
+no database access. Within each VRF and address family, prefixes are kept in a hash table per prefix length, so that a
+lookup requires at most one dictionary lookup per distinct prefix length in use (rather than a walk through up to 32 or
+128 levels of a binary trie).
+
+`get_prefix_index()` returns a process-wide index of all prefixes. It is loaded on first use with a single query, and
+reloaded on next use whenever a Prefix has been created, moved or deleted (as signalled by a version number in the
+cache).
+"""
+from collections import defaultdict
+
+import netaddr
+from django.core.cache import cache
+from django.db import connection
+
+from nautobot.ipam.models import Prefix
+
+PREFIX_INDEX_VERSION_KEY = "nautobot.ipam.prefix_index.version"
+
+# The process-wide index, as (cache version, PrefixIndex)
+_prefix_index = (None, None)
+
+
+class PrefixIndex:
+    """
+    An in-memory index of Prefixes by VRF, supporting longest-prefix-match and containment lookups.
+
+    Prefixes are identified by their primary keys. Lookups take a VRF PK (or None for the global table) and consider
+    only the Prefixes assigned to that VRF.
+    """
+
+    def __init__(self):
+        # (VRF pk, family) => {prefix length: {network (as an integer): [Prefix pk, ...]}}
+        self._tables = defaultdict(dict)
+        # (VRF pk, family) => prefix lengths in use, longest first
+        self._lengths = {}
+        # Prefix pk => (VRF pk, IPNetwork)
+        self._prefixes = {}
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def __contains__(self, pk):
+        return pk in self._prefixes
+
+    @classmethod
+    def from_queryset(cls, queryset=None):
+        """
+        Build an index of the given Prefix queryset (by default, all Prefixes) with a single query.
+        """
+        if queryset is None:
+            queryset = Prefix.objects.all()
+
+        index = cls()
+        for pk, vrf_id, network, prefix_length in (
+            queryset.order_by("pk").values_list("pk", "vrf_id", "network", "prefix_length").iterator()
+        ):
+            index.add(pk, vrf_id, netaddr.IPNetwork(f"{network}/{prefix_length}"))
+        return index
+
+    def add(self, pk, vrf_id, prefix):
+        """
+        Add the given Prefix to the index, replacing its existing entry (if any).
+        """
+        if pk in self._prefixes:
+            self.remove(pk)
+
+        prefix = netaddr.IPNetwork(prefix).cidr
+        key = (vrf_id, prefix.version)
+        tables = self._tables[key]
+        if prefix.prefixlen not in tables:
+            tables[prefix.prefixlen] = {}
+            self._lengths[key] = sorted(tables, reverse=True)
+        tables[prefix.prefixlen].setdefault(prefix.first, []).append(pk)
+        self._prefixes[pk] = (vrf_id, prefix)
+
+    def remove(self, pk):
+        """
+        Remove the given Prefix from the index, if present.
+        """
+        if pk not in self._prefixes:
+            return
+
+        vrf_id, prefix = self._prefixes.pop(pk)
+        key = (vrf_id, prefix.version)
+        tables = self._tables[key]
+        table = tables[prefix.prefixlen]
+        table[prefix.first].remove(pk)
+        if not table[prefix.first]:
+            del table[prefix.first]
+        if not table:
+            del tables[prefix.prefixlen]
+            self._lengths[key] = sorted(tables, reverse=True)
+
+    def _iter_covering(self, prefix, vrf_id):
+        """
+        Yield the PKs of the Prefixes which contain or are equal to the given prefix (or IP address), most specific
+        first.
+        """
+        prefix = netaddr.IPNetwork(prefix)
+        key = (vrf_id, prefix.version)
+        tables = self._tables.get(key)
+        if not tables:
+            return
+
+        width = 32 if prefix.version == 4 else 128
+        first = prefix.first
+        for length in self._lengths[key]:
+            if length > prefix.prefixlen:
+                continue
+            yield from tables[length].get(first >> (width - length) << (width - length), ())
+
+    def longest_match(self, address, vrf_id=None):
+        """
+        Return the PK of the most specific Prefix which contains the given IP address (or prefix), or None.
+        """
+        return next(self._iter_covering(address, vrf_id), None)
+
+    def covering(self, prefix, vrf_id=None):
+        """
+        Return the PKs of all Prefixes which contain or are equal to the given prefix (or IP address), most specific
+        first.
+        """
+        return list(self._iter_covering(prefix, vrf_id))
+
+    def bulk_longest_match(self, addresses, vrf_id=None):
+        """
+        Return a list of the PK of the most specific Prefix (or None) containing each of the given IP addresses.
+        """
+        return [self.longest_match(address, vrf_id) for address in addresses]
+
+
+def get_prefix_index_version():
+    """
+    Return the current version of the Prefix index.
+    """
+    version = cache.get(PREFIX_INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(PREFIX_INDEX_VERSION_KEY, 1, timeout=None)
+        version = cache.get(PREFIX_INDEX_VERSION_KEY)
+    return version
+
+
+def invalidate_prefix_index():
+    """
+    Invalidate the Prefix index of every process by incrementing its version.
+    """
+    try:
+        cache.incr(PREFIX_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.add(PREFIX_INDEX_VERSION_KEY, 1, timeout=None)
+
+
+def get_prefix_index():
+    """
+    Return the process-wide PrefixIndex of all Prefixes, (re)loading it if any Prefix has changed since it was loaded.
+
+    An index loaded within a transaction may include uncommitted changes, so it is not retained. Jobs (which run within
+    a transaction) that perform many lookups should instead build their own index with `PrefixIndex.from_queryset()`.
+    """
+    global _prefix_index
+
+    version = get_prefix_index_version()
+    local_version, index = _prefix_index
+    if local_version == version:
+        return index
+
+    index = PrefixIndex.from_queryset()
+    if not connection.in_atomic_block:
+        _prefix_index = (version, index)
+    return index
@@ -4,6 +4,7 @@ import uuid
 import netaddr
 from django.db.models import (
     Count,
+    Exists,
     ExpressionWrapper,
     IntegerField,
     F,
@@ -15,6 +16,7 @@ from django.db.models import (
     Value,
 )
 from django.db.models.functions import Coalesce, Length
+from django.db.models.query import ModelIterable
 
 from nautobot.ipam.constants import IPV4_BYTE_LENGTH, IPV6_BYTE_LENGTH
 from nautobot.utilities.querysets import RestrictedQuerySet
@@ -237,47 +239,140 @@ class AggregateQuerySet(NetworkQuerySet):
     """Queryset for `Aggregate` objects."""
 
 
+def annotate_prefix_utilization(prefixes):
+    """
+    Compute the utilization of each of the given non-container Prefixes, counting their child IP addresses in the
+    database with one query per IP family, and store it on each Prefix to be returned by `Prefix.get_utilization()`.
+
+    The utilization of a container Prefix is left to be computed by `Prefix.get_utilization()` on demand, as it requires
+    a (single, aggregating) query of its own.
+    """
+    from nautobot.ipam.models import IPAddress, Prefix
+
+    prefixes_by_family = {}
+    for prefix in prefixes:
+        if prefix.status_id != Prefix.STATUS_CONTAINER.pk:
+            prefixes_by_family.setdefault(prefix.family, []).append(prefix)
+
+    # See PrefixQuerySet.annotate_tree()
+    FAKE_UUID = uuid.uuid4()
+
+    for family, family_prefixes in prefixes_by_family.items():
+        child_counts = dict(
+            Prefix.objects.filter(pk__in=[prefix.pk for prefix in family_prefixes])
+            .order_by()
+            .annotate(
+                child_count=Subquery(
+                    IPAddress.objects.ip_family(family)
+                    .annotate(
+                        maybe_vrf=ExpressionWrapper(
+                            Coalesce(F("vrf_id"), FAKE_UUID),
+                            output_field=UUIDField(),
+                        )
+                    )
+                    .filter(
+                        Q(host__gte=OuterRef("network"))
+                        & Q(host__lte=OuterRef("broadcast"))
+                        & Q(
+                            maybe_vrf=ExpressionWrapper(
+                                Coalesce(OuterRef("vrf_id"), FAKE_UUID),
+                                output_field=UUIDField(),
+                            )
+                        )
+                    )
+                    .order_by()
+                    .annotate(dummy_group_by=Value(1))  # This is an ORM hack to remove the unwanted GROUP BY clause
+                    .values("dummy_group_by")
+                    .annotate(count=Count("host", distinct=True))
+                    .values("count")[:1],
+                    output_field=IntegerField(),
+                )
+            )
+            .values_list("pk", "child_count")
+        )
+        for prefix in family_prefixes:
+            prefix._utilization = prefix._get_ip_utilization(child_counts.get(prefix.pk) or 0)
+
+
 class PrefixQuerySet(NetworkQuerySet):
-    """Queryset for `Prefix` objects."""
+    """
+    Queryset for `Prefix` objects.
+
+    Includes a method which computes the utilization of all non-container Prefixes retrieved by the QuerySet in bulk,
+    rather than querying for each Prefix individually.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._annotate_utilization = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._annotate_utilization = self._annotate_utilization
+        return clone
+
+    def annotate_utilization(self):
+        """
+        Compute the utilization of each Prefix once the QuerySet is evaluated, so that calls to `get_utilization()` on
+        the resulting Prefixes do not query the database (other than for container Prefixes).
+
+        As with `prefetch_related()`, this applies to whichever Prefixes are ultimately retrieved (for example, only a
+        single page of Prefixes when the QuerySet is paginated).
+        """
+        clone = self._chain()
+        clone._annotate_utilization = True
+        return clone
+
+    def _fetch_all(self):
+        annotate = self._annotate_utilization and self._result_cache is None
+        super()._fetch_all()
+        if annotate and issubclass(self._iterable_class, ModelIterable):
+            annotate_prefix_utilization(self._result_cache)
+
+    def get_size(self, family):
+        """
+        Return the number of addresses of the given IP family covered by the Prefixes in this QuerySet, counting any
+        address covered by more than one Prefix only once (as with `netaddr.IPSet([p.prefix for p in queryset]).size`).
+
+        Only the Prefixes not contained by another Prefix in the QuerySet are counted, grouped by prefix length, so a
+        single query returning at most one row per prefix length is made regardless of the number of Prefixes.
+        """
+        queryset = self.ip_family(family).order_by()
+        containers = queryset.filter(
+            prefix_length__lt=OuterRef("prefix_length"),
+            network__lte=OuterRef("network"),
+            broadcast__gte=OuterRef("broadcast"),
+        )
+        counts = (
+            queryset.annotate(is_contained=Exists(containers))
+            .filter(is_contained=False)
+            .values("prefix_length")
+            .annotate(count=Count("network", distinct=True))
+            .values_list("prefix_length", "count")
+        )
+        bits = self.ip_family_map[family] * 8
+        return sum(count * 2 ** (bits - prefix_length) for prefix_length, count in counts)
 
-    def annotate_tree(self):
+    def annotate_tree(self, children=True):
         """
         Annotate the number of parent and child prefixes for each Prefix.
 
+        The number of parents is the stored `depth` of each Prefix. Counting children requires a subquery per Prefix,
+        and may be skipped by passing `children=False` where only the parents are needed (e.g. to indent a table).
+
         The UUID being used is fake for purposes of satisfying the COALESCE condition.
         """
+        queryset = self.annotate(parents=F("depth"))
+        if not children:
+            return queryset
+
         # The COALESCE needs a valid, non-zero, non-null UUID value to do the comparison.
         # The value itself has no meaning, so we just generate a random UUID for the query.
         FAKE_UUID = uuid.uuid4()
 
         from nautobot.ipam.models import Prefix
 
-        return self.annotate(
-            parents=Subquery(
-                Prefix.objects.annotate(
-                    maybe_vrf=ExpressionWrapper(
-                        Coalesce(F("vrf_id"), FAKE_UUID),
-                        output_field=UUIDField(),
-                    )
-                )
-                .filter(
-                    Q(prefix_length__lt=OuterRef("prefix_length"))
-                    & Q(network__lte=OuterRef("network"))
-                    & Q(broadcast__gte=OuterRef("broadcast"))
-                    & Q(
-                        maybe_vrf=ExpressionWrapper(
-                            Coalesce(OuterRef("vrf_id"), FAKE_UUID),
-                            output_field=UUIDField(),
-                        )
-                    )
-                )
-                .order_by()
-                .annotate(dummy_group_by=Value(1))  # This is an ORM hack to remove the unwanted GROUP BY clause
-                .values("dummy_group_by")
-                .annotate(count=Count("*"))
-                .values("count")[:1],
-                output_field=IntegerField(),
-            ),
+        return queryset.annotate(
             children=Subquery(
                 Prefix.objects.annotate(
                     maybe_vrf=ExpressionWrapper(
@@ -0,0 +1,138 @@
+import netaddr
+from cacheops import invalidate_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from nautobot.ipam.models import Prefix
+from nautobot.ipam.prefix_index import invalidate_prefix_index
+
+
+#
+# Prefix hierarchy
+#
+# Each Prefix stores its parent (the most specific other Prefix of the same VRF which contains it) and its depth (the
+# number of Prefixes of the same VRF which contain it). Both are maintained incrementally here, with a handful of
+# set-based queries confined to the range of the Prefix being added or removed.
+#
+
+
+def _get_tree_queryset(vrf_id, prefix):
+    return Prefix.objects.ip_family(prefix.version).filter(vrf_id=vrf_id)
+
+
+def _add_prefix_to_tree(instance):
+    """
+    Set the parent and depth of the given Prefix, and update those of the Prefixes it contains.
+    """
+    prefix = instance.prefix
+    queryset = _get_tree_queryset(instance.vrf_id, prefix)
+
+    container_ids = list(
+        queryset.net_contains(prefix)
+        .exclude(pk=instance.pk)
+        .order_by("-prefix_length", "pk")
+        .values_list("pk", flat=True)
+    )
+    instance.parent_id = container_ids[0] if container_ids else None
+    instance.depth = len(container_ids)
+    Prefix.objects.filter(pk=instance.pk).update(parent_id=instance.parent_id, depth=instance.depth)
+
+    descendants = queryset.net_contained(prefix)
+    descendants.update(depth=F("depth") + 1)
+    # This Prefix becomes the parent of any descendant whose current parent (if any) is less specific than it
+    descendants.filter(Q(parent__isnull=True) | Q(parent__prefix_length__lt=prefix.prefixlen)).update(parent=instance)
+
+
+def _remove_prefix_from_tree(pk, vrf_id, prefix, child_ids=None):
+    """
+    Update the Prefixes contained by the given (deleted or moved) Prefix to account for its removal. Its former children
+    are reassigned to the most specific remaining Prefix which contains or duplicates it.
+    """
+    queryset = _get_tree_queryset(vrf_id, prefix).exclude(pk=pk)
+    queryset.net_contained(prefix).update(depth=F("depth") - 1)
+
+    if child_ids is None:
+        children = Prefix.objects.filter(parent_id=pk)
+    elif child_ids:
+        children = Prefix.objects.filter(pk__in=child_ids)
+    else:
+        return
+    parent_id = (
+        queryset.net_contains_or_equals(prefix).order_by("-prefix_length", "pk").values_list("pk", flat=True).first()
+    )
+    children.update(parent_id=parent_id)
+
+
+@receiver(pre_save, sender=Prefix)
+def record_prefix_tree_position(instance, raw=False, **kwargs):
+    """
+    Remember the VRF and prefix of an existing Prefix, so that the hierarchy can be updated if either is changed.
+
+    The stored parent and depth are also copied onto the instance, as they may have been changed (by the addition or
+    removal of other Prefixes) since it was loaded, and would otherwise be overwritten with stale values.
+    """
+    instance._prior_tree_position = None
+    if not raw and instance.present_in_database:
+        prior = (
+            Prefix.objects.filter(pk=instance.pk)
+            .values_list("vrf_id", "network", "prefix_length", "parent_id", "depth")
+            .first()
+        )
+        if prior is not None:
+            vrf_id, network, prefix_length, instance.parent_id, instance.depth = prior
+            instance._prior_tree_position = (vrf_id, netaddr.IPNetwork(f"{network}/{prefix_length}"))
+
+
+@receiver(post_save, sender=Prefix)
+def update_prefix_tree(instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    prior = getattr(instance, "_prior_tree_position", None)
+    if not created and prior == (instance.vrf_id, instance.prefix):
+        return
+
+    if prior is not None:
+        _remove_prefix_from_tree(instance.pk, *prior)
+    _add_prefix_to_tree(instance)
+
+    # update() bypasses cacheops' automatic invalidation
+    invalidate_model(Prefix)
+
+
+@receiver(pre_delete, sender=Prefix)
+def record_prefix_tree_children(instance, **kwargs):
+    """
+    Remember the children of a Prefix being deleted, before their parent is cleared by the deletion.
+    """
+    instance._tree_child_ids = list(Prefix.objects.filter(parent_id=instance.pk).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Prefix)
+def remove_deleted_prefix_from_tree(instance, **kwargs):
+    # Runs once every Prefix being deleted alongside this one is gone, so none of them can be chosen as a new parent
+    _remove_prefix_from_tree(
+        instance.pk, instance.vrf_id, instance.prefix, child_ids=getattr(instance, "_tree_child_ids", [])
+    )
+    invalidate_model(Prefix)
+
+
+#
+# Prefix index
+#
+
+
+@receiver(post_save, sender=Prefix)
+@receiver(post_delete, sender=Prefix)
+def handle_prefix_index_changed(instance, created=True, **kwargs):
+    """
+    Invalidate the in-memory Prefix index of every process whenever a Prefix is created, moved or deleted.
+
+    The index is invalidated immediately, so that this process sees its own changes, and again once the transaction is
+    committed, so that other processes cannot retain an index loaded before the changes became visible to them.
+    """
+    if not created and getattr(instance, "_prior_tree_position", None) == (instance.vrf_id, instance.prefix):
+        return
+    invalidate_prefix_index()
+    transaction.on_commit(invalidate_prefix_index)
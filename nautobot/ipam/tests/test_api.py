@@ -2,7 +2,10 @@ from concurrent.futures.thread import ThreadPoolExecutor
 import json
 from random import shuffle
 
+from django.contrib.contenttypes.models import ContentType
 from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from netaddr import IPNetwork
 from rest_framework import status
@@ -22,6 +25,8 @@ from nautobot.ipam.models import (
     VLANGroup,
     VRF,
 )
+from nautobot.ipam.utils import get_allocation_lock
+from nautobot.users.models import ObjectPermission
 from nautobot.utilities.testing import APITestCase, APIViewTestCases, disable_warnings
 from nautobot.utilities.testing.api import APITransactionTestCase
 
@@ -242,6 +247,26 @@ class PrefixTest(APIViewTestCases.APIViewTestCase):
         # needs to be enhanced to use the actual API serializers when `api=True`
         cls.validation_excluded_fields = ["status"]
 
+    def test_list_prefixes_with_utilization(self):
+        """
+        Test the opt-in inclusion of each prefix's utilization.
+        """
+        prefix = Prefix.objects.get(prefix="192.168.1.0/24")
+        prefix.status = self.status_active
+        prefix.save()
+        for i in range(1, 11):
+            IPAddress.objects.create(address=IPNetwork(f"192.168.1.{i}/24"))
+        self.add_permissions("ipam.view_prefix")
+
+        response = self.client.get(f"{self._get_list_url()}?include=utilization", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        utilization = {p["prefix"]: p["utilization"] for p in response.data["results"]}
+        self.assertEqual(utilization["192.168.1.0/24"], {"numerator": 10, "denominator": 254})
+        self.assertEqual(utilization["192.168.2.0/24"]["numerator"], 0)
+
+        response = self.client.get(self._get_list_url(), **self.header)
+        self.assertNotIn("utilization", response.data["results"][0])
+
     def test_list_available_prefixes(self):
         """
         Test retrieval of all available prefixes within a parent prefix.
@@ -399,6 +424,211 @@ class PrefixTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_201_CREATED)
         self.assertEqual(len(response.data), 8)
 
+    def test_create_available_ip_during_allocation_from_another_prefix(self):
+        """
+        Test that allocating from a prefix is not blocked by an allocation in progress within an unrelated prefix.
+        """
+        prefix = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/30"), is_pool=True, status=self.status_active)
+        other_prefix = Prefix.objects.create(prefix=IPNetwork("198.51.100.0/30"), status=self.status_active)
+        url = reverse("ipam-api:prefix-available-ips", kwargs={"pk": prefix.pk})
+        self.add_permissions("ipam.view_prefix", "ipam.add_ipaddress", "extras.view_status")
+
+        # Duplicate and overlapping prefixes share a lock, while unrelated prefixes do not
+        duplicate_prefix = Prefix(prefix=IPNetwork("192.0.2.0/30"))
+        self.assertEqual(
+            get_allocation_lock(prefix, "available-ips").name,
+            get_allocation_lock(duplicate_prefix, "available-ips").name,
+        )
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/24"), status=self.status_active)
+        self.assertEqual(
+            get_allocation_lock(prefix, "available-ips").name,
+            get_allocation_lock(parent_prefix, "available-ips").name,
+        )
+        self.assertNotEqual(
+            get_allocation_lock(prefix, "available-ips").name,
+            get_allocation_lock(other_prefix, "available-ips").name,
+        )
+
+        with get_allocation_lock(other_prefix, "available-ips"):
+            response = self.client.post(url, {"status": "active"}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["address"], "192.0.2.0/30")
+
+    def test_allocation_lock_disregards_containers(self):
+        """
+        Test that allocations from sibling prefixes within a container prefix do not share a lock.
+        """
+        status_container = self.statuses.get(slug="container")
+        Prefix.objects.create(prefix=IPNetwork("10.0.0.0/8"), status=status_container)
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork("10.1.0.0/16"), status=self.status_active)
+        pool1 = Prefix.objects.create(prefix=IPNetwork("10.1.1.0/24"), is_pool=True, status=self.status_active)
+        pool2 = Prefix.objects.create(prefix=IPNetwork("10.2.1.0/24"), is_pool=True, status=self.status_active)
+
+        self.assertNotEqual(
+            get_allocation_lock(pool1, "available-ips").name,
+            get_allocation_lock(pool2, "available-ips").name,
+        )
+        self.assertEqual(
+            get_allocation_lock(pool1, "available-ips").name,
+            get_allocation_lock(parent_prefix, "available-ips").name,
+        )
+
+    def test_covering(self):
+        """
+        Test retrieval of the prefixes which contain a given prefix or IP address.
+        """
+        vrf = VRF.objects.create(name="Test VRF 1", rd="1234")
+        prefixes = (
+            Prefix.objects.create(prefix=IPNetwork("198.51.0.0/16"), status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/24"), status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/24"), vrf=vrf, status=self.status_active),
+        )
+        url = reverse("ipam-api:prefix-covering")
+        self.add_permissions("ipam.view_prefix")
+
+        response = self.client.get(f"{url}?prefix=198.51.100.1", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([p["id"] for p in response.data], [str(prefixes[1].pk), str(prefixes[0].pk)])
+
+        response = self.client.get(f"{url}?prefix=198.51.100.0/25&vrf_id={vrf.pk}", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([p["id"] for p in response.data], [str(prefixes[2].pk)])
+
+        response = self.client.get(f"{url}?prefix=198.51.300.0/24", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+    def test_longest_match(self):
+        """
+        Test matching a list of IP addresses to the most specific prefixes which contain them.
+        """
+        vrf = VRF.objects.create(name="Test VRF 1", rd="1234")
+        site = Site.objects.create(name="Site 1", slug="site-1")
+        prefixes = (
+            Prefix.objects.create(prefix=IPNetwork("198.51.0.0/16"), status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/24"), site=site, status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/24"), vrf=vrf, status=self.status_active),
+        )
+        ip_address = IPAddress.objects.create(address=IPNetwork("198.51.100.1/24"))
+        url = reverse("ipam-api:prefix-longest-match")
+        self.add_permissions("ipam.view_prefix", "ipam.view_ipaddress", "ipam.view_vrf", "dcim.view_site")
+
+        data = {"addresses": ["198.51.100.1", "198.51.200.1", "203.0.113.1"]}
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([r["address"] for r in response.data], data["addresses"])
+        self.assertEqual(response.data[0]["prefix"]["id"], str(prefixes[1].pk))
+        self.assertEqual(response.data[0]["site"]["id"], str(site.pk))
+        self.assertEqual(response.data[0]["ip_address"]["id"], str(ip_address.pk))
+        self.assertEqual(response.data[1]["prefix"]["id"], str(prefixes[0].pk))
+        self.assertIsNone(response.data[1]["ip_address"])
+        self.assertIsNone(response.data[2]["prefix"])
+
+        response = self.client.post(
+            url, {"addresses": ["198.51.100.1"], "vrf": str(vrf.pk)}, format="json", **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["prefix"]["id"], str(prefixes[2].pk))
+        self.assertEqual(response.data[0]["vrf"]["id"], str(vrf.pk))
+        self.assertIsNone(response.data[0]["ip_address"])
+
+        # The number of queries does not depend on the number of addresses
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {"addresses": ["198.51.100.1"]}, format="json", **self.header)
+        query_count = len(queries)
+        with CaptureQueriesContext(connection) as queries:
+            addresses = [f"198.51.{i}.1" for i in range(100)]
+            response = self.client.post(url, {"addresses": addresses}, format="json", **self.header)
+        self.assertEqual(len(queries), query_count)
+        self.assertEqual(len(response.data), 100)
+
+        response = self.client.post(url, {"addresses": ["198.51.300.1"]}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
+    def test_longest_match_restricted(self):
+        """
+        Test that longest-match lookups require only view permission, and fall back to the most specific viewable prefix.
+        """
+        prefixes = (
+            Prefix.objects.create(prefix=IPNetwork("198.51.0.0/16"), status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/24"), status=self.status_active),
+        )
+        url = reverse("ipam-api:prefix-longest-match")
+        data = {"addresses": ["198.51.100.1"]}
+
+        # View permission is required
+        with disable_warnings("django.request"):
+            response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
+        # Only the /16 may be viewed, using a read-only token
+        obj_perm = ObjectPermission(name="Test permission", constraints={"prefix_length": 16}, actions=["view"])
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Prefix))
+        self.token.write_enabled = False
+        self.token.save()
+
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["prefix"]["id"], str(prefixes[0].pk))
+
+    def test_bulk_allocate(self):
+        """
+        Test the allocation of IP addresses and prefixes from within multiple parent prefixes in a single request.
+        """
+        vrf = VRF.objects.create(name="Test VRF 1", rd="1234")
+        ip_parents = (
+            Prefix.objects.create(prefix=IPNetwork("192.0.2.0/29"), status=self.status_active),
+            Prefix.objects.create(prefix=IPNetwork("198.51.100.0/30"), vrf=vrf, status=self.status_active),
+        )
+        prefix_parent = Prefix.objects.create(prefix=IPNetwork("203.0.113.0/24"), status=self.status_active)
+        Prefix.objects.create(prefix=IPNetwork("203.0.113.0/26"), status=self.status_active)
+        IPAddress.objects.create(address=IPNetwork("192.0.2.1/29"))
+        url = reverse("ipam-api:prefix-bulk-allocate")
+        self.add_permissions("ipam.view_prefix", "ipam.add_prefix", "extras.view_status")
+
+        # Allocating IP addresses requires permission to add IP addresses
+        data = [{"parent": str(ip_parents[0].pk), "attributes": {"status": "active"}}]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
+        self.add_permissions("ipam.add_ipaddress")
+        data = [
+            {"parent": str(ip_parents[0].pk), "count": 3, "attributes": {"status": "active", "description": "A"}},
+            {"parent": str(ip_parents[1].pk), "count": 2, "attributes": {"status": "active"}},
+            {"parent": str(prefix_parent.pk), "prefix_length": 26, "count": 2, "attributes": {"status": "active"}},
+            {"parent": str(ip_parents[0].pk), "attributes": {"status": "active", "description": "B"}},
+        ]
+        ip_count = IPAddress.objects.count()
+        prefix_count = Prefix.objects.count()
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [[obj.get("address", obj.get("prefix")) for obj in objs] for objs in response.data],
+            [
+                ["192.0.2.2/29", "192.0.2.3/29", "192.0.2.4/29"],
+                ["198.51.100.1/30", "198.51.100.2/30"],
+                ["203.0.113.64/26", "203.0.113.128/26"],
+                ["192.0.2.5/29"],
+            ],
+        )
+        self.assertEqual(response.data[0][0]["description"], "A")
+        self.assertEqual(response.data[1][0]["vrf"]["id"], str(vrf.pk))
+        self.assertEqual(IPAddress.objects.count(), ip_count + 6)
+        self.assertEqual(Prefix.objects.count(), prefix_count + 2)
+
+        # Nothing is created if any request cannot be satisfied
+        data = [
+            {"parent": str(ip_parents[0].pk), "attributes": {"status": "active"}},
+            {"parent": str(prefix_parent.pk), "prefix_length": 26, "count": 2, "attributes": {"status": "active"}},
+        ]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_204_NO_CONTENT)
+        self.assertIn("detail", response.data)
+        self.assertEqual(IPAddress.objects.count(), ip_count + 6)
+        self.assertEqual(Prefix.objects.count(), prefix_count + 2)
+
 
 class ParallelPrefixTest(APITransactionTestCase):
     """
@@ -530,6 +760,79 @@ class VLANGroupTest(APIViewTestCases.APIViewTestCase):
         )
         VLANGroup.objects.bulk_create(vlan_groups)
 
+    def test_list_available_vlans(self):
+        """
+        Test retrieval of all available VLAN IDs within a VLAN group.
+        """
+        vlan_group = VLANGroup.objects.create(name="VLAN Group 7", slug="vlan-group-7")
+        status_active = Status.objects.get_for_model(VLAN).get(slug="active")
+        for vid in (1, 2, 5, 4094):
+            VLAN.objects.create(name=f"VLAN {vid}", vid=vid, group=vlan_group, status=status_active)
+        url = reverse("ipam-api:vlangroup-available-vlans", kwargs={"pk": vlan_group.pk})
+        self.add_permissions("ipam.view_vlangroup", "ipam.view_vlan")
+
+        response = self.client.get(f"{url}?limit=4", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([vlan["vid"] for vlan in response.data], [3, 4, 6, 7])
+        self.assertEqual(response.data[0]["group"]["id"], str(vlan_group.pk))
+
+        response = self.client.get(f"{url}?limit=0", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 4094 - 4)
+        self.assertEqual(response.data[-1]["vid"], 4093)
+
+    def test_create_single_available_vlan(self):
+        """
+        Test the creation of the first available VLAN within a VLAN group, inheriting the site of the group.
+        """
+        site = Site.objects.create(name="Site 1", slug="site-1")
+        vlan_group = VLANGroup.objects.create(name="VLAN Group 7", slug="vlan-group-7", site=site)
+        status_active = Status.objects.get_for_model(VLAN).get(slug="active")
+        VLAN.objects.create(name="VLAN 1", vid=1, group=vlan_group, site=site, status=status_active)
+        url = reverse("ipam-api:vlangroup-available-vlans", kwargs={"pk": vlan_group.pk})
+        self.add_permissions("ipam.view_vlangroup", "ipam.add_vlan", "extras.view_status")
+
+        response = self.client.post(url, {"name": "VLAN 2", "status": "active"}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["vid"], 2)
+        self.assertEqual(response.data["group"]["id"], str(vlan_group.pk))
+        self.assertEqual(response.data["site"]["id"], str(site.pk))
+
+    def test_create_multiple_available_vlans(self):
+        """
+        Test the creation of available VLANs within a VLAN group, all or nothing.
+        """
+        vlan_group = VLANGroup.objects.create(name="VLAN Group 7", slug="vlan-group-7")
+        status_active = Status.objects.get_for_model(VLAN).get(slug="active")
+        VLAN.objects.bulk_create(
+            [
+                VLAN(name=f"VLAN {vid}", vid=vid, group=vlan_group, status=status_active)
+                for vid in range(1, 4095)
+                if vid not in (10, 20, 30)
+            ]
+        )
+        url = reverse("ipam-api:vlangroup-available-vlans", kwargs={"pk": vlan_group.pk})
+        self.add_permissions("ipam.view_vlangroup", "ipam.add_vlan", "extras.view_status")
+
+        # Try to create four VLANs (only three are available)
+        data = [{"name": f"New VLAN {i}", "status": "active"} for i in range(1, 5)]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_204_NO_CONTENT)
+        self.assertIn("detail", response.data)
+
+        # A single invalid VLAN prevents the creation of the others
+        data = [{"name": "New VLAN 1", "status": "active"}, {"name": "VLAN 1", "status": "active"}]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(VLAN.objects.filter(group=vlan_group, vid=10).exists())
+
+        # Create all three available VLANs in a single request
+        data = [{"name": f"New VLAN {i}", "status": "active"} for i in range(1, 4)]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual([vlan["vid"] for vlan in response.data], [10, 20, 30])
+        self.assertIsNone(vlan_group.get_next_available_vid())
+
 
 class VLANTest(APIViewTestCases.APIViewTestCase):
     model = VLAN
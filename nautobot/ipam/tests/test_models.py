@@ -1,14 +1,17 @@
 import copy
+from itertools import islice
 from unittest import skipIf
 
 import netaddr
 from django.core.exceptions import ValidationError
 from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from nautobot.extras.models import Status
 from nautobot.ipam.choices import IPAddressRoleChoices
 from nautobot.ipam.models import Aggregate, IPAddress, Prefix, RIR, VLAN, VLANGroup, VRF
+from nautobot.ipam.utils import get_prefix_tree
 
 
 class TestVarbinaryIPField(TestCase):
@@ -78,6 +81,31 @@ class TestVarbinaryIPField(TestCase):
         # netaddr.IPAddress => str
         self.assertEqual(self.field.to_python(self.prefix.prefix.ip), self.network)
 
+    def test_from_db_value(self):
+        """Test `VarbinaryIPField.from_db_value` against `netaddr` formatting."""
+        addresses = [
+            "0.0.0.0",
+            "10.0.0.1",
+            "255.255.255.255",
+            "::",
+            "::1",
+            "::ffff:192.0.2.1",
+            "::192.0.2.1",
+            "64:ff9b::c000:201",
+            "2001:db8::1:0:0:1",
+            "fe80::1",
+            "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff",
+        ]
+        for address in addresses:
+            expected = netaddr.IPAddress(address)
+            for packed in (expected.packed, memoryview(expected.packed)):
+                self.assertEqual(self.field.from_db_value(packed, None, connection), str(expected))
+            self.assertEqual(self.field._pack_address(str(expected)), expected.packed)
+
+        # IPv6 addresses with small integer values are not mistaken for IPv4 addresses
+        ip = IPAddress.objects.create(address=netaddr.IPNetwork("::1/128"))
+        self.assertEqual(IPAddress.objects.get(pk=ip.pk).address, netaddr.IPNetwork("::1/128"))
+
     @skipIf(
         connection.vendor != "postgresql",
         "postgres is not the database driver",
@@ -135,6 +163,17 @@ class TestPrefix(TestCase):
         super().setUp()
         self.statuses = Status.objects.get_for_model(Prefix)
 
+    def test_prefix_property(self):
+        prefix = Prefix(prefix=netaddr.IPNetwork("192.0.2.0/24"))
+        self.assertIs(prefix.prefix, prefix.prefix)
+        self.assertEqual(prefix.family, 4)
+
+        prefix.prefix_length = 25
+        self.assertEqual(prefix.prefix, netaddr.IPNetwork("192.0.2.0/25"))
+        prefix.prefix = "2001:db8::/64"
+        self.assertEqual(prefix.prefix, netaddr.IPNetwork("2001:db8::/64"))
+        self.assertEqual(prefix.family, 6)
+
     def test_get_duplicates(self):
         prefixes = (
             Prefix.objects.create(prefix=netaddr.IPNetwork("192.0.2.0/24")),
@@ -291,6 +330,54 @@ class TestPrefix(TestCase):
         IPAddress.objects.create(address=netaddr.IPNetwork("10.0.0.4/24"))
         self.assertEqual(parent_prefix.get_first_available_ip(), "10.0.0.5/24")
 
+    def test_iter_available_ips(self):
+        parent_prefix = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/22"))
+        # Fill the first /23 (but for one address), and scatter some IPs across the second
+        used = [i for i in range(1, 512) if i != 300] + [512, 513, 515, 700, 1022]
+        IPAddress.objects.bulk_create(
+            [IPAddress(address=netaddr.IPNetwork(f"{netaddr.IPAddress(0x0A000000 + i)}/22")) for i in used]
+        )
+        expected = [netaddr.IPAddress(0x0A000000 + i) for i in range(1, 1023) if i not in used]
+
+        self.assertEqual(list(parent_prefix.iter_available_ips()), expected)
+        self.assertEqual(netaddr.IPSet(parent_prefix.iter_available_ips()), parent_prefix.get_available_ips())
+
+        # Finding the first few available IPs does not retrieve every child IP
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(islice(parent_prefix.iter_available_ips(), 3)), expected[:3])
+        self.assertLessEqual(len(queries), 10)
+
+        parent_prefix.is_pool = True
+        self.assertEqual(list(parent_prefix.iter_available_ips())[0], netaddr.IPAddress("10.0.0.0"))
+        self.assertEqual(list(parent_prefix.iter_available_ips())[-1], netaddr.IPAddress("10.0.3.255"))
+
+    def test_iter_available_prefixes(self):
+        parent_prefix = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/16"))
+        Prefix.objects.bulk_create(
+            (
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/24")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.128/25")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.2.0/23")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.3.0/24")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.8.0/24")),
+                Prefix(prefix=netaddr.IPNetwork("2001:db8::/64")),
+            )
+        )
+        self.assertEqual(
+            list(parent_prefix.iter_available_prefixes()),
+            [
+                netaddr.IPNetwork("10.0.1.0/24"),
+                netaddr.IPNetwork("10.0.4.0/22"),
+                netaddr.IPNetwork("10.0.9.0/24"),
+                netaddr.IPNetwork("10.0.10.0/23"),
+                netaddr.IPNetwork("10.0.12.0/22"),
+                netaddr.IPNetwork("10.0.16.0/20"),
+                netaddr.IPNetwork("10.0.32.0/19"),
+                netaddr.IPNetwork("10.0.64.0/18"),
+                netaddr.IPNetwork("10.0.128.0/17"),
+            ],
+        )
+
     def test_get_utilization(self):
 
         # Container Prefix
@@ -312,6 +399,114 @@ class TestPrefix(TestCase):
         )
         self.assertEqual(prefix.get_utilization(), (32, 254))
 
+    def test_get_utilization_overlapping_children(self):
+        prefix = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/16"), status=Prefix.STATUS_CONTAINER)
+        Prefix.objects.bulk_create(
+            (
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/24")),
+                # Duplicate and nested prefixes are counted only once
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/24")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/25")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.1.0/25")),
+                # Prefixes of another family or outside of the container are ignored
+                Prefix(prefix=netaddr.IPNetwork("10.1.0.0/24")),
+                Prefix(prefix=netaddr.IPNetwork("2001:db8::/64")),
+            )
+        )
+        self.assertEqual(prefix.get_utilization(), (384, 65536))
+
+    def test_annotate_utilization(self):
+        vrf = VRF.objects.create(name="VRF 1")
+        prefixes = (
+            Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/24")),
+            Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/24"), vrf=vrf),
+            Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/31")),
+            Prefix.objects.create(prefix=netaddr.IPNetwork("2001:db8::/64")),
+        )
+        IPAddress.objects.bulk_create(
+            [IPAddress(address=netaddr.IPNetwork("10.0.0.{}/24".format(i))) for i in range(0, 10)]
+            + [IPAddress(address=netaddr.IPNetwork("10.0.0.1/24"))]
+            + [IPAddress(address=netaddr.IPNetwork("10.0.0.{}/24".format(i)), vrf=vrf) for i in range(1, 5)]
+            + [IPAddress(address=netaddr.IPNetwork("2001:db8::1/64"))]
+        )
+        expected = {prefix.pk: prefix.get_utilization() for prefix in prefixes}
+        self.assertEqual(expected[prefixes[0].pk], (10, 254))
+        self.assertEqual(expected[prefixes[1].pk], (4, 254))
+        self.assertEqual(expected[prefixes[2].pk], (2, 2))
+        self.assertEqual(expected[prefixes[3].pk], (1, 2 ** 64))
+
+        with CaptureQueriesContext(connection) as queries:
+            annotated = list(Prefix.objects.filter(pk__in=expected).annotate_utilization())
+            for prefix in annotated:
+                self.assertEqual(prefix.get_utilization(), expected[prefix.pk])
+        # One query for the Prefixes, plus one for the child IP addresses of each IP family
+        self.assertLessEqual(len(queries), 3)
+
+    def assertPrefixTree(self):
+        """Assert that the stored parent and depth of every Prefix match those computed from scratch."""
+        prefixes = {p.pk: p for p in Prefix.objects.all()}
+        tree = get_prefix_tree((p.pk, p.vrf_id, p.prefix) for p in prefixes.values())
+        for pk, (parent_id, depth) in tree.items():
+            prefix = prefixes[pk]
+            self.assertEqual(prefix.depth, depth, prefix)
+            # Any of several duplicate prefixes may be the parent, so compare their networks rather than their PKs
+            self.assertEqual(
+                prefixes[prefix.parent_id].prefix if prefix.parent_id else None,
+                prefixes[parent_id].prefix if parent_id else None,
+                prefix,
+            )
+
+    def test_prefix_tree(self):
+        vrf = VRF.objects.create(name="VRF 1")
+        prefix_16 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/16"))
+        prefix_24 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.1.0/24"))
+        prefix_28 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.1.16/28"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.1.16/28"), vrf=vrf)
+        Prefix.objects.create(prefix=netaddr.IPNetwork("2001:db8::/32"))
+        self.assertPrefixTree()
+        prefix_28.refresh_from_db()
+        self.assertEqual(prefix_28.parent, prefix_24)
+        self.assertEqual(prefix_28.depth, 2)
+
+        # Insert a prefix between existing levels of the hierarchy
+        prefix_20 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/20"))
+        self.assertPrefixTree()
+        prefix_24.refresh_from_db()
+        self.assertEqual(prefix_24.parent, prefix_20)
+
+        # Add a duplicate, which neither contains nor is contained by the original
+        Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.1.0/24"))
+        self.assertPrefixTree()
+
+        # Move a prefix to another VRF and to another network
+        prefix_24.vrf = vrf
+        prefix_24.save()
+        self.assertPrefixTree()
+        prefix_20.prefix = netaddr.IPNetwork("10.0.1.0/25")
+        prefix_20.save()
+        self.assertPrefixTree()
+
+        prefix_16.delete()
+        self.assertPrefixTree()
+        Prefix.objects.filter(prefix_length__in=[24, 25]).delete()
+        self.assertPrefixTree()
+        prefix_28.refresh_from_db()
+        self.assertIsNone(prefix_28.parent)
+        self.assertEqual(prefix_28.depth, 0)
+
+    def test_prefix_tree_save_stale_instance(self):
+        prefix_24 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.1.0/24"))
+        stale_prefix_24 = Prefix.objects.get(pk=prefix_24.pk)
+
+        # Insert a prefix above the loaded one, then save the loaded one without moving it
+        prefix_16 = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/16"))
+        stale_prefix_24.description = "Updated"
+        stale_prefix_24.save()
+        self.assertPrefixTree()
+        prefix_24.refresh_from_db()
+        self.assertEqual(prefix_24.parent, prefix_16)
+        self.assertEqual(prefix_24.depth, 1)
+
     #
     # Uniqueness enforcement tests
     #
@@ -408,3 +603,22 @@ class TestVLANGroup(TestCase):
 
         VLAN.objects.bulk_create((VLAN(name="VLAN 4", vid=4, group=vlangroup),))
         self.assertEqual(vlangroup.get_next_available_vid(), 6)
+
+    def test_get_available_vid_ranges(self):
+
+        vlangroup = VLANGroup.objects.create(name="VLAN Group 1", slug="vlan-group-1")
+        self.assertEqual(vlangroup.get_available_vid_ranges(), [(1, 4094)])
+
+        VLAN.objects.bulk_create(
+            (
+                VLAN(name="VLAN 3", vid=3, group=vlangroup),
+                VLAN(name="VLAN 4", vid=4, group=vlangroup),
+                VLAN(name="VLAN 6", vid=6, group=vlangroup),
+                VLAN(name="VLAN 100", vid=100, group=vlangroup),
+                VLAN(name="VLAN 4094", vid=4094, group=vlangroup),
+            )
+        )
+        # VLANs in other groups are ignored
+        VLAN.objects.create(name="VLAN 1", vid=1)
+        self.assertEqual(vlangroup.get_available_vid_ranges(), [(1, 2), (5, 5), (7, 99), (101, 4093)])
+        self.assertEqual(list(islice(vlangroup.iter_available_vids(), 5)), [1, 2, 5, 7, 8])
@@ -1,6 +1,10 @@
+from unittest import skipIf
+
 import netaddr
+from django.db import connection
 
-from nautobot.ipam.models import Prefix, Aggregate, IPAddress, RIR
+from nautobot.ipam.models import Prefix, Aggregate, IPAddress, RIR, VRF
+from nautobot.ipam.prefix_index import PrefixIndex, get_prefix_index
 from nautobot.utilities.testing import TestCase
 
 
@@ -277,3 +281,147 @@ class PrefixQuerysetTestCase(TestCase):
         }
         for term, cnt in search_terms.items():
             self.assertEqual(self.queryset.string_search(term).count(), cnt)
+
+
+class PrefixIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vrf = VRF.objects.create(name="VRF 1")
+
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.0.0/16"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.0/24"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.192/28"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.192/28"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.0/24"), vrf=cls.vrf)
+        Prefix.objects.create(prefix=netaddr.IPNetwork("fd78:da4f:e596:c217::/64"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("fd78:da4f:e596:c217::/120"))
+
+    def test_covering(self):
+        index = PrefixIndex.from_queryset()
+        self.assertEqual(len(index), 7)
+
+        for prefix in (
+            "192.168.3.200/32",
+            "192.168.3.192/29",
+            "192.168.3.0/24",
+            "192.168.4.1",
+            "fd78:da4f:e596:c217::1",
+        ):
+            expected = Prefix.objects.filter(vrf__isnull=True).net_contains_or_equals(netaddr.IPNetwork(prefix))
+            self.assertEqual(
+                index.covering(prefix),
+                list(expected.order_by("-prefix_length", "pk").values_list("pk", flat=True)),
+            )
+        self.assertEqual(index.covering("10.0.0.0/8"), [])
+        self.assertEqual(
+            index.covering("192.168.3.1", vrf_id=self.vrf.pk),
+            [Prefix.objects.get(vrf=self.vrf).pk],
+        )
+
+    def test_longest_match(self):
+        index = PrefixIndex.from_queryset()
+        addresses = ("192.168.3.1", "192.168.4.1", "fd78:da4f:e596:c217::1", "fd78:da4f:e596:c217::1:1", "10.0.0.1")
+        expected = [
+            Prefix.objects.get(prefix="192.168.3.0/24", vrf__isnull=True).pk,
+            Prefix.objects.get(prefix="192.168.0.0/16").pk,
+            Prefix.objects.get(prefix="fd78:da4f:e596:c217::/120").pk,
+            Prefix.objects.get(prefix="fd78:da4f:e596:c217::/64").pk,
+            None,
+        ]
+        self.assertEqual([index.longest_match(address) for address in addresses], expected)
+        self.assertEqual(index.bulk_longest_match(addresses), expected)
+
+    def test_add_and_remove(self):
+        index = PrefixIndex.from_queryset()
+        prefix = Prefix.objects.get(prefix="192.168.3.0/24", vrf__isnull=True)
+
+        index.remove(prefix.pk)
+        self.assertEqual(index.longest_match("192.168.3.1"), Prefix.objects.get(prefix="192.168.0.0/16").pk)
+        index.add(prefix.pk, None, prefix.prefix)
+        self.assertEqual(index.longest_match("192.168.3.1"), prefix.pk)
+        index.add(prefix.pk, self.vrf.pk, netaddr.IPNetwork("10.0.0.0/8"))
+        self.assertEqual(index.longest_match("10.0.0.1", vrf_id=self.vrf.pk), prefix.pk)
+        self.assertEqual(index.longest_match("192.168.3.1"), Prefix.objects.get(prefix="192.168.0.0/16").pk)
+
+    def test_get_prefix_index(self):
+        self.assertEqual(get_prefix_index().longest_match("10.0.0.1"), None)
+
+        # Creating, moving or deleting a Prefix invalidates the index
+        prefix = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/8"))
+        self.assertEqual(get_prefix_index().longest_match("10.0.0.1"), prefix.pk)
+        prefix.vrf = self.vrf
+        prefix.save()
+        self.assertEqual(get_prefix_index().longest_match("10.0.0.1"), None)
+        self.assertEqual(get_prefix_index().longest_match("10.0.0.1", vrf_id=self.vrf.pk), prefix.pk)
+        prefix.delete()
+        self.assertEqual(get_prefix_index().longest_match("10.0.0.1", vrf_id=self.vrf.pk), None)
+
+
+@skipIf(connection.vendor != "postgresql", "postgres is not the database driver")
+class NetworkRangeIndexTestCase(TestCase):
+    """
+    Query plan regression tests, verifying that containment queries make use of the composite network range indexes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vrfs = (VRF.objects.create(name="VRF 1"), VRF.objects.create(name="VRF 2"))
+        rir = RIR.objects.create(name="RIR 1", slug="rir-1")
+        Aggregate.objects.bulk_create(
+            [Aggregate(prefix=netaddr.IPNetwork(f"{i}.0.0.0/8"), rir=rir) for i in range(1, 224)]
+        )
+        Prefix.objects.bulk_create(
+            [
+                Prefix(prefix=netaddr.IPNetwork(f"10.{i}.{j}.0/24"), vrf=vrf)
+                for vrf in (None, *cls.vrfs)
+                for i in range(10)
+                for j in range(0, 256, 8)
+            ]
+        )
+        IPAddress.objects.bulk_create(
+            [
+                IPAddress(address=netaddr.IPNetwork(f"10.0.{i}.{j}/24"), vrf=vrf)
+                for vrf in (None, *cls.vrfs)
+                for i in range(8)
+                for j in range(1, 255, 8)
+            ]
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            # Favor index scans regardless of the (small) size of the test tables, and use up-to-date statistics
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("ANALYZE ipam_aggregate, ipam_prefix, ipam_ipaddress")
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_aggregate_net_contains_or_equals(self):
+        self.assertUsesIndex(
+            Aggregate.objects.net_contains_or_equals(netaddr.IPNetwork("10.1.0.0/16")), "ipam_aggregate_net_bcast_idx"
+        )
+
+    def test_prefix_net_contained(self):
+        self.assertUsesIndex(
+            Prefix.objects.filter(vrf=self.vrfs[0]).net_contained(netaddr.IPNetwork("10.1.0.0/16")),
+            "ipam_prefix_vrf_net_bcast_idx",
+        )
+        self.assertUsesIndex(
+            Prefix.objects.filter(vrf__isnull=True).net_contained(netaddr.IPNetwork("10.1.0.0/16")),
+            "ipam_prefix_vrf_net_bcast_idx",
+        )
+
+    def test_prefix_net_contains_or_equals(self):
+        self.assertUsesIndex(
+            Prefix.objects.filter(vrf=self.vrfs[0]).net_contains_or_equals(netaddr.IPNetwork("10.1.8.0/26")),
+            "ipam_prefix_vrf_net_bcast_idx",
+        )
+
+    def test_prefix_get_child_prefixes(self):
+        prefix = Prefix(prefix=netaddr.IPNetwork("10.1.0.0/16"), vrf=self.vrfs[1])
+        self.assertUsesIndex(prefix.get_child_prefixes(), "ipam_prefix_vrf_net_bcast_idx")
+
+    def test_ipaddress_net_host_contained(self):
+        self.assertUsesIndex(
+            IPAddress.objects.filter(vrf=self.vrfs[0]).net_host_contained(netaddr.IPNetwork("10.0.1.0/24")),
+            "ipam_ipaddress_vrf_host_idx",
+        )
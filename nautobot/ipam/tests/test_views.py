@@ -1,5 +1,7 @@
 import datetime
 
+from django.test import override_settings
+from django.urls import reverse
 from netaddr import IPNetwork
 
 from nautobot.dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Site
@@ -272,6 +274,20 @@ class PrefixTestCase(ViewTestCases.PrimaryObjectViewTestCase):
             "description": "New description",
         }
 
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_list_prefixes_child_counts(self):
+        """
+        Test that the prefix list displays the number of child prefixes of each prefix.
+        """
+        parent = Prefix.objects.get(prefix="10.1.0.0/16")
+        Prefix.objects.create(prefix=IPNetwork("10.1.1.0/24"), vrf=parent.vrf, status=parent.status)
+        Prefix.objects.create(prefix=IPNetwork("10.1.1.0/25"), vrf=parent.vrf, status=parent.status)
+
+        response = self.client.get(reverse("ipam:prefix_list"))
+        self.assertHttpStatus(response, 200)
+        children = {record.pk: record.children for record in response.context["table"].data}
+        self.assertEqual(children[parent.pk], 2)
+
 
 class IPAddressTestCase(ViewTestCases.PrimaryObjectViewTestCase):
     model = IPAddress
@@ -1,4 +1,5 @@
 import netaddr
+from django.core.cache import cache
 
 from .constants import *
 from .models import Prefix, VLAN
@@ -74,22 +75,74 @@ def add_available_vlans(vlan_group, vlans):
     """
     Create fake records for all gaps between used VLANs
     """
-    if not vlans:
-        return [{"vid": VLAN_VID_MIN, "available": VLAN_VID_MAX - VLAN_VID_MIN + 1}]
-
-    prev_vid = VLAN_VID_MAX
-    new_vlans = []
-    for vlan in vlans:
-        if vlan.vid - prev_vid > 1:
-            new_vlans.append({"vid": prev_vid + 1, "available": vlan.vid - prev_vid - 1})
-        prev_vid = vlan.vid
-
-    if vlans[0].vid > VLAN_VID_MIN:
-        new_vlans.append({"vid": VLAN_VID_MIN, "available": vlans[0].vid - VLAN_VID_MIN})
-    if prev_vid < VLAN_VID_MAX:
-        new_vlans.append({"vid": prev_vid + 1, "available": VLAN_VID_MAX - prev_vid})
+    new_vlans = [{"vid": first, "available": last - first + 1} for first, last in vlan_group.get_available_vid_ranges()]
 
     vlans = list(vlans) + new_vlans
     vlans.sort(key=lambda v: v.vid if type(v) == VLAN else v["vid"])
 
     return vlans
+
+
+def get_prefix_tree(prefixes):
+    """
+    Compute the position in the prefix hierarchy of each of the given prefixes, given as `(pk, vrf_id, prefix)` tuples.
+
+    A prefix's parent is the most specific other prefix of the same VRF which contains it, and its depth is the number of
+    prefixes of the same VRF which contain it. (Duplicate prefixes do not contain one another.) Returns a dictionary
+    mapping each pk to a `(parent_pk, depth)` tuple.
+    """
+    tree = {}
+    scope = None
+    # Containing prefixes of the current prefix, least specific first, as (pk, prefix) tuples
+    stack = []
+
+    # Within each VRF and family, every prefix sorts after all of the prefixes which contain it
+    for pk, vrf_id, prefix in sorted(
+        prefixes, key=lambda p: (p[1] is not None, str(p[1]), p[2].version, p[2].first, p[2].prefixlen)
+    ):
+        if (vrf_id, prefix.version) != scope:
+            scope = (vrf_id, prefix.version)
+            stack = []
+        while stack and stack[-1][1].last < prefix.last:
+            stack.pop()
+        depth = len(stack)
+        while depth and stack[depth - 1][1].prefixlen == prefix.prefixlen:
+            depth -= 1
+        tree[pk] = (stack[depth - 1][0] if depth else None, depth)
+        stack.append((pk, prefix))
+
+    return tree
+
+
+def get_allocation_lock(prefix, resource):
+    """
+    Return a lock which serializes the allocation of the given resource ("available-ips" or "available-prefixes") from
+    within the given Prefix.
+
+    The lock is scoped to the outermost non-container Prefix of the same VRF which contains (or duplicates) the given
+    Prefix, so that allocations from overlapping Prefixes (such as a parent and its child pool, which could otherwise
+    hand out the same IP address) share a lock, while allocations from unrelated Prefixes may proceed concurrently.
+    Container Prefixes are disregarded, so that sibling pools within a large container are not serialized; allocations
+    from a container itself are only serialized against those from the same container.
+    """
+    root = (
+        Prefix.objects.ip_family(prefix.family)
+        .filter(vrf_id=prefix.vrf_id)
+        .exclude(status=Prefix.STATUS_CONTAINER)
+        .net_contains_or_equals(prefix.prefix)
+        .order_by("prefix_length")
+        .values_list("network", "prefix_length")
+        .first()
+    )
+    root = "{}/{}".format(*root) if root is not None else prefix.prefix.cidr
+    return cache.lock(
+        f"nautobot.ipam.{resource}.{prefix.vrf_id or 'global'}.{root}",
+        blocking_timeout=ALLOCATION_LOCK_TIMEOUT,
+    )
+
+
+def get_vlan_allocation_lock(vlan_group):
+    """
+    Return a lock which serializes the allocation of VLAN IDs from within the given VLANGroup.
+    """
+    return cache.lock(f"nautobot.ipam.available-vlans.{vlan_group.pk}", blocking_timeout=ALLOCATION_LOCK_TIMEOUT)
@@ -1,8 +1,12 @@
-from django.db.models import Aggregate, JSONField, Value
+import json
+
+from django.db.models import Aggregate, JSONField, TextField, Value
 
 from django.contrib.postgres.aggregates.mixins import OrderableAggMixin
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import NotSupportedError
 from django.db.models import Func
+from django.db.models.functions import Cast
 
 
 class CollateAsChar(Func):
@@ -73,3 +77,76 @@ class OrderableJSONBAgg(OrderableAggMixin, JSONBAgg):
     """
 
     template = "%(function)s(%(distinct)s%(expressions)s %(ordering)s)"
+
+
+def _mysql_json_key_path(key):
+    """
+    Return a MySQL JSON path expression selecting the given top-level key.
+    """
+    return '$."{}"'.format(key.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+class JSONSet(Func):
+    """
+    Set a top-level key of a JSON field to the given JSON-serializable value, leaving all other keys untouched.
+
+    Intended for set-based updates, for example:
+
+        >>> Site.objects.update(_custom_field_data=JSONSet("_custom_field_data", "my_field", "default"))
+    """
+
+    function = None
+    output_field = JSONField()
+
+    def __init__(self, expression, key, value, **extra):
+        self.key = key
+        value = Cast(Value(json.dumps(value, cls=DjangoJSONEncoder)), output_field=JSONField())
+        super().__init__(expression, value, **extra)
+
+    def as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
+        vendor = connection.vendor
+        # Mapping of vendor => (function, key path)
+        func_map = {
+            "postgresql": ("JSONB_SET", [self.key]),
+            "mysql": ("JSON_SET", _mysql_json_key_path(self.key)),
+        }
+
+        if vendor not in func_map:
+            raise NotSupportedError(f"JSONSet is not supported for database {vendor}")
+
+        function, path = func_map[vendor]
+        expression, value = self.get_source_expressions()
+        clone = self.copy()
+        clone.set_source_expressions([expression, Value(path), value])
+
+        return super(JSONSet, clone).as_sql(compiler, connection, function, template, arg_joiner, **extra_context)
+
+
+class JSONRemove(Func):
+    """
+    Remove a top-level key from a JSON field, leaving all other keys untouched.
+    """
+
+    function = None
+    output_field = JSONField()
+
+    def __init__(self, expression, key, **extra):
+        self.key = key
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
+        vendor = connection.vendor
+        (expression,) = self.get_source_expressions()
+        clone = self.copy()
+
+        if vendor == "postgresql":
+            clone.set_source_expressions([expression, Cast(Value(self.key), output_field=TextField())])
+            template = "(%(expressions)s)"
+            arg_joiner = " - "
+        elif vendor == "mysql":
+            clone.set_source_expressions([expression, Value(_mysql_json_key_path(self.key))])
+            function = "JSON_REMOVE"
+        else:
+            raise NotSupportedError(f"JSONRemove is not supported for database {vendor}")
+
+        return super(JSONRemove, clone).as_sql(compiler, connection, function, template, arg_joiner, **extra_context)
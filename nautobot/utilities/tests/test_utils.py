@@ -6,7 +6,9 @@ from nautobot.utilities.utils import (
     get_filterset_for_model,
     deepmerge,
     dict_to_filter_params,
+    get_jinja2_template,
     normalize_querydict,
+    render_jinja2,
 )
 from nautobot.dcim.models import Device, Site
 from nautobot.dcim.filters import DeviceFilterSet, SiteFilterSet
@@ -158,3 +160,16 @@ class IsTruthyTest(TestCase):
         self.assertFalse(is_truthy("n"))
         self.assertFalse(is_truthy(0))
         self.assertFalse(is_truthy("0"))
+
+
+class RenderJinja2Test(TestCase):
+    def test_compiled_template_is_cached(self):
+        get_jinja2_template.cache_clear()
+        self.assertEqual(render_jinja2("Hello {{ name }}", {"name": "world"}), "Hello world")
+        self.assertEqual(render_jinja2("Hello {{ name }}", {"name": "again"}), "Hello again")
+        self.assertIs(get_jinja2_template("Hello {{ name }}"), get_jinja2_template("Hello {{ name }}"))
+        self.assertEqual(get_jinja2_template.cache_info().misses, 1)
+
+    def test_changed_template_is_recompiled(self):
+        self.assertEqual(render_jinja2("{{ a }}", {"a": 1, "b": 2}), "1")
+        self.assertEqual(render_jinja2("{{ b }}", {"a": 1, "b": 2}), "2")
@@ -4,6 +4,7 @@ import json
 import inspect
 from importlib import import_module
 from collections import OrderedDict, namedtuple
+from functools import lru_cache
 from itertools import count, groupby
 
 from django.conf import settings
@@ -227,13 +228,24 @@ def to_meters(length, unit):
     raise ValueError("Unknown unit {}. Must be 'm', 'cm', 'ft', or 'in'.".format(unit))
 
 
+@lru_cache(maxsize=1024)
+def get_jinja2_template(template_code):
+    """
+    Compile the given Jinja2 template source and return the resulting template.
+
+    Compiled templates are cached per process, keyed by their source, so that templates which are rendered repeatedly
+    (webhook headers and bodies, custom links, export templates, computed fields) are only compiled once. Because the
+    source itself is the cache key, editing and saving the owning object implicitly uses a freshly compiled template.
+    """
+    rendering_engine = engines["jinja"]
+    return rendering_engine.from_string(template_code)
+
+
 def render_jinja2(template_code, context):
     """
     Render a Jinja2 template with the provided context. Return the rendered content.
     """
-    rendering_engine = engines["jinja"]
-    template = rendering_engine.from_string(template_code)
-    return template.render(context=context)
+    return get_jinja2_template(template_code).render(context=context)
 
 
 def prepare_cloned_fields(instance):